@@ -0,0 +1,64 @@
+"""Add CV list and default template indexes
+
+Revision ID: 3b9d2c7e5a41
+Revises: f2ecf32b61e9
+Create Date: 2025-06-14 10:12:31.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d2c7e5a41'
+down_revision: Union[str, None] = 'f2ecf32b61e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # templates is a handful of rows, so the brief rewrite lock of this ALTER is harmless
+    op.alter_column(
+        'templates', 'is_default',
+        existing_type=sa.String(length=10),
+        type_=sa.Boolean(),
+        postgresql_using="coalesce(lower(is_default) = 'true', false)",
+        nullable=False,
+        server_default=sa.false()
+    )
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        # Serves the CV list (filter on user_id, keyset order on updated_at, id)
+        # and every per-user lookup that filters on user_id
+        op.create_index(
+            'ix_cvs_user_id_updated_at', 'cvs',
+            ['user_id', sa.text('updated_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_templates_is_default', 'templates', ['is_default'],
+            postgresql_where=sa.text('is_default'),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_templates_is_default', table_name='templates', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_cvs_user_id_updated_at', table_name='cvs', postgresql_concurrently=True, if_exists=True)
+
+    op.alter_column(
+        'templates', 'is_default',
+        existing_type=sa.Boolean(),
+        type_=sa.String(length=10),
+        postgresql_using="CASE WHEN is_default THEN 'true' ELSE 'false' END",
+        nullable=True,
+        server_default=None
+    )
@@ -0,0 +1,40 @@
+"""Add CV revisions
+
+Revision ID: 5e2a7b9c1d84
+Revises: 8c4f1a9d2e73
+Create Date: 2025-06-18 14:02:11.574320
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a7b9c1d84'
+down_revision: Union[str, None] = '8c4f1a9d2e73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('cv_revisions',
+    sa.Column('cv_id', sa.UUID(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('is_snapshot', sa.Boolean(), nullable=False),
+    sa.Column('chain', sa.SmallInteger(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('content_length', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['cv_id'], ['cvs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('cv_id', 'version')
+    )
+    # Deltas are already compressed; keep Postgres from trying again
+    op.execute("ALTER TABLE cv_revisions ALTER COLUMN data SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cv_revisions')
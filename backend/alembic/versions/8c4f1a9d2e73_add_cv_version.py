@@ -0,0 +1,29 @@
+"""Add CV version for optimistic concurrency
+
+Revision ID: 8c4f1a9d2e73
+Revises: 3b9d2c7e5a41
+Create Date: 2025-06-16 09:27:45.631902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4f1a9d2e73'
+down_revision: Union[str, None] = '3b9d2c7e5a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant server default makes this a catalog-only change on Postgres 11+, no table rewrite
+    op.add_column('cvs', sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('cvs', 'version')
@@ -0,0 +1,29 @@
+"""Add template updated_at
+
+Revision ID: a71d3e5f0b26
+Revises: 5e2a7b9c1d84
+Create Date: 2025-06-19 11:48:37.902415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a71d3e5f0b26'
+down_revision: Union[str, None] = '5e2a7b9c1d84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # API workers compare max(updated_at) and count(*) against their template catalog
+    op.add_column('templates', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('templates', 'updated_at')
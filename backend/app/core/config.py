@@ -1,10 +1,39 @@
 from pydantic_settings import BaseSettings
+from typing import Optional
 
 class Settings(BaseSettings):
     database_url: str
     secret_key: str
+    
+    # Database pools (each engine, per process). The async URL defaults to DATABASE_URL on asyncpg
+    database_async_url: Optional[str] = None
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 500
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    
+    # Authentication: per-process user cache, and user claims embedded in access tokens
+    auth_user_cache_ttl_seconds: float = 60.0
+    auth_user_cache_max_entries: int = 10000
+    auth_embed_user_claims: bool = False
+    
+    # Password hashing: bcrypt cost, and the dedicated executor that runs it
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 32
+    
+    # Seconds between checks of the templates table for changes to the cached catalog
+    template_catalog_check_seconds: float = 30.0
+    
+    # CV revision history: a full snapshot every N revisions, reverse deltas in between
+    cv_revision_snapshot_interval: int = 32
+    
+    # Seconds between batched writes of buffered last_login timestamps
+    last_login_flush_interval_seconds: float = 5.0
     environment: str = "development"
     
     huggingface_api_key: str
@@ -12,6 +41,42 @@ class Settings(BaseSettings):
     llm_max_tokens: int = 2000
     llm_temperature: float = 0.7
     
+    # Async LLM path: OpenAI-compatible endpoint, pooled connections, bounded concurrency
+    llm_base_url: str = "https://router.huggingface.co/v1"
+    llm_provider: str = "novita"
+    llm_max_concurrency: int = 16
+    llm_per_user_concurrency: int = 2
+    llm_timeout_seconds: float = 60.0
+    llm_queue_timeout_seconds: float = 5.0
+    
+    # LLM response cache: "memory" (per process), "sqlite" (shared file) or "none"
+    llm_cache_backend: str = "memory"
+    llm_cache_path: str = "/tmp/resumeforge/llm_cache.sqlite3"
+    llm_cache_ttl_seconds: float = 3600.0
+    llm_cache_max_entries: int = 2000
+    
+    # Comma-separated list of emails allowed to use /api/admin endpoints
+    admin_emails: str = ""
+    
+    # PDF render cache (memory LRU + optional shared disk tier)
+    pdf_cache_max_bytes: int = 64 * 1024 * 1024
+    pdf_cache_dir: Optional[str] = None
+    pdf_cache_disk_max_bytes: int = 512 * 1024 * 1024
+    
+    # WeasyPrint render worker processes (0 renders in the threadpool instead)
+    render_pool_size: int = 2
+    render_job_timeout_seconds: float = 30.0
+    render_worker_max_jobs: int = 200
+    render_worker_max_rss_mb: int = 512
+    
+    # Render job queue: waiting jobs allowed per priority before new ones are shed, and result retention
+    render_queue_max_interactive: int = 100
+    render_queue_max_export: int = 20
+    render_job_ttl_seconds: float = 600.0
+    
+    # PDFs rendered at once for one ZIP export of all of a user's CVs
+    export_max_parallel_renders: int = 2
+    
     class Config:
         env_file = "../.env"
 
@@ -0,0 +1,42 @@
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from typing import Dict, Iterator, Optional
+import hashlib
+
+# Responses larger than this are streamed in chunks instead of sent in one body
+STREAM_THRESHOLD_BYTES = 256 * 1024
+STREAM_CHUNK_BYTES = 64 * 1024
+
+def make_etag(*parts: str) -> str:
+    """Strong ETag (quoted) derived from the given validator parts"""
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def not_modified_response(etag: str, cache_control: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """304 carrying the same validators (and any extra headers) a full response would have"""
+    return Response(status_code=304, headers={**(headers or {}), "ETag": etag, "Cache-Control": cache_control})
+
+def _iter_chunks(data: bytes) -> Iterator[memoryview]:
+    # Slices of a memoryview share the buffer, so no chunk is copied
+    view = memoryview(data)
+    for start in range(0, len(view), STREAM_CHUNK_BYTES):
+        yield view[start:start + STREAM_CHUNK_BYTES]
+
+def bytes_response(data: bytes, media_type: str, headers: Dict[str, str]) -> Response:
+    """Send small bodies directly and stream large ones in chunks"""
+    headers = {**headers, "Content-Length": str(len(data))}
+    if len(data) <= STREAM_THRESHOLD_BYTES:
+        return Response(content=data, media_type=media_type, headers=headers)
+    return StreamingResponse(_iter_chunks(data), media_type=media_type, headers=headers)
+
+def file_response(path: str, media_type: str, headers: Dict[str, str]) -> Response:
+    """Stream a file from disk without reading it into memory; Content-Length comes from its size"""
+    return FileResponse(path, media_type=media_type, headers=headers)
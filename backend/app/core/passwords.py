@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+import asyncio
+import logging
+import threading
+import time
+from app.core import config
+from app.core.metrics import Histogram, Counters
+from app.core.security import pwd_context
+
+logger = logging.getLogger(__name__)
+
+class PasswordHasherBusyError(Exception):
+    """Raised when the password executor's queue is full"""
+
+class PasswordHasher:
+    """
+    Runs bcrypt hash/verify on a dedicated thread pool, off the request threadpool.
+
+    bcrypt releases the GIL, so the workers hash in parallel. At most
+    max_queue jobs may be waiting or running; past that, calls fail
+    immediately with PasswordHasherBusyError instead of queueing behind a
+    login spike.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.hash_seconds = Histogram()
+        self.verify_seconds = Histogram()
+        self.queue_wait_seconds = Histogram()
+        self.counters = Counters("hashes", "verifications", "rehashes", "rejected", "logins_succeeded", "logins_failed")
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        return self._executor
+
+    async def _run(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self.counters.inc("rejected")
+                raise PasswordHasherBusyError("Password hashing queue is full")
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def timed():
+            self.queue_wait_seconds.observe(time.perf_counter() - submitted)
+            return func(*args)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), timed)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _hash(self, password: str) -> str:
+        started = time.perf_counter()
+        password_hash = pwd_context.hash(password)
+        self.hash_seconds.observe(time.perf_counter() - started)
+        self.counters.inc("hashes")
+        return password_hash
+
+    def _verify(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        started = time.perf_counter()
+        verified, new_hash = pwd_context.verify_and_update(password, password_hash)
+        self.verify_seconds.observe(time.perf_counter() - started)
+        self.counters.inc("verifications")
+        if new_hash is not None:
+            self.counters.inc("rehashes")
+        return verified, new_hash
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the current bcrypt policy"""
+        return await self._run(self._hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password against its hash.
+
+        Returns (verified, new_hash); new_hash is set when the stored hash
+        was made under a different rounds policy and should be replaced.
+        """
+        return await self._run(self._verify, password, password_hash)
+
+    def record_login(self, succeeded: bool) -> None:
+        self.counters.inc("logins_succeeded" if succeeded else "logins_failed")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue state, login/hash counters and timing histograms for this process"""
+        counters = self.counters.snapshot()
+        uptime = max(time.time() - self.started_at, 1e-9)
+        with self._lock:
+            pending = self._pending
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": pending,
+            "bcrypt_rounds": config.settings.bcrypt_rounds,
+            **counters,
+            "logins_per_second": round((counters["logins_succeeded"] + counters["logins_failed"]) / uptime, 4),
+            "hash_seconds": self.hash_seconds.snapshot(),
+            "verify_seconds": self.verify_seconds.snapshot(),
+            "queue_wait_seconds": self.queue_wait_seconds.snapshot()
+        }
+
+password_hasher = PasswordHasher(
+    workers=config.settings.password_hash_workers,
+    max_queue=config.settings.password_hash_max_queue
+)
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import logging
+import threading
+import time
+from sqlalchemy import event
+from app.core import config
+from app.models.user import User
+from app.schemas.auth import UserResponse
+
+logger = logging.getLogger(__name__)
+
+class UserCache:
+    """
+    Short-TTL per-process cache of authenticated users, keyed by the token subject.
+
+    Deleting a user drops its entry and leaves a tombstone for the lifetime of
+    an access token, so tokens that carry embedded user claims (and never hit
+    the database) stop working in this process as soon as the user is gone.
+    That only happens for ORM deletes in this process: Core delete(User)
+    statements and other workers are bounded by ttl_seconds, after which the
+    next request goes back to the database.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, tombstone_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.tombstone_seconds = tombstone_seconds
+        self._entries: "OrderedDict[str, Tuple[float, UserResponse]]" = OrderedDict()
+        self._tombstones: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "claims": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, sub: str) -> Optional[UserResponse]:
+        """Return the cached user for sub, if present and not expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(sub)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[sub]
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(sub)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, sub: str, user: UserResponse) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[sub] = (time.monotonic() + self.ttl_seconds, user)
+            self._entries.move_to_end(sub)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def count_claims(self) -> None:
+        """Record a request authenticated from embedded token claims"""
+        with self._lock:
+            self._stats["claims"] += 1
+
+    def invalidate(self, sub: str, deleted: bool = False) -> None:
+        """Drop the cached user; deleted=True also rejects its outstanding tokens"""
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(sub, None)
+            self._stats["invalidations"] += 1
+            if deleted:
+                self._tombstones = {key: expires for key, expires in self._tombstones.items() if expires > now}
+                self._tombstones[sub] = now + self.tombstone_seconds
+
+    def is_deleted(self, sub: str) -> bool:
+        with self._lock:
+            expires = self._tombstones.get(sub)
+            return expires is not None and expires > time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tombstones.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and occupancy for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["tombstones"] = len(self._tombstones)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+user_cache = UserCache(
+    ttl_seconds=config.settings.auth_user_cache_ttl_seconds,
+    max_entries=config.settings.auth_user_cache_max_entries,
+    tombstone_seconds=config.settings.access_token_expire_minutes * 60
+)
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    # Fires for ORM deletes in this process; other workers rely on the TTL
+    user_cache.invalidate(str(target.id), deleted=True)
+
+@event.listens_for(User, "after_update")
+def _invalidate_updated_user(mapper, connection, target):
+    user_cache.invalidate(str(target.id))
@@ -1,17 +1,99 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, cast, select, update, Row, Select, Text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.cv import CV
-from typing import List, Optional, Dict, Any
+from app.crud.revision import add_revision
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
 from uuid import UUID
 
-def get_user_cvs(db: Session, user_id: str) -> List[CV]:
-    """Get all CVs for a user"""
-    return db.query(CV).filter(CV.user_id == user_id).order_by(CV.updated_at.desc()).all()
+# Columns the CV list needs; content and settings are never loaded for it
+CV_LIST_COLUMNS = (CV.id, CV.name, CV.created_at, CV.updated_at)
 
-def get_cv_by_id(db: Session, cv_id: str, user_id: str) -> Optional[CV]:
+class CVVersionConflict(Exception):
+    """Raised when an update expected a version the CV has already moved past"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"CV is at version {current_version}")
+        self.current_version = current_version
+
+def _user_cvs_query(user_id: str, name_prefix: Optional[str], *columns) -> Select:
+    query = select(*columns).where(CV.user_id == user_id)
+    if name_prefix:
+        # autoescape makes % and _ in the prefix match literally
+        query = query.where(CV.name.istartswith(name_prefix, autoescape=True))
+    return query
+
+def user_cv_page_query(
+    user_id: str,
+    limit: int,
+    after: Optional[Tuple[datetime, UUID]] = None,
+    name_prefix: Optional[str] = None
+) -> Select:
+    """The statement behind get_user_cv_page"""
+    query = _user_cvs_query(user_id, name_prefix, *CV_LIST_COLUMNS)
+    if after is not None:
+        query = query.where(tuple_(CV.updated_at, CV.id) < tuple_(*after))
+    return query.order_by(CV.updated_at.desc(), CV.id.desc()).limit(limit)
+
+async def get_user_cv_page(
+    db: AsyncSession,
+    user_id: str,
+    limit: int,
+    after: Optional[Tuple[datetime, UUID]] = None,
+    name_prefix: Optional[str] = None
+) -> List[Any]:
+    """
+    One page of a user's CV list (id, name, created_at, updated_at), newest first.
+    
+    Keyset pagination: after is the (updated_at, id) of the last row of the
+    previous page, so every page costs the same however deep it is.
+    """
+    result = await db.execute(user_cv_page_query(user_id, limit, after=after, name_prefix=name_prefix))
+    return result.all()
+
+async def count_user_cvs(db: AsyncSession, user_id: str, name_prefix: Optional[str] = None) -> int:
+    """Number of CVs a user has, optionally only those whose name starts with name_prefix"""
+    return await db.scalar(_user_cvs_query(user_id, name_prefix, func.count(CV.id)))
+
+async def get_user_cv_ids(db: AsyncSession, user_id: str) -> List[UUID]:
+    """Ids of all of a user's CVs, most recently updated first"""
+    result = await db.scalars(
+        select(CV.id).where(CV.user_id == user_id).order_by(CV.updated_at.desc(), CV.id.desc())
+    )
+    return list(result)
+
+def _owned_cv(cv_id: str, user_id: str):
+    return (CV.id == cv_id, CV.user_id == user_id)
+
+async def get_cv_by_id(db: AsyncSession, cv_id: str, user_id: str) -> Optional[CV]:
     """Get a specific CV by ID (only if it belongs to the user)"""
-    return db.query(CV).filter(CV.id == cv_id, CV.user_id == user_id).first()
+    return await db.scalar(select(CV).where(*_owned_cv(cv_id, user_id)))
+
+async def get_cv_content(db: AsyncSession, cv_id: str, user_id: str) -> Optional[Row]:
+    """Get just a CV's markdown and version"""
+    result = await db.execute(select(CV.markdown_content, CV.version).where(*_owned_cv(cv_id, user_id)))
+    return result.first()
+
+def _content_hash_columns():
+    """md5 of the markdown and of the settings JSON, computed by Postgres"""
+    return (
+        func.md5(func.coalesce(CV.markdown_content, "")).label("content_hash"),
+        func.md5(func.coalesce(cast(CV.settings, Text), "")).label("settings_hash")
+    )
+
+async def get_cv_fingerprint(db: AsyncSession, cv_id: str, user_id: str) -> Optional[Tuple[str, str]]:
+    """Get (content_hash, settings_hash) for a CV without transferring its content"""
+    result = await db.execute(select(*_content_hash_columns()).where(*_owned_cv(cv_id, user_id)))
+    row = result.first()
+    return (row.content_hash, row.settings_hash) if row else None
 
-def create_cv(db: Session, user_id: str, name: str, markdown_content: Optional[str] = None, settings: Optional[Dict[str, Any]] = None) -> CV:
+async def get_cv_with_fingerprint(db: AsyncSession, cv_id: str, user_id: str) -> Optional[Tuple[CV, str, str]]:
+    """Get a CV together with its (content_hash, settings_hash) in one query"""
+    result = await db.execute(select(CV, *_content_hash_columns()).where(*_owned_cv(cv_id, user_id)))
+    row = result.first()
+    return (row[0], row.content_hash, row.settings_hash) if row else None
+
+async def create_cv(db: AsyncSession, user_id: str, name: str, markdown_content: Optional[str] = None, settings: Optional[Dict[str, Any]] = None) -> CV:
     """Create a new CV"""
     db_cv = CV(
         user_id=user_id,
@@ -20,33 +102,68 @@ def create_cv(db: Session, user_id: str, name: str, markdown_content: Optional[s
         settings=settings or {}
     )
     db.add(db_cv)
-    db.commit()
-    db.refresh(db_cv)
+    await db.commit()
+    await db.refresh(db_cv)
     return db_cv
 
-def update_cv(db: Session, cv_id: str, user_id: str, name: Optional[str] = None, markdown_content: Optional[str] = None, settings: Optional[Dict[str, Any]] = None) -> Optional[CV]:
-    """Update a CV (only if it belongs to the user)"""
-    cv = db.query(CV).filter(CV.id == cv_id, CV.user_id == user_id).first()
-    if not cv:
-        return None
+async def update_cv(
+    db: AsyncSession,
+    cv_id: str,
+    user_id: str,
+    name: Optional[str] = None,
+    markdown_content: Optional[str] = None,
+    settings: Optional[Dict[str, Any]] = None,
+    expected_version: Optional[int] = None
+) -> Optional[Row]:
+    """
+    Update a CV (only if it belongs to the user) in one UPDATE ... RETURNING.
     
+    Only the given columns are written, and the version is bumped. Returns
+    id, version and updated_at plus name/settings when they changed; the new
+    markdown is never read back. When the markdown changes, the statement
+    also returns the text it replaced, which is stored as a revision in the
+    same transaction. Returns None if the CV does not exist and raises
+    CVVersionConflict if expected_version is no longer current.
+    """
+    changes = {}
     if name is not None:
-        cv.name = name
+        changes["name"] = name
     if markdown_content is not None:
-        cv.markdown_content = markdown_content
+        changes["markdown_content"] = markdown_content
     if settings is not None:
-        cv.settings = settings
+        changes["settings"] = settings
+    
+    returning = [CV.id, CV.version, CV.updated_at]
+    returning += [getattr(CV, column) for column in ("name", "settings") if column in changes]
+    conditions = list(_owned_cv(cv_id, user_id))
+    if expected_version is not None:
+        conditions.append(CV.version == expected_version)
     
-    db.commit()
-    db.refresh(cv)
-    return cv
+    if changes:
+        statement = update(CV).where(*conditions).values(**changes, version=CV.version + 1)
+        if markdown_content is not None:
+            # Self-join on the locked row to get the markdown as it was before this update
+            previous = select(CV.id, CV.markdown_content).where(*_owned_cv(cv_id, user_id)).with_for_update().subquery("previous")
+            statement = statement.where(CV.id == previous.c.id)
+            returning.append(previous.c.markdown_content.label("previous_content"))
+        result = await db.execute(
+            statement.returning(*returning).execution_options(synchronize_session=False)
+        )
+        row = result.first()
+        if row is not None and markdown_content is not None and (row.previous_content or "") != markdown_content:
+            await add_revision(db, row.id, row.version - 1, row.previous_content or "", markdown_content)
+        await db.commit()
+    else:
+        row = (await db.execute(select(*returning).where(*conditions))).first()
+    
+    if row is None and expected_version is not None:
+        current_version = await db.scalar(select(CV.version).where(*_owned_cv(cv_id, user_id)))
+        if current_version is not None:
+            raise CVVersionConflict(current_version)
+    return row
 
-def delete_cv(db: Session, cv_id: str, user_id: str) -> bool:
+async def delete_cv(db: AsyncSession, cv_id: str, user_id: str) -> bool:
     """Delete a CV (only if it belongs to the user)"""
-    cv = db.query(CV).filter(CV.id == cv_id, CV.user_id == user_id).first()
-    if not cv:
-        return False
-    
-    db.delete(cv)
-    db.commit()
-    return True
\ No newline at end of file
+    result = await db.execute(delete(CV).where(*_owned_cv(cv_id, user_id)))
+    await db.commit()
+    return result.rowcount > 0
\ No newline at end of file
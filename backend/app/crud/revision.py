@@ -0,0 +1,65 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.models.cv import CVRevision
+from app.core.config import settings
+from app.services.revisions import RevisionData, encode_snapshot, encode_reverse_delta, reconstruct
+from typing import List, Optional, Any
+from uuid import UUID
+
+async def add_revision(db: AsyncSession, cv_id: UUID, version: int, older: str, newer: str) -> CVRevision:
+    """Record older, the markdown of version, as newer replaces it (the caller commits)"""
+    top = (await db.execute(
+        select(CVRevision.chain)
+        .where(CVRevision.cv_id == cv_id)
+        .order_by(CVRevision.version.desc())
+        .limit(1)
+    )).first()
+    chain = top.chain + 1 if top else 1
+    is_snapshot = chain >= settings.cv_revision_snapshot_interval
+    if is_snapshot:
+        data = await run_in_threadpool(encode_snapshot, older)
+    else:
+        data = await run_in_threadpool(encode_reverse_delta, newer, older)
+
+    revision = CVRevision(
+        cv_id=cv_id,
+        version=version,
+        is_snapshot=is_snapshot,
+        chain=0 if is_snapshot else chain,
+        data=data,
+        content_length=len(older)
+    )
+    db.add(revision)
+    return revision
+
+async def list_revisions(db: AsyncSession, cv_id: str, limit: int, before: Optional[int] = None) -> List[Any]:
+    """Newest-first revision metadata of a CV (the caller checks ownership)"""
+    query = select(
+        CVRevision.version, CVRevision.content_length, CVRevision.is_snapshot, CVRevision.created_at
+    ).where(CVRevision.cv_id == cv_id)
+    if before is not None:
+        query = query.where(CVRevision.version < before)
+    result = await db.execute(query.order_by(CVRevision.version.desc()).limit(limit))
+    return result.all()
+
+async def get_revision_content(db: AsyncSession, cv_id: str, version: int, head: str, head_version: int) -> Optional[str]:
+    """
+    Markdown of a past version, rebuilt from head (the CV's current text at head_version).
+
+    Reads the revision and the rows above it up to the first snapshot: one
+    index range scan and at most snapshot-interval deltas. Read head before
+    calling, so rows written by a later save are excluded by head_version.
+    """
+    query = (
+        select(CVRevision.version, CVRevision.is_snapshot, CVRevision.data)
+        .where(CVRevision.cv_id == cv_id, CVRevision.version >= version, CVRevision.version < head_version)
+        .order_by(CVRevision.version.asc())
+    )
+    rows = [RevisionData(*row) for row in await db.execute(query.limit(settings.cv_revision_snapshot_interval))]
+    if not rows or rows[0].version != version:
+        return None
+    if not any(row.is_snapshot for row in rows) and len(rows) == settings.cv_revision_snapshot_interval:
+        # Chain longer than the interval (it was lowered since these rows were written)
+        rows = [RevisionData(*row) for row in await db.execute(query)]
+    return await run_in_threadpool(reconstruct, head, rows)
@@ -1,16 +1,23 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.cv import Template
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
 from uuid import UUID
 
-def get_all_templates(db: Session) -> List[Template]:
+async def get_all_templates(db: AsyncSession) -> List[Template]:
     """Get all available templates"""
-    return db.query(Template).all()
+    return (await db.scalars(select(Template).order_by(Template.name, Template.id))).all()
 
-def get_template_by_id(db: Session, template_id: str) -> Optional[Template]:
+async def get_template_by_id(db: AsyncSession, template_id: str) -> Optional[Template]:
     """Get a specific template by ID"""
-    return db.query(Template).filter(Template.id == template_id).first()
+    return await db.scalar(select(Template).where(Template.id == template_id))
 
-def get_default_templates(db: Session) -> List[Template]:
+async def get_default_templates(db: AsyncSession) -> List[Template]:
     """Get only default templates"""
-    return db.query(Template).filter(Template.is_default == "true").all()
\ No newline at end of file
+    return (await db.scalars(select(Template).where(Template.is_default))).all()
+
+async def get_template_catalog_stamp(db: AsyncSession) -> Tuple[Optional[datetime], int]:
+    """(latest updated_at, row count) of the templates table; changes whenever a template is added, edited or removed"""
+    row = (await db.execute(select(func.max(Template.updated_at), func.count(Template.id)))).one()
+    return row[0], row[1]
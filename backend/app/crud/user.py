@@ -1,40 +1,55 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, column, or_, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
-from app.core.security import get_password_hash, verify_password
 from datetime import datetime
+from typing import Dict
+import uuid
 
-def get_user_by_email(db: Session, email: str) -> User:
+async def get_user_by_email(db: AsyncSession, email: str) -> User:
     """Get user by email"""
-    return db.query(User).filter(User.email == email).first()
+    return await db.scalar(select(User).where(User.email == email))
 
-def get_user_by_id(db: Session, user_id: str) -> User:
+async def get_user_by_id(db: AsyncSession, user_id: str) -> User:
     """Get user by ID"""
-    return db.query(User).filter(User.id == user_id).first()
+    return await db.scalar(select(User).where(User.id == user_id))
 
-def create_user(db: Session, email: str, password: str) -> User:
-    """Create a new user"""
-    hashed_password = get_password_hash(password)
+async def create_user(db: AsyncSession, email: str, password_hash: str) -> User:
+    """Create a new user from an already hashed password"""
     db_user = User(
         email=email,
-        password_hash=hashed_password
+        password_hash=password_hash
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def authenticate_user(db: Session, email: str, password: str) -> User:
-    """Authenticate user with email and password"""
-    user = get_user_by_email(db, email)
-    if not user:
-        return None
-    if not verify_password(password, user.password_hash):
-        return None
+async def update_password_hash(db: AsyncSession, user: User, password_hash: str) -> User:
+    """Replace a user's password hash (e.g. after a bcrypt rounds change)"""
+    user.password_hash = password_hash
+    await db.commit()
     return user
 
-def update_last_login(db: Session, user: User) -> User:
-    """Update user's last login timestamp"""
-    user.last_login = datetime.utcnow()
-    db.commit()
-    db.refresh(user)
-    return user
\ No newline at end of file
+async def bulk_update_last_login(db: AsyncSession, logins: Dict[str, datetime]) -> int:
+    """
+    Set last_login for many users in one UPDATE ... FROM (VALUES ...) statement.
+
+    Never moves a timestamp backwards. Returns the number of rows updated.
+    """
+    if not logins:
+        return 0
+    rows = values(
+        column("id", UUID(as_uuid=True)),
+        column("last_login", DateTime(timezone=True)),
+        name="logins"
+    ).data([(uuid.UUID(str(user_id)), logged_in_at) for user_id, logged_in_at in logins.items()])
+    result = await db.execute(
+        update(User)
+        .where(User.id == rows.c.id)
+        .where(or_(User.last_login.is_(None), User.last_login < rows.c.last_login))
+        .values(last_login=rows.c.last_login)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
@@ -1,11 +1,38 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from typing import AsyncIterator
 from app.core.config import settings
 
-engine = create_engine(settings.database_url)
+def async_database_url() -> URL:
+    """DATABASE_ASYNC_URL, or DATABASE_URL switched to the asyncpg driver"""
+    url = make_url(settings.database_async_url or settings.database_url)
+    if url.drivername in ("postgresql", "postgres", "postgresql+psycopg2"):
+        url = url.set(drivername="postgresql+asyncpg")
+    if url.drivername == "postgresql+asyncpg":
+        # Prepared statements cached per connection; 0 disables (needed behind pgbouncer in transaction mode)
+        url = url.update_query_dict({"prepared_statement_cache_size": str(settings.db_statement_cache_size)})
+    return url
+
+POOL_OPTIONS = dict(
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout_seconds,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    pool_pre_ping=settings.db_pool_pre_ping
+)
+
+# Sync engine: migrations, scripts and work that already runs on a thread
+engine = create_engine(settings.database_url, **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: request handlers, so database I/O never occupies a threadpool slot
+async_engine = create_async_engine(async_database_url(), **POOL_OPTIONS)
+# expire_on_commit=False: attributes stay readable after commit without an implicit (sync) reload
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency to get database session
@@ -14,4 +41,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async database session
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
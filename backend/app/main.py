@@ -1,11 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, cvs, templates, llm
+from app.database import async_engine
+from app.routers import auth, cvs, templates, llm, admin
+from app.services.render_pool import render_pool
+from app.services.render_jobs import render_jobs
+from app.services.llm_service import llm_service
+from app.services.template_catalog import template_catalog
+from app.core.passwords import password_hasher
+from app.services.login_buffer import last_login_buffer
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def load_template_catalog():
+    """Load the template catalog; requests retry the load if the database is not up yet"""
+    try:
+        await template_catalog.load()
+    except Exception as e:
+        logger.warning(f"Could not load the template catalog: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services on startup and stop them on shutdown"""
+    await load_template_catalog()
+    await render_pool.start(warm_settings=template_catalog.settings())
+    render_jobs.start()
+    last_login_buffer.start()
+    yield
+    await last_login_buffer.shutdown()
+    await render_jobs.shutdown()
+    await render_pool.shutdown()
+    await llm_service.aclose()
+    password_hasher.shutdown()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="ResumeForge API",
     description="Professional CV builder with Markdown editor and AI assistance",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -14,12 +48,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "ETag", "Location", "Retry-After", "X-Page-Count", "X-Export-Id"],
 )
 
 app.include_router(auth.router)
 app.include_router(cvs.router)
 app.include_router(templates.router)
 app.include_router(llm.router)
+app.include_router(admin.router)
 
 @app.get("/")
 def root():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, func, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, Boolean, Integer, SmallInteger, LargeBinary, Index, func, false, text, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import uuid
@@ -14,9 +14,35 @@ class CV(Base):
     settings = Column(JSONB, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Bumped by every update; clients send it back in If-Match to detect concurrent edits
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
     
     # Relationship to User
     user = relationship("User", back_populates="cvs")
+    
+    __table_args__ = (
+        # CV list: filter by owner, newest first, keyset-paginated on (updated_at, id)
+        Index("ix_cvs_user_id_updated_at", user_id, updated_at.desc(), id.desc()),
+    )
+
+class CVRevision(Base):
+    """
+    Earlier markdown of a CV, one row per overwritten version.
+    
+    Most rows hold a zlib-compressed reverse delta (rebuilds this version
+    from the next newer one); every few rows hold a full snapshot instead,
+    so rebuilding any version takes a bounded number of deltas.
+    """
+    __tablename__ = "cv_revisions"
+    
+    cv_id = Column(UUID(as_uuid=True), ForeignKey("cvs.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    is_snapshot = Column(Boolean, nullable=False)
+    # Delta rows since the snapshot below this one (0 for a snapshot)
+    chain = Column(SmallInteger, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    content_length = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class Template(Base):
     __tablename__ = "templates"
@@ -26,4 +52,10 @@ class Template(Base):
     description = Column(Text, nullable=True)
     markdown_content = Column(Text, nullable=True)
     settings = Column(JSONB, nullable=True)
-    is_default = Column(String(10), default="false")  # Using string for compatibility
\ No newline at end of file
+    is_default = Column(Boolean, nullable=False, default=False, server_default=false())
+    # Watched by the per-worker template catalog to notice changes
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_templates_is_default", is_default, postgresql_where=is_default),
+    )
\ No newline at end of file
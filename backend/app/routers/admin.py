@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.schemas.auth import UserResponse
+from app.routers.auth import get_current_user
+from app.services.render_cache import render_cache
+from app.services.render_pool import render_pool
+from app.services.render_jobs import render_jobs
+from app.services.page_preview import page_previews
+from app.services.cv_export import cv_exports
+from app.services.llm_cache import llm_cache
+from app.services.singleflight import render_flights, llm_flights
+from app.core.user_cache import user_cache
+from app.core.passwords import password_hasher
+from app.services.login_buffer import last_login_buffer
+from app.services.template_catalog import template_catalog
+from app.core.config import settings
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+async def get_current_admin(current_user: UserResponse = Depends(get_current_user)) -> UserResponse:
+    """Only allow users listed in ADMIN_EMAILS"""
+    admin_emails = {email.strip().lower() for email in settings.admin_emails.split(",") if email.strip()}
+    if current_user.email.lower() not in admin_emails:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+@router.get("/render-cache")
+def get_render_cache_stats(current_admin: UserResponse = Depends(get_current_admin)):
+    """Get PDF render cache hit/miss/eviction counters"""
+    return render_cache.stats()
+
+@router.get("/render-pool")
+def get_render_pool_stats(current_admin: UserResponse = Depends(get_current_admin)):
+    """Get render worker pool counters and per-worker state"""
+    return render_pool.stats()
+
+@router.get("/render-jobs")
+def get_render_job_stats(current_admin: UserResponse = Depends(get_current_admin)):
+    """Get render job queue depth per priority, dedup/shed counters and average job time"""
+    return render_jobs.stats()
+
+@router.get("/page-previews")
+def get_page_preview_stats(current_admin: UserResponse = Depends(get_current_admin)):
+    """Get PNG page preview counters: pages served from cache versus rasterized"""
+    return page_previews.stats()
+
+@router.get("/exports")
+def get_export_stats(current_admin: UserResponse = Depends(get_current_admin)):
+    """Get ZIP export counters, bytes streamed and running exports"""
+    return cv_exports.stats()
+
+@router.get("/singleflight")
+def get_singleflight_stats(current_admin: UserResponse = Depends(get_current_admin)):
+    """Get how many identical concurrent renders and LLM calls were coalesced into one"""
+    return {"render": render_flights.stats(), "llm": llm_flights.stats()}
+
+@router.get("/llm-cache")
+def get_llm_cache_stats(current_admin: UserResponse = Depends(get_current_admin)):
+    """Get LLM response cache hit/miss counters and occupancy"""
+    return llm_cache.stats()
+
+@router.get("/user-cache")
+def get_user_cache_stats(current_admin: UserResponse = Depends(get_current_admin)):
+    """Get authenticated-user cache hit/miss counters and occupancy"""
+    return user_cache.stats()
+
+@router.get("/auth-metrics")
+def get_auth_metrics(current_admin: UserResponse = Depends(get_current_admin)):
+    """Get login throughput, password executor queue state and bcrypt timing histograms"""
+    return password_hasher.stats()
+
+@router.get("/login-buffer")
+def get_login_buffer_stats(current_admin: UserResponse = Depends(get_current_admin)):
+    """Get buffered last_login counters and pending updates"""
+    return last_login_buffer.stats()
+
+@router.get("/template-catalog")
+def get_template_catalog_stats(current_admin: UserResponse = Depends(get_current_admin)):
+    """Get in-memory template catalog size, reload counters and last change check"""
+    return template_catalog.stats()
@@ -1,77 +1,152 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.schemas.auth import UserRegister, UserLogin, Token, UserResponse
-from app.crud.user import create_user, authenticate_user, get_user_by_email, get_user_by_id, update_last_login
-from app.core.security import create_access_token, verify_token
+from app.crud.user import create_user, get_user_by_email, get_user_by_id, update_password_hash
+from app.core.security import create_access_token, decode_token
 from app.core.config import settings
+from app.core.user_cache import user_cache
+from app.core.passwords import password_hasher, PasswordHasherBusyError
+from app.services.login_buffer import last_login_buffer
+from pydantic import ValidationError
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+def _busy_exception(e: PasswordHasherBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in attempts in progress, please retry shortly",
+        headers={"Retry-After": "1"}
+    )
+
 @router.post("/register", response_model=UserResponse)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    if get_user_by_email(db, user_data.email):
+    if await get_user_by_email(db, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create new user
-    user = create_user(db, user_data.email, user_data.password)
+    # Hash on the password executor, then create the user
+    try:
+        password_hash = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusyError as e:
+        raise _busy_exception(e)
+    user = await create_user(db, user_data.email, password_hash)
     return user
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """Login user and return access token"""
     # Authenticate user (OAuth2 uses 'username' field for email)
-    user = authenticate_user(db, form_data.username, form_data.password)
-    if not user:
+    user = await get_user_by_email(db, form_data.username)
+    verified, new_hash = False, None
+    if user:
+        try:
+            verified, new_hash = await password_hasher.verify(form_data.password, user.password_hash)
+        except PasswordHasherBusyError as e:
+            raise _busy_exception(e)
+    password_hasher.record_login(verified)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Update last login
-    update_last_login(db, user)
+    # Stored hash predates the current bcrypt rounds policy
+    if new_hash:
+        await update_password_hash(db, user, new_hash)
+    
+    # Buffer last login; it is written in a batch later, not on this request
+    logged_in_at = datetime.now(timezone.utc)
+    last_login_buffer.record(str(user.id), logged_in_at)
     
     # Create access token
+    user_response = UserResponse.model_validate(user).model_copy(update={"last_login": logged_in_at})
+    user_cache.put(str(user.id), user_response)
+    claims = None
+    if settings.auth_embed_user_claims:
+        claims = {"user": user_response.model_dump(mode="json", exclude={"id"})}
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        subject=str(user.id), expires_delta=access_token_expires
+        subject=str(user.id), expires_delta=access_token_expires, claims=claims
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> UserResponse:
-    """Get current authenticated user"""
-    user_id = verify_token(token)
-    
-    if user_id is None:
+def _token_claims(token: str) -> dict:
+    """Verified claims of a bearer token whose user has not been deleted"""
+    payload = decode_token(token)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    user = get_user_by_id(db, user_id)
-    if user is None:
+    if user_cache.is_deleted(payload["sub"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+async def _load_user(db: AsyncSession, user_id: str) -> UserResponse:
+    """The user from the database, cached; 401 when it no longer exists"""
+    db_user = await get_user_by_id(db, user_id)
+    if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    user = UserResponse.model_validate(db_user)
+    user_cache.put(user_id, user)
     return user
 
+async def get_current_user_id(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> str:
+    """
+    Get the current user's id from the token. The user cache vouches that the
+    user still exists; on a miss the database does, so a deleted user is
+    locked out within the cache TTL.
+    """
+    user_id = _token_claims(token)["sub"]
+    if user_cache.get(user_id) is None:
+        await _load_user(db, user_id)
+    return user_id
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserResponse:
+    """Get current authenticated user from token claims, the user cache, or the database"""
+    payload = _token_claims(token)
+    user_id = payload["sub"]
+    
+    claims = payload.get("user")
+    if isinstance(claims, dict):
+        try:
+            user = UserResponse(**{**claims, "id": user_id})
+            user_cache.count_claims()
+            return user
+        except ValidationError:
+            pass
+    
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    return await _load_user(db, user_id)
+
 @router.get("/me", response_model=UserResponse)
 def get_me(current_user: UserResponse = Depends(get_current_user)):
     """Get current user info"""
@@ -1,89 +1,430 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import Response
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.schemas.cv import CVCreate, CVUpdate, CVResponse, CVListResponse
-from app.schemas.auth import UserResponse
-from app.crud.cv import get_user_cvs, get_cv_by_id, create_cv, update_cv, delete_cv
-from app.routers.auth import get_current_user
-from app.services.pdf_service import pdf_service
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from datetime import datetime
+from uuid import UUID
+import base64
+from app.database import get_async_db
+from app.schemas.cv import (
+    CVCreate, CVUpdate, CVContentPatch, CVResponse, CVUpdateResponse, CVListResponse,
+    CVRestoreResponse, CVRevisionResponse, CVRevisionContentResponse, RenderJobCreate, RenderJobResponse,
+    ExportProgressResponse
+)
+from app.crud.cv import get_user_cv_page, get_user_cv_ids, count_user_cvs, get_cv_by_id, get_cv_content, get_cv_fingerprint, get_cv_with_fingerprint, create_cv, update_cv, delete_cv, CVVersionConflict
+from app.crud.revision import list_revisions, get_revision_content
+from app.core.http_cache import make_etag, etag_matches, not_modified_response, bytes_response, file_response
+from app.routers.auth import get_current_user_id
+from app.services.render_cache import render_cache, render_cache_key, pdf_etag, RENDER_VERSION
+from app.services.page_preview import page_previews, PageNotFoundError, PREVIEW_AVAILABLE
+from app.services.render_pool import render_pool, RenderTimeoutError
+from app.services.render_jobs import render_jobs, RenderJob, RenderQueueFullError
+from app.services.cv_export import cv_exports, safe_filename, EXPORT_FORMATS, EMPTY_CV_MARKDOWN
+from app.services.text_patch import apply_ops, content_hash, PatchError
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/cvs", tags=["cvs"])
 
+# Page size of the CV list (and of a CV's revision list)
+CV_PAGE_DEFAULT = 50
+CV_PAGE_MAX = 200
+
+# Longest a render job status request may wait for the job to finish
+RENDER_JOB_MAX_WAIT_SECONDS = 20.0
+
 @router.get("/", response_model=List[CVListResponse])
-def get_cvs(
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_cvs(
+    response: Response,
+    limit: int = Query(CV_PAGE_DEFAULT, ge=1, le=CV_PAGE_MAX),
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = Query(None, max_length=255),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the current user's CVs, most recently updated first.
+    
+    Pass the X-Next-Cursor header of one page as ?cursor= to get the next;
+    X-Total-Count is the number of CVs matching name_prefix.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    # One extra row tells us whether another page exists
+    rows = await get_user_cv_page(db, current_user_id, limit + 1, after=after, name_prefix=name_prefix)
+    page = rows[:limit]
+    
+    response.headers["X-Total-Count"] = str(await count_user_cvs(db, current_user_id, name_prefix=name_prefix))
+    if len(rows) > limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(page[-1].updated_at, page[-1].id)
+    return page
+
+# Render job routes are declared before /{cv_id} so "render-jobs" is never taken for a CV id
+
+def _owned_render_job(job_id: str, user_id: str) -> RenderJob:
+    job = render_jobs.get(job_id, user_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Render job not found"
+        )
+    return job
+
+@router.get("/render-jobs/{job_id}", response_model=RenderJobResponse)
+async def get_render_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=RENDER_JOB_MAX_WAIT_SECONDS),
+    current_user_id: str = Depends(get_current_user_id)
 ):
-    """Get all CVs for the current user"""
-    cvs = get_user_cvs(db, str(current_user.id))
-    return cvs
+    """Get a render job's status, waiting up to wait seconds for it to finish"""
+    job = _owned_render_job(job_id, current_user_id)
+    if wait and not job.finished.is_set():
+        job = await render_jobs.wait(job, wait)
+    return job
+
+@router.get("/render-jobs/{job_id}/result")
+async def get_render_job_result(job_id: str, current_user_id: str = Depends(get_current_user_id)):
+    """Download the PDF of a finished render job"""
+    job = _owned_render_job(job_id, current_user_id)
+    if job.status != "done":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=job.error or f"Render job is {job.status}"
+        )
+    headers = {
+        "Content-Disposition": f"attachment; filename=\"{safe_filename(job.cv_name, 'pdf')}\"",
+        "ETag": job.etag,
+        "Cache-Control": PDF_DOWNLOAD_CACHE_CONTROL
+    }
+    path = render_cache.disk_path(job.cache_key)
+    if path:
+        return file_response(path, media_type="application/pdf", headers=headers)
+    pdf_bytes = render_cache.get(job.cache_key)
+    if pdf_bytes is None:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Render result expired. Please submit the job again."
+        )
+    return bytes_response(pdf_bytes, media_type="application/pdf", headers=headers)
+
+# The ZIP export is also declared before /{cv_id}
+
+def _export_formats(formats: str) -> List[str]:
+    requested = [part.strip().lower() for part in formats.split(",") if part.strip()]
+    unknown = [part for part in requested if part not in EXPORT_FORMATS]
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"formats must be a comma-separated list of: {', '.join(EXPORT_FORMATS)}"
+        )
+    return [fmt for fmt in EXPORT_FORMATS if fmt in requested]
+
+@router.get("/export.zip")
+async def export_cvs_zip(
+    formats: str = Query("pdf,md"),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Download all of the user's CVs as one ZIP, streamed as their PDFs render.
+    
+    Poll GET /api/cvs/exports/{id} with the X-Export-Id header for progress.
+    CVs whose PDF fails are listed in export-errors.txt inside the archive.
+    """
+    requested = _export_formats(formats)
+    cv_ids = await get_user_cv_ids(db, current_user_id)
+    progress = cv_exports.start(current_user_id, requested, len(cv_ids))
+    return StreamingResponse(
+        cv_exports.stream(progress, cv_ids),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename=\"cvs-{progress.created_at:%Y-%m-%d}.zip\"",
+            "Cache-Control": EXPORT_CACHE_CONTROL,
+            "X-Export-Id": progress.id
+        }
+    )
+
+@router.get("/exports/{export_id}", response_model=ExportProgressResponse)
+async def get_export_progress(export_id: str, current_user_id: str = Depends(get_current_user_id)):
+    """
+    Get the progress of a ZIP export.
+    Polls reaching a worker other than the one streaming the ZIP need the
+    shared disk tier (PDF_CACHE_DIR); without it, run a single worker. A 404
+    means the export is unknown or finished long enough ago to be forgotten.
+    """
+    progress = cv_exports.get(export_id, current_user_id)
+    if not progress:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found"
+        )
+    return progress
+
+@router.post("/{cv_id}/render-jobs", response_model=RenderJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_render_job(
+    cv_id: str,
+    response: Response,
+    job_request: Optional[RenderJobCreate] = None,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Queue a PDF render of the CV as it is now.
+    
+    Poll GET /api/cvs/render-jobs/{id} (its Location) until status is done,
+    then fetch /result. Answers 503 with Retry-After when the queue for the
+    job's priority is full.
+    """
+    found = await get_cv_with_fingerprint(db, cv_id, current_user_id)
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    cv, content_hash, settings_hash = found
+    try:
+        job = render_jobs.submit(
+            user_id=current_user_id,
+            cv_id=str(cv.id),
+            cv_name=cv.name,
+            priority=(job_request or RenderJobCreate()).priority,
+            markdown_content=cv.markdown_content or "",
+            settings=cv.settings,
+            etag=pdf_etag(content_hash, settings_hash)
+        )
+    except RenderQueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many PDFs are being generated. Please try again shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    response.headers["Location"] = f"{router.prefix}/render-jobs/{job.id}"
+    return job
 
 @router.get("/{cv_id}", response_model=CVResponse)
-def get_cv(
+async def get_cv(
     cv_id: str,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get a specific CV by ID"""
-    cv = get_cv_by_id(db, cv_id, str(current_user.id))
+    """Get a specific CV by ID; the ETag carries its version for If-Match on update"""
+    cv = await get_cv_by_id(db, cv_id, current_user_id)
     if not cv:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="CV not found"
         )
+    response.headers["ETag"] = _version_etag(cv.version)
     return cv
 
 @router.post("/", response_model=CVResponse)
-def create_new_cv(
+async def create_new_cv(
     cv_data: CVCreate,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new CV"""
-    cv = create_cv(
+    cv = await create_cv(
         db=db,
-        user_id=str(current_user.id),
+        user_id=current_user_id,
         name=cv_data.name,
         markdown_content=cv_data.markdown_content,
         settings=cv_data.settings
     )
     return cv
 
-@router.put("/{cv_id}", response_model=CVResponse)
-def update_cv_endpoint(
+@router.put("/{cv_id}", response_model=CVUpdateResponse, response_model_exclude_unset=True)
+async def update_cv_endpoint(
     cv_id: str,
     cv_data: CVUpdate,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Update an existing CV"""
-    cv = update_cv(
-        db=db,
-        cv_id=cv_id,
-        user_id=str(current_user.id),
-        name=cv_data.name,
-        markdown_content=cv_data.markdown_content,
-        settings=cv_data.settings
-    )
-    if not cv:
+    """
+    Update an existing CV.
+    
+    Send the ETag from GET (or the version of the last update) as If-Match to
+    get 412 instead of overwriting a newer save from another tab. The response
+    carries the new version and updated_at, not the content that was sent.
+    """
+    try:
+        row = await update_cv(
+            db=db,
+            cv_id=cv_id,
+            user_id=current_user_id,
+            name=cv_data.name,
+            markdown_content=cv_data.markdown_content,
+            settings=cv_data.settings,
+            expected_version=_if_match_version(if_match)
+        )
+    except CVVersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="CV was changed elsewhere; reload it before saving",
+            headers={"ETag": _version_etag(e.current_version)}
+        )
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="CV not found"
         )
-    return cv
+    response.headers["ETag"] = _version_etag(row.version)
+    return CVUpdateResponse(**row._mapping)
+
+@router.patch("/{cv_id}/content", response_model=CVUpdateResponse, response_model_exclude_unset=True)
+async def patch_cv_content(
+    cv_id: str,
+    patch: CVContentPatch,
+    response: Response,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Autosave a markdown edit as ops against the saved text.
+    
+    Answers 409 when base_hash is not the saved text, the ops do not apply, or
+    the result does not hash to result_hash; the client then falls back to PUT.
+    """
+    found = await get_cv_content(db, cv_id, current_user_id)
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    base, version = found
+    if content_hash(base) != patch.base_hash:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Base text does not match the saved CV"
+        )
+    try:
+        content = apply_ops(base, patch.ops)
+    except PatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Patch does not apply: {e}"
+        )
+    if content_hash(content) != patch.result_hash:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Patched text does not match result_hash"
+        )
+    
+    try:
+        row = await update_cv(
+            db=db,
+            cv_id=cv_id,
+            user_id=current_user_id,
+            markdown_content=content,
+            expected_version=version
+        )
+    except CVVersionConflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="CV was saved concurrently"
+        )
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    response.headers["ETag"] = _version_etag(row.version)
+    return CVUpdateResponse(**row._mapping)
+
+@router.get("/{cv_id}/revisions", response_model=List[CVRevisionResponse])
+async def get_cv_revisions(
+    cv_id: str,
+    limit: int = Query(CV_PAGE_DEFAULT, ge=1, le=CV_PAGE_MAX),
+    before: Optional[int] = Query(None, ge=1),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Earlier versions of a CV's markdown, newest first (the current one is not included).
+    
+    Pass the last version of one page as ?before= to get the next.
+    """
+    if not await get_cv_content(db, cv_id, current_user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    return await list_revisions(db, cv_id, limit, before=before)
+
+async def _revision_content(db: AsyncSession, cv_id: str, user_id: str, version: int) -> Tuple[str, int]:
+    """Markdown of a past version plus the CV's current version"""
+    found = await get_cv_content(db, cv_id, user_id)
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    head, head_version = found
+    content = await get_revision_content(db, cv_id, version, head or "", head_version)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Revision not found"
+        )
+    return content, head_version
+
+@router.get("/{cv_id}/revisions/{version}", response_model=CVRevisionContentResponse)
+async def get_cv_revision(
+    cv_id: str,
+    version: int,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the markdown of an earlier version of a CV"""
+    content, _ = await _revision_content(db, cv_id, current_user_id, version)
+    return CVRevisionContentResponse(version=version, markdown_content=content)
+
+@router.post("/{cv_id}/revisions/{version}/restore", response_model=CVRestoreResponse, response_model_exclude_unset=True)
+async def restore_cv_revision(
+    cv_id: str,
+    version: int,
+    response: Response,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Make an earlier version's markdown the current content.
+    
+    This is a normal save, so the content it replaces becomes a revision too
+    and the restore can itself be undone.
+    """
+    content, head_version = await _revision_content(db, cv_id, current_user_id, version)
+    try:
+        row = await update_cv(
+            db=db,
+            cv_id=cv_id,
+            user_id=current_user_id,
+            markdown_content=content,
+            expected_version=head_version
+        )
+    except CVVersionConflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="CV was saved concurrently"
+        )
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    response.headers["ETag"] = _version_etag(row.version)
+    return CVRestoreResponse(**row._mapping, markdown_content=content)
 
 @router.delete("/{cv_id}")
-def delete_cv_endpoint(
+async def delete_cv_endpoint(
     cv_id: str,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a CV"""
-    success = delete_cv(db, cv_id, str(current_user.id))
+    success = await delete_cv(db, cv_id, current_user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -91,42 +432,123 @@ def delete_cv_endpoint(
         )
     return {"message": "CV deleted successfully"}
 
-@router.get("/{cv_id}/pdf")
-def download_cv_pdf(
+# Cache-Control policies for the export endpoints: browsers may keep a copy
+# but must revalidate with the ETag before every reuse
+PDF_DOWNLOAD_CACHE_CONTROL = "private, max-age=0, must-revalidate"
+PDF_PREVIEW_CACHE_CONTROL = "private, no-cache"
+MARKDOWN_CACHE_CONTROL = "private, no-cache"
+PNG_PREVIEW_CACHE_CONTROL = "private, no-cache"
+# A ZIP export is a snapshot that is never revalidated
+EXPORT_CACHE_CONTROL = "private, no-store"
+
+# Page preview resolution: 24 dpi makes a ~200px wide dashboard thumbnail
+PREVIEW_DPI_DEFAULT = 96
+PREVIEW_DPI_MIN = 24
+PREVIEW_DPI_MAX = 200
+
+def _encode_cursor(updated_at: datetime, cv_id: UUID) -> str:
+    raw = f"{updated_at.isoformat()}|{cv_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Parse a list cursor back into the (updated_at, id) it was made from"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        updated_at, cv_id = raw.split("|", 1)
+        return datetime.fromisoformat(updated_at), UUID(cv_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _version_etag(version: int) -> str:
+    return f'"v{version}"'
+
+def _if_match_version(if_match: Optional[str]) -> Optional[int]:
+    """CV version named by an If-Match header; None when absent or "*" """
+    if not if_match or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    if not (tag.startswith('"v') and tag.endswith('"') and tag[2:-1].isdigit()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must be a single CV version ETag"
+        )
+    return int(tag[2:-1])
+
+async def _conditional_pdf_response(
+    request: Request,
+    db: AsyncSession,
     cv_id: str,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Generate and download CV as PDF"""
+    user_id: str,
+    cache_control: str,
+    disposition: Optional[str]
+) -> Response:
+    """Answer a PDF request, replying 304 from a hash-only lookup when the client is current"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        fingerprint = await get_cv_fingerprint(db, cv_id, user_id)
+        if not fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="CV not found"
+            )
+        etag = pdf_etag(*fingerprint)
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag, cache_control)
+    
     # Get the CV
-    cv = get_cv_by_id(db, cv_id, str(current_user.id))
-    if not cv:
+    found = await get_cv_with_fingerprint(db, cv_id, user_id)
+    if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="CV not found"
         )
+    cv, content_hash, settings_hash = found
+    markdown_content = cv.markdown_content or ""
+    headers = {
+        "Content-Disposition": disposition or f"attachment; filename=\"{safe_filename(cv.name, 'pdf')}\"",
+        "ETag": pdf_etag(content_hash, settings_hash),
+        "Cache-Control": cache_control
+    }
     
+    # Rendered before and only on disk (e.g. by another worker): send the file
+    path = render_cache.disk_path(render_cache_key(markdown_content, cv.settings))
+    if path:
+        return file_response(path, media_type="application/pdf", headers=headers)
+    
+    # Generate PDF on the render pool
+    pdf_bytes = await render_pool.render(
+        markdown_content=markdown_content,
+        settings=cv.settings,
+        layout_key=str(cv.id)
+    )
+    return bytes_response(pdf_bytes, media_type="application/pdf", headers=headers)
+
+@router.get("/{cv_id}/pdf")
+async def download_cv_pdf(
+    cv_id: str,
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Generate and download CV as PDF"""
     try:
-        # Generate PDF
-        pdf_bytes = pdf_service.generate_pdf(
-            markdown_content=cv.markdown_content or "",
-            settings=cv.settings
+        return await _conditional_pdf_response(
+            request, db, cv_id, current_user_id,
+            cache_control=PDF_DOWNLOAD_CACHE_CONTROL,
+            disposition=None
         )
         
-        # Create filename
-        safe_name = "".join(c for c in cv.name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        filename = f"{safe_name}.pdf"
-        
-        # Return PDF response
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=\"{filename}\"",
-                "Content-Length": str(len(pdf_bytes))
-            }
+    except HTTPException:
+        raise
+    except RenderTimeoutError as e:
+        logger.error(f"PDF generation failed for CV {cv_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="PDF generation took too long. Please try again."
         )
-        
     except Exception as e:
         logger.error(f"PDF generation failed for CV {cv_id}: {str(e)}")
         raise HTTPException(
@@ -135,71 +557,150 @@ def download_cv_pdf(
         )
 
 @router.get("/{cv_id}/markdown")
-def download_cv_markdown(
+async def download_cv_markdown(
     cv_id: str,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Download CV as Markdown file"""
+    # Answer conditional requests from the content hash alone
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        fingerprint = await get_cv_fingerprint(db, cv_id, current_user_id)
+        if not fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="CV not found"
+            )
+        etag = make_etag("md", fingerprint[0])
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag, MARKDOWN_CACHE_CONTROL)
+    
     # Get the CV
-    cv = get_cv_by_id(db, cv_id, str(current_user.id))
-    if not cv:
+    found = await get_cv_with_fingerprint(db, cv_id, current_user_id)
+    if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="CV not found"
         )
-    
-    # Create filename
-    safe_name = "".join(c for c in cv.name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-    filename = f"{safe_name}.md"
+    cv, content_hash, _ = found
     
     # Return markdown content
-    content = cv.markdown_content or "# Your CV\n\nPlease add your CV content here."
+    content = cv.markdown_content or EMPTY_CV_MARKDOWN
     
-    return Response(
-        content=content,
+    return bytes_response(
+        content.encode("utf-8"),
         media_type="text/markdown",
         headers={
-            "Content-Disposition": f"attachment; filename=\"{filename}\"",
-            "Content-Length": str(len(content.encode('utf-8')))
+            "Content-Disposition": f"attachment; filename=\"{safe_filename(cv.name, 'md')}\"",
+            "ETag": make_etag("md", content_hash),
+            "Cache-Control": MARKDOWN_CACHE_CONTROL
         }
     )
 
 @router.get("/{cv_id}/preview-pdf")
-def preview_cv_pdf(
+async def preview_cv_pdf(
     cv_id: str,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Preview CV as PDF (inline display)"""
-    # Get the CV
-    cv = get_cv_by_id(db, cv_id, str(current_user.id))
-    if not cv:
+    try:
+        return await _conditional_pdf_response(
+            request, db, cv_id, current_user_id,
+            cache_control=PDF_PREVIEW_CACHE_CONTROL,
+            disposition="inline"
+        )
+        
+    except HTTPException:
+        raise
+    except RenderTimeoutError as e:
+        logger.error(f"PDF preview failed for CV {cv_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="PDF generation took too long. Please try again."
+        )
+    except Exception as e:
+        logger.error(f"PDF preview failed for CV {cv_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to generate PDF preview. Please check your CV content and try again."
+        )
+
+@router.get("/{cv_id}/preview.png")
+async def preview_cv_page(
+    cv_id: str,
+    request: Request,
+    page: int = Query(1, ge=1),
+    dpi: int = Query(PREVIEW_DPI_DEFAULT, ge=PREVIEW_DPI_MIN, le=PREVIEW_DPI_MAX),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """One page of the CV as PNG; X-Page-Count tells how many pages there are"""
+    if not PREVIEW_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Page previews are not available on this server"
+        )
+    
+    # Answer conditional requests from the content hashes alone, when the page count is known
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        fingerprint = await get_cv_fingerprint(db, cv_id, current_user_id)
+        if not fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="CV not found"
+            )
+        etag = make_etag("png", RENDER_VERSION, *fingerprint, str(page), str(dpi))
+        page_count = page_previews.page_count(fingerprint)
+        if page_count is not None and etag_matches(if_none_match, etag):
+            return not_modified_response(etag, PNG_PREVIEW_CACHE_CONTROL, {"X-Page-Count": str(page_count)})
+    
+    found = await get_cv_with_fingerprint(db, cv_id, current_user_id)
+    if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="CV not found"
         )
+    cv, content_hash, settings_hash = found
+    markdown_content = cv.markdown_content or ""
     
     try:
-        # Generate PDF
-        pdf_bytes = pdf_service.generate_pdf(
-            markdown_content=cv.markdown_content or "",
-            settings=cv.settings
+        pdf_bytes = await render_pool.render(markdown_content=markdown_content, settings=cv.settings, layout_key=str(cv.id))
+        png, page_count = await page_previews.get_page(
+            render_cache_key(markdown_content, cv.settings), pdf_bytes, cv.settings, page, dpi
         )
-        
-        # Return PDF for inline viewing
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": "inline",
-                "Content-Length": str(len(pdf_bytes))
-            }
+    except PageNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Page not found (the CV has {e.page_count} pages)"
+        )
+    except RenderTimeoutError as e:
+        logger.error(f"Page preview failed for CV {cv_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Preview generation took too long. Please try again."
         )
-        
     except Exception as e:
-        logger.error(f"PDF preview failed for CV {cv_id}: {str(e)}")
+        logger.error(f"Page preview failed for CV {cv_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to generate PDF preview. Please check your CV content and try again."
-        )
\ No newline at end of file
+            detail="Failed to generate preview. Please check your CV content and try again."
+        )
+    
+    page_previews.remember_page_count((content_hash, settings_hash), page_count)
+    etag = make_etag("png", RENDER_VERSION, content_hash, settings_hash, str(page), str(dpi))
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag, PNG_PREVIEW_CACHE_CONTROL, {"X-Page-Count": str(page_count)})
+    return Response(
+        content=png,
+        media_type="image/png",
+        headers={
+            "ETag": etag,
+            "Cache-Control": PNG_PREVIEW_CACHE_CONTROL,
+            "X-Page-Count": str(page_count)
+        }
+    )
@@ -1,22 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Optional
-from app.database import get_db
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, Optional, AsyncIterator, Literal
+from app.database import get_async_db, AsyncSessionLocal
 from app.schemas.llm import ChatRequest, ChatResponse, InlineEditRequest, InlineEditResponse, ATSAnalysisRequest, ATSAnalysisResponse
-from app.schemas.auth import UserResponse
-from app.crud.cv import get_cv_by_id, update_cv
-from app.routers.auth import get_current_user
+from app.crud.cv import get_cv_by_id, update_cv, CVVersionConflict
+from app.routers.auth import get_current_user_id
 from app.services.llm_service import llm_service
+from app.services.llm_client import LLMBusyError, LLMStreamError, StreamStatus
+import httpx
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/llm", tags=["llm"])
 
+# Seconds a client should wait before retrying when all LLM slots are taken
+LLM_BUSY_RETRY_AFTER = 5
+
+def _busy_exception(e: LLMBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": str(LLM_BUSY_RETRY_AFTER)}
+    )
+
 @router.post("/chat", response_model=ChatResponse)
-def chat_about_cv(
+async def chat_about_cv(
     request: ChatRequest,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Function 1: Chatbot interface - User talks to LLM about their CV.
@@ -26,7 +39,7 @@ def chat_about_cv(
         # Get CV content for context
         cv_content = ""
         if request.cv_id:
-            cv = get_cv_by_id(db, str(request.cv_id), str(current_user.id))
+            cv = await get_cv_by_id(db, str(request.cv_id), current_user_id)
             if not cv:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -37,10 +50,12 @@ def chat_about_cv(
             cv_content = request.cv_content or ""
         
         # Call LLM service for chat response
-        result = llm_service.chat_about_cv(
+        result = await llm_service.chat_about_cv_async(
             cv_content=cv_content,
             user_message=request.message,
-            conversation_history=request.conversation_history or []
+            conversation_history=request.conversation_history or [],
+            user_id=current_user_id,
+            use_cache=request.use_cache
         )
         
         if not result["success"]:
@@ -57,6 +72,8 @@ def chat_about_cv(
         
     except HTTPException:
         raise
+    except LLMBusyError as e:
+        raise _busy_exception(e)
     except Exception as e:
         logger.error(f"Chat endpoint failed: {e}")
         raise HTTPException(
@@ -64,11 +81,62 @@ def chat_about_cv(
             detail="Failed to process chat message"
         )
 
+@router.post("/chat/stream")
+async def chat_about_cv_stream(
+    request: ChatRequest,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Streaming chat: the reply arrives as Server-Sent Events.
+    Emits "delta" events with {"content": ...} and a final "done" (or "error") event.
+    """
+    cv_content = ""
+    if request.cv_id:
+        cv = await get_cv_by_id(db, str(request.cv_id), current_user_id)
+        if not cv:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="CV not found"
+            )
+        cv_content = cv.markdown_content or ""
+    else:
+        cv_content = request.cv_content or ""
+    
+    stream_status = StreamStatus()
+    deltas = await _open_stream(lambda: llm_service.chat_about_cv_stream(
+        cv_content=cv_content,
+        user_message=request.message,
+        conversation_history=request.conversation_history or [],
+        user_id=current_user_id,
+        use_cache=request.use_cache,
+        status=stream_status
+    ))
+    
+    async def events():
+        try:
+            async for delta in deltas:
+                yield _sse("delta", {"content": delta})
+        except Exception as e:
+            logger.error(f"Chat stream failed: {e}")
+            yield _sse("error", {"detail": "Failed to process chat message"})
+            return
+        finally:
+            await deltas.aclose()
+        if not stream_status.done:
+            # Connection to the model dropped mid-reply
+            logger.error("Chat stream ended before the model finished")
+            yield _sse("error", {"detail": "Failed to process chat message"})
+            return
+        yield _sse("done", {"suggestions": []})
+    
+    return _sse_response(events())
+
 @router.post("/inline-edit", response_model=InlineEditResponse)
-def inline_edit_cv(
+async def inline_edit_cv(
     request: InlineEditRequest,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Function 2: Inline editor - User asks for changes, LLM edits markdown in real-time.
@@ -76,7 +144,7 @@ def inline_edit_cv(
     """
     try:
         # Get CV
-        cv = get_cv_by_id(db, str(request.cv_id), str(current_user.id))
+        cv = await get_cv_by_id(db, str(request.cv_id), current_user_id)
         if not cv:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -84,37 +152,41 @@ def inline_edit_cv(
             )
         
         # Call LLM service for inline editing
-        result = llm_service.inline_edit_content(
+        result = await llm_service.inline_edit_content_async(
             current_content=cv.markdown_content or "",
             edit_instruction=request.instruction,
-            focus_section=request.section
+            focus_section=request.section,
+            user_id=current_user_id
         )
         
         if not result["success"]:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=result.get("error", "Inline edit failed")
+            # Cut off or empty: nothing is saved and the CV comes back unchanged
+            return InlineEditResponse(
+                success=False,
+                edited_content=result["edited_content"],
+                auto_saved=False,
+                error=result.get("error", "Inline edit failed")
             )
         
-        # Auto-save if requested
-        updated_cv = None
+        # Auto-save if requested, unless the CV was saved elsewhere while the edit ran
+        version = None
         if request.auto_save:
-            updated_cv = update_cv(
-                db=db,
-                cv_id=str(request.cv_id),
-                user_id=str(current_user.id),
-                markdown_content=result["edited_content"]
+            version = await _save_edited_content(
+                str(request.cv_id), current_user_id, result["edited_content"], cv.version, db=db
             )
         
         return InlineEditResponse(
             success=True,
             edited_content=result["edited_content"],
             changes_made=result.get("changes_made", []),
-            auto_saved=updated_cv is not None
+            auto_saved=version is not None,
+            version=version
         )
         
     except HTTPException:
         raise
+    except LLMBusyError as e:
+        raise _busy_exception(e)
     except Exception as e:
         logger.error(f"Inline edit endpoint failed: {e}")
         raise HTTPException(
@@ -123,19 +195,21 @@ def inline_edit_cv(
         )
 
 @router.post("/ats-score", response_model=ATSAnalysisResponse)
-def get_ats_score(
+async def get_ats_score(
     request: ATSAnalysisRequest,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    mode: Literal["fast", "full"] = "full",
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Function 3: ATS Score Button - Analyzes CV and provides ATS score + upgrade suggestions.
+    Scores are computed locally; ?mode=fast skips the LLM feedback entirely.
     """
     try:
         # Get CV content
         cv_content = ""
         if request.cv_id:
-            cv = get_cv_by_id(db, str(request.cv_id), str(current_user.id))
+            cv = await get_cv_by_id(db, str(request.cv_id), current_user_id)
             if not cv:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -152,10 +226,12 @@ def get_ats_score(
             )
         
         # Call LLM service for ATS analysis
-        result = llm_service.analyze_ats_score(
+        result = await llm_service.analyze_ats_score_async(
             cv_content=cv_content,
             target_role=request.target_role,
-            job_description=request.job_description
+            job_description=request.job_description,
+            mode=mode,
+            user_id=current_user_id
         )
         
         if not result["success"]:
@@ -176,9 +252,135 @@ def get_ats_score(
         
     except HTTPException:
         raise
+    except LLMBusyError as e:
+        raise _busy_exception(e)
     except Exception as e:
         logger.error(f"ATS analysis endpoint failed: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to perform ATS analysis"
-        )
\ No newline at end of file
+        )
+
+@router.post("/inline-edit/stream")
+async def inline_edit_cv_stream(
+    request: InlineEditRequest,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Streaming inline edit: the edited CV arrives as Server-Sent Events.
+    Emits "delta" events, then "done" with changes_made/auto_saved/version. Auto-save
+    only happens once the whole edit has streamed; a dropped client saves nothing, and
+    an edit the model did not finish (or left empty) ends with "error" instead.
+    """
+    cv = await get_cv_by_id(db, str(request.cv_id), current_user_id)
+    if not cv:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    current_content = cv.markdown_content or ""
+    base_version = cv.version
+    
+    stream_status = StreamStatus()
+    deltas = await _open_stream(lambda: llm_service.inline_edit_content_stream(
+        current_content=current_content,
+        edit_instruction=request.instruction,
+        focus_section=request.section,
+        user_id=current_user_id,
+        status=stream_status
+    ))
+    
+    async def events():
+        parts = []
+        try:
+            async for delta in deltas:
+                parts.append(delta)
+                yield _sse("delta", {"content": delta})
+        except Exception as e:
+            logger.error(f"Inline edit stream failed: {e}")
+            yield _sse("error", {"detail": "Failed to perform inline edit"})
+            return
+        finally:
+            await deltas.aclose()
+        
+        edited = "".join(parts)
+        if not stream_status.complete or not edited.strip():
+            # A partial, truncated or empty edit must never be saved over the CV
+            logger.error(f"Inline edit stream incomplete (done={stream_status.done}, finish_reason={stream_status.finish_reason}, {len(edited)} chars)")
+            yield _sse("error", {"detail": "The edit did not complete. Please try again."})
+            return
+        
+        result = llm_service.inline_edit_result(current_content, edited, request.section)
+        version = None
+        if request.auto_save:
+            try:
+                version = await _save_edited_content(
+                    str(request.cv_id), current_user_id, result["edited_content"], base_version
+                )
+            except Exception as e:
+                logger.error(f"Inline edit auto-save failed: {e}")
+        yield _sse("done", {
+            "edited_content": result["edited_content"],
+            "changes_made": result["changes_made"],
+            "auto_saved": version is not None,
+            "version": version
+        })
+    
+    return _sse_response(events())
+
+# Streaming helpers
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    # Starlette cancels the generator when the client disconnects, which closes
+    # the upstream request and stops the completion
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _open_stream(start) -> AsyncIterator[Optional[str]]:
+    """Start an LLM stream and wait until upstream accepts it, mapping failures to HTTP errors"""
+    try:
+        deltas = start()
+        # The first item signals that a slot is held and upstream answered 2xx
+        await deltas.__anext__()
+        return deltas
+    except LLMBusyError as e:
+        raise _busy_exception(e)
+    except (httpx.HTTPError, LLMStreamError) as e:
+        logger.error(f"LLM stream could not start: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="AI service request failed"
+        )
+    except Exception as e:
+        # The message may hold internals (URLs, upstream bodies), so it stays in the log
+        logger.error(f"LLM stream could not start: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to start the AI response"
+        )
+
+async def _save_edited_content(
+    cv_id: str,
+    user_id: str,
+    content: str,
+    base_version: int,
+    db: Optional[AsyncSession] = None
+) -> Optional[int]:
+    """Save an inline edit if the CV is still at base_version; returns the new version, or None if not saved"""
+    if db is None:
+        # The request's session is closed by the time a stream finishes, so use a fresh one
+        async with AsyncSessionLocal() as db:
+            return await _save_edited_content(cv_id, user_id, content, base_version, db=db)
+    try:
+        row = await update_cv(db=db, cv_id=cv_id, user_id=user_id, markdown_content=content, expected_version=base_version)
+    except CVVersionConflict as e:
+        logger.info(f"Inline edit of CV {cv_id} not auto-saved: version {base_version} is now {e.current_version}")
+        return None
+    return row.version if row else None
@@ -1,54 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+from app.database import get_async_db
 from app.schemas.template import TemplateResponse, CreateCVFromTemplate
 from app.schemas.cv import CVResponse
-from app.schemas.auth import UserResponse
-from app.crud.template import get_all_templates, get_template_by_id
 from app.crud.cv import create_cv
-from app.routers.auth import get_current_user
+from app.core.http_cache import etag_matches, not_modified_response
+from app.services.template_catalog import template_catalog, CatalogEntry
+from app.routers.auth import get_current_user_id
 
 router = APIRouter(prefix="/api/templates", tags=["templates"])
 
-@router.get("/", response_model=List[TemplateResponse])
-def get_templates(db: Session = Depends(get_db)):
-    """Get all available templates"""
-    templates = get_all_templates(db)
-    return templates
+# Templates are public and change rarely, but a reseed should show up at once
+TEMPLATE_CACHE_CONTROL = "public, no-cache"
 
-@router.get("/{template_id}", response_model=TemplateResponse)
-def get_template(template_id: str, db: Session = Depends(get_db)):
-    """Get a specific template by ID"""
-    template = get_template_by_id(db, template_id)
-    if not template:
+def _json_response(body: bytes, etag: str, if_none_match: Optional[str]) -> Response:
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag, TEMPLATE_CACHE_CONTROL)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": TEMPLATE_CACHE_CONTROL}
+    )
+
+async def _catalog_template(template_id: str) -> CatalogEntry:
+    await template_catalog.refresh()
+    try:
+        entry = template_catalog.get(str(UUID(template_id)))
+    except ValueError:
+        entry = None
+    if not entry:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Template not found"
         )
-    return template
+    return entry
+
+@router.get("/", response_model=List[TemplateResponse])
+async def get_templates(if_none_match: Optional[str] = Header(None)):
+    """Get all available templates (served from the in-memory catalog)"""
+    await template_catalog.refresh()
+    body, etag = template_catalog.list_body()
+    return _json_response(body, etag, if_none_match)
+
+@router.get("/{template_id}", response_model=TemplateResponse)
+async def get_template(template_id: str, if_none_match: Optional[str] = Header(None)):
+    """Get a specific template by ID"""
+    entry = await _catalog_template(template_id)
+    return _json_response(entry.body, entry.etag, if_none_match)
 
 @router.post("/create-cv", response_model=CVResponse)
-def create_cv_from_template(
+async def create_cv_from_template(
     template_data: CreateCVFromTemplate,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new CV from a template"""
-    # Get the template
-    template = get_template_by_id(db, str(template_data.template_id))
-    if not template:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Template not found"
-        )
+    template = (await _catalog_template(str(template_data.template_id))).template
     
     # Create CV with template content
-    cv = create_cv(
+    cv = await create_cv(
         db=db,
-        user_id=str(current_user.id),
+        user_id=current_user_id,
         name=template_data.cv_name,
         markdown_content=template.markdown_content,
         settings=template.settings
     )
-    return cv
\ No newline at end of file
+    return cv
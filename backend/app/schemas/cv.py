@@ -1,7 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
 
 class CVCreate(BaseModel):
     name: str
@@ -13,6 +13,18 @@ class CVUpdate(BaseModel):
     markdown_content: Optional[str] = None
     settings: Optional[Dict[str, Any]] = None
 
+class ContentEditOp(BaseModel):
+    """Replace delete UTF-16 code units at offset (in the base text) with insert"""
+    offset: int = Field(ge=0)
+    delete: int = Field(0, ge=0)
+    insert: str = ""
+
+class CVContentPatch(BaseModel):
+    """Markdown edit as ops against the text whose sha256 is base_hash"""
+    base_hash: str = Field(min_length=64, max_length=64)
+    ops: List[ContentEditOp] = Field(max_length=1000)
+    result_hash: str = Field(min_length=64, max_length=64)
+
 class CVResponse(BaseModel):
     id: UUID
     user_id: UUID
@@ -21,6 +33,64 @@ class CVResponse(BaseModel):
     settings: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
+    version: int
+    
+    class Config:
+        from_attributes = True
+
+class CVUpdateResponse(BaseModel):
+    """Result of an update: the new version, plus name/settings only if they changed"""
+    id: UUID
+    version: int
+    updated_at: datetime
+    name: Optional[str] = None
+    settings: Optional[Dict[str, Any]] = None
+
+class CVRestoreResponse(CVUpdateResponse):
+    """Result of restoring a revision: the restored markdown is the new content"""
+    markdown_content: str
+
+class CVRevisionResponse(BaseModel):
+    """A past version of a CV's markdown"""
+    version: int
+    content_length: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class CVRevisionContentResponse(BaseModel):
+    version: int
+    markdown_content: str
+
+class RenderJobCreate(BaseModel):
+    """interactive jobs (previews, single downloads) run ahead of export jobs"""
+    priority: Literal["interactive", "export"] = "interactive"
+
+class RenderJobResponse(BaseModel):
+    id: str
+    cv_id: UUID
+    status: Literal["queued", "running", "done", "failed"]
+    priority: str
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class ExportProgressResponse(BaseModel):
+    """completed counts CVs whose entries have been sent, failed those sent without a PDF"""
+    id: str
+    status: Literal["running", "done", "cancelled", "failed"]
+    formats: List[str]
+    total: int
+    completed: int
+    failed: int
+    bytes_sent: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
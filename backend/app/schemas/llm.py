@@ -9,6 +9,7 @@ class ChatRequest(BaseModel):
     cv_id: Optional[UUID] = None  
     cv_content: Optional[str] = None  
     conversation_history: Optional[List[Dict[str, str]]] = []  
+    use_cache: bool = False  # Reuse an identical earlier answer instead of asking the LLM again
 
 class ChatResponse(BaseModel):
     """Chat response from LLM"""
@@ -31,6 +32,7 @@ class InlineEditResponse(BaseModel):
     edited_content: str  
     changes_made: List[str] = []  
     auto_saved: bool = False  
+    version: Optional[int] = None  # new CV version when auto_saved
     error: Optional[str] = None
 
 # Function 3: ATS Score Button
@@ -8,7 +8,7 @@ class TemplateResponse(BaseModel):
     description: Optional[str] = None
     markdown_content: Optional[str] = None
     settings: Optional[Dict[str, Any]] = None
-    is_default: str
+    is_default: bool
     
     class Config:
         from_attributes = True
@@ -0,0 +1,403 @@
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
+import re
+from app.services.markdown_sections import index_sections, find_section
+
+# Each score_breakdown category is worth this much; the four add up to 100
+CATEGORY_POINTS = 25
+
+# Number of job description keywords checked for coverage
+MAX_JD_KEYWORDS = 25
+# Keywords listed in keyword_analysis
+MAX_LISTED_KEYWORDS = 15
+
+# Distinct CVs and job descriptions whose analysis is kept per process
+ANALYSIS_CACHE_SIZE = 256
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./-][a-z0-9+#]+)*")
+MARKER_RE = re.compile(r"\[(?:CENTER|DATE:[^\]]*)\]")
+BULLET_RE = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+(.*)$")
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b|\[DATE:")
+QUANTIFIED_RE = re.compile(r"\d|%|\$|£|€")
+INLINE_MARKUP_RE = re.compile(r"[*_`~]")
+
+STOPWORDS = frozenset("""
+a about above across after again all also am an and any are as at be been being below between both but by
+can could did do does doing during each either etc for from further had has have having he her here hers him his
+how i if in into is it its itself just me more most my no nor not now of off on once only or other our ours out
+over own same she should so some such than that the their theirs them then there these they this those through
+to too under until up us very was we were what when where which while who whom why will with within would you
+your yours
+ability able candidate candidates company day demonstrated desired ensure excellent experience experienced
+familiarity good great help ideal including job join knowledge looking must new nice plus preferred proven
+related required requirement requirements responsibilities responsible role skill skills strong team teams
+understanding using various well work working year years
+applicant applicants apply benefits bonus closely dynamic environment exciting fast-paced hands-on highly
+least like make minimum motivated need needed needs offer opportunities opportunity passion passionate
+position qualification qualifications seeking self-starter solid want will world-class
+""".split())
+
+ACTION_VERBS = (
+    "achieved", "analyzed", "architected", "automated", "built", "coordinated", "created", "delivered",
+    "deployed", "designed", "developed", "drove", "established", "generated", "implemented", "improved",
+    "increased", "launched", "led", "managed", "mentored", "migrated", "negotiated", "optimized", "owned",
+    "reduced", "resolved", "scaled", "spearheaded", "streamlined"
+)
+
+STANDARD_SECTIONS = ("summary", "experience", "education", "skills")
+
+def stem(word: str) -> str:
+    """Light suffix stripping so "managing", "managed" and "manages" compare equal"""
+    if not word.isalpha() or len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ing") and len(word) > 5:
+        word = word[:-3]
+    elif word.endswith("ed") and len(word) > 4:
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens, keeping terms like c++, node.js and ci/cd whole"""
+    return [token.rstrip(".") for token in TOKEN_RE.findall(text.lower())]
+
+def _plain(text: str) -> str:
+    return INLINE_MARKUP_RE.sub("", MARKER_RE.sub("", text))
+
+def _ratio(part: int, whole: int) -> float:
+    return part / whole if whole else 0.0
+
+def _scaled(points: int, value: float, target: float) -> int:
+    """points * value/target, capped at points"""
+    return round(points * min(1.0, value / target)) if target else points
+
+class _Findings:
+    """Collects the narrative that goes with each check"""
+
+    def __init__(self):
+        self.strengths: List[str] = []
+        self.weaknesses: List[str] = []
+        self.suggestions: List[str] = []
+
+    def check(self, passed: bool, points: int, strength: str, weakness: str, suggestion: str) -> int:
+        if passed:
+            self.strengths.append(strength)
+            return points
+        self.weaknesses.append(weakness)
+        self.suggestions.append(suggestion)
+        return 0
+
+class ATSScorer:
+    """
+    Deterministic ATS scoring computed from the CV's markdown structure.
+
+    CV and job description analyses are memoized by their text, so rescoring
+    the same CV against a new job description only tokenizes the description.
+    """
+
+    def __init__(self):
+        self._analysis_for_content = lru_cache(maxsize=ANALYSIS_CACHE_SIZE)(self._analyze_cv)
+        self._keywords_for_text = lru_cache(maxsize=ANALYSIS_CACHE_SIZE)(self._extract_keywords)
+
+    def score(self, cv_content: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Score a CV out of 100.
+
+        Returns the ATSAnalysisResponse fields: ats_score, score_breakdown,
+        keyword_analysis, plus rule-based strengths, weaknesses and
+        upgrade_suggestions.
+        """
+        cv = self._analysis_for_content(cv_content.replace("\r\n", "\n"))
+        keywords = self._keywords_for_text((job_description or "").strip())
+        role_stems = tuple(dict.fromkeys(stem(t) for t in tokenize(target_role or "") if t not in STOPWORDS))
+        findings = _Findings()
+
+        if not cv_content.strip():
+            # Nothing to score; formatting checks would otherwise pass vacuously
+            findings.weaknesses.append("The CV is empty")
+            findings.suggestions.append("Add your experience, education and skills")
+            return self._result(dict.fromkeys(("formatting", "keywords", "experience", "skills"), 0), [], [label for _, label, _ in keywords], findings)
+
+        breakdown = {
+            "formatting": self._score_formatting(cv, findings),
+            "keywords": 0,
+            "experience": self._score_experience(cv, findings),
+            "skills": 0
+        }
+        keyword_score, present, missing = self._score_keywords(cv, keywords, role_stems, findings)
+        breakdown["keywords"] = keyword_score
+        breakdown["skills"] = self._score_skills(cv, keywords, findings)
+        return self._result(breakdown, present, missing, findings)
+
+    def _result(self, breakdown: Dict[str, int], present: List[str], missing: List[str], findings: _Findings) -> Dict[str, Any]:
+        return {
+            "ats_score": sum(breakdown.values()),
+            "score_breakdown": breakdown,
+            "keyword_analysis": {
+                "present_keywords": present[:MAX_LISTED_KEYWORDS],
+                "missing_keywords": missing[:MAX_LISTED_KEYWORDS]
+            },
+            "strengths": findings.strengths,
+            "weaknesses": findings.weaknesses,
+            "upgrade_suggestions": findings.suggestions
+        }
+
+    def cache_info(self) -> Dict[str, Any]:
+        return {
+            "cv_analyses": self._analysis_for_content.cache_info()._asdict(),
+            "keyword_sets": self._keywords_for_text.cache_info()._asdict()
+        }
+
+    # Analysis (memoized)
+
+    def _analyze_cv(self, content: str) -> Dict[str, Any]:
+        """Everything scoring needs from the CV itself, independent of the job"""
+        sections = index_sections(content)
+        lines = content.split("\n")
+        bullets = [_plain(match.group(1)) for match in map(BULLET_RE.match, lines) if match]
+
+        stems = [stem(token) for token in tokenize(_plain(content)) if token not in STOPWORDS]
+        experience = find_section(content, "experience", sections)
+        skills = find_section(content, "skills", sections)
+
+        experience_bullets: List[str] = []
+        experience_text = ""
+        roles = 0
+        has_dates = False
+        if experience is not None:
+            experience_text = experience.text(content)
+            experience_bullets = [_plain(m.group(1)) for m in map(BULLET_RE.match, experience_text.split("\n")) if m]
+            roles = sum(1 for s in sections if experience.start < s.start < experience.end and s.level == experience.level + 1)
+            if not roles and experience_bullets:
+                roles = 1
+            has_dates = bool(YEAR_RE.search(experience_text))
+
+        skill_items: List[str] = []
+        if skills is not None:
+            for match in map(BULLET_RE.match, skills.text(content).split("\n")):
+                if match:
+                    item = _plain(match.group(1))
+                    item = item.split(":", 1)[1] if ":" in item else item
+                    skill_items.extend(part.strip().lower() for part in re.split(r"[,;|]", item) if part.strip())
+
+        experience_plain = _plain(experience_text).lower()
+        action_stems = {stem(verb) for verb in ACTION_VERBS}
+        def starts_with_action(bullet: str) -> bool:
+            words = tokenize(bullet)
+            return bool(words) and stem(words[0]) in action_stems
+
+        return {
+            "has_name_heading": bool(sections) and sections[0].level == 1,
+            "has_contact": bool(EMAIL_RE.search(content) or PHONE_RE.search(content)),
+            "standard_sections": [name for name in STANDARD_SECTIONS if find_section(content, name, sections)],
+            "bullet_count": len(bullets),
+            "unfriendly_elements": self._unfriendly_elements(lines),
+            "word_count": len(_plain(content).split()),
+            "stems": frozenset(stems),
+            "bigrams": frozenset(zip(stems, stems[1:])),
+            "has_experience": experience is not None,
+            "roles": roles,
+            "has_dates": has_dates,
+            "experience_bullets": len(experience_bullets),
+            "quantified_bullets": sum(1 for b in experience_bullets if QUANTIFIED_RE.search(b)),
+            "action_bullets": sum(1 for b in experience_bullets if starts_with_action(b)),
+            "all_action_bullets": sum(1 for b in bullets if starts_with_action(b)),
+            "all_quantified_bullets": sum(1 for b in bullets if QUANTIFIED_RE.search(b)),
+            "has_skills": skills is not None,
+            "skill_items": skill_items,
+            "skill_stems": frozenset(stem(t) for item in skill_items for t in tokenize(item)),
+            "evidenced_skills": sum(1 for item in skill_items if item in experience_plain)
+        }
+
+    def _unfriendly_elements(self, lines: List[str]) -> List[str]:
+        found = []
+        if any(line.lstrip().startswith("|") for line in lines):
+            found.append("tables")
+        if any("![" in line for line in lines):
+            found.append("images")
+        if any(line.lstrip().startswith(("```", "~~~")) for line in lines):
+            found.append("code blocks")
+        return found
+
+    def _extract_keywords(self, text: str) -> Tuple[Tuple[Tuple[str, ...], str, int], ...]:
+        """Ranked (stems, surface form, weight) keywords of a job description"""
+        if not text:
+            return ()
+        tokens = [token for token in tokenize(text) if not token.isdigit()]
+        surface: Dict[Tuple[str, ...], str] = {}
+        counts: Counter = Counter()
+        previous: Optional[Tuple[str, str]] = None
+        for token in tokens:
+            if token in STOPWORDS or len(token) < 2:
+                previous = None
+                continue
+            token_stem = stem(token)
+            counts[(token_stem,)] += 1
+            surface.setdefault((token_stem,), token)
+            if previous is not None:
+                # Two-word terms such as "machine learning" or "project management"
+                bigram = (previous[0], token_stem)
+                counts[bigram] += 1
+                surface.setdefault(bigram, f"{previous[1]} {token}")
+            previous = (token_stem, token)
+
+        # Phrases only count when repeated; single terms always do, unless they
+        # never appear outside such a phrase
+        phrases = [(key, count) for key, count in counts.items() if len(key) == 2 and count > 1]
+        covered = {term for key, count in phrases for term in key if counts[(term,)] == count}
+        ranked = phrases + [
+            (key, count) for key, count in counts.items()
+            if len(key) == 1 and key[0] not in covered
+        ]
+        ranked.sort(key=lambda item: (-item[1], -len(item[0])))
+        return tuple((key, surface[key], count) for key, count in ranked[:MAX_JD_KEYWORDS])
+
+    # Scoring
+
+    def _score_formatting(self, cv: Dict[str, Any], findings: _Findings) -> int:
+        points = findings.check(
+            cv["has_name_heading"], 4,
+            "Name is set as the top-level heading",
+            "No top-level heading with your name",
+            "Start the CV with your name as a level-1 heading (# Name)"
+        )
+        points += findings.check(
+            cv["has_contact"], 4,
+            "Contact details are easy to find",
+            "No email address or phone number found",
+            "Add an email address and phone number near the top"
+        )
+        found = cv["standard_sections"]
+        missing = [name for name in STANDARD_SECTIONS if name not in found]
+        points += round(5 * len(found) / len(STANDARD_SECTIONS))
+        if missing:
+            findings.weaknesses.append(f"Missing standard sections: {', '.join(missing)}")
+            findings.suggestions.append(f"Add clearly titled sections for {', '.join(missing)} so ATS parsers can map your CV")
+        else:
+            findings.strengths.append("Uses the standard section headings ATS parsers expect")
+        points += findings.check(
+            cv["bullet_count"] >= 5, 4,
+            "Achievements are presented as scannable bullet points",
+            "Few bullet points, so content is harder to scan",
+            "Break responsibilities and achievements into bullet points"
+        )
+        unfriendly = cv["unfriendly_elements"]
+        points += findings.check(
+            not unfriendly, 4,
+            "No tables, images or code blocks that confuse ATS parsers",
+            f"Contains {', '.join(unfriendly)}, which many ATS parsers skip",
+            f"Replace {', '.join(unfriendly)} with plain text and bullet lists"
+        )
+        words = cv["word_count"]
+        points += findings.check(
+            250 <= words <= 1000, 4,
+            "Length is appropriate for a one to two page CV",
+            f"CV is {'too short' if words < 250 else 'too long'} ({words} words)",
+            "Aim for roughly 250-1000 words" if words < 250 else "Trim older or less relevant content to stay under about 1000 words"
+        )
+        return min(points, CATEGORY_POINTS)
+
+    def _score_experience(self, cv: Dict[str, Any], findings: _Findings) -> int:
+        if not findings.check(
+            cv["has_experience"], 5,
+            "Has a dedicated work experience section",
+            "No work experience section found",
+            "Add an Experience section with one subheading per role"
+        ):
+            return 0
+
+        points = 5 + 2 * min(cv["roles"], 3)
+        points += findings.check(
+            cv["has_dates"], 4,
+            "Roles include dates",
+            "Roles are missing dates",
+            "Add start and end dates to every role, e.g. [DATE: 2021 - Present]"
+        )
+        bullets = cv["experience_bullets"]
+        quantified = _ratio(cv["quantified_bullets"], bullets)
+        points += _scaled(5, quantified, 0.5)
+        if quantified >= 0.5:
+            findings.strengths.append("Achievements are quantified with numbers")
+        else:
+            findings.weaknesses.append("Few achievements are quantified")
+            findings.suggestions.append("Quantify achievements with numbers, percentages or amounts")
+        action = _ratio(cv["action_bullets"], bullets)
+        points += _scaled(5, action, 0.7)
+        if bullets and action < 0.7:
+            findings.suggestions.append("Start bullet points with strong action verbs (led, built, improved)")
+        return min(points, CATEGORY_POINTS)
+
+    def _score_keywords(
+        self,
+        cv: Dict[str, Any],
+        keywords: Tuple[Tuple[Tuple[str, ...], str, int], ...],
+        role_stems: Tuple[str, ...],
+        findings: _Findings
+    ) -> Tuple[int, List[str], List[str]]:
+        present: List[str] = []
+        missing: List[str] = []
+        if keywords:
+            matched_weight = total_weight = 0
+            for key, surface, weight in keywords:
+                found = key[0] in cv["stems"] if len(key) == 1 else key in cv["bigrams"]
+                (present if found else missing).append(surface)
+                total_weight += weight
+                matched_weight += weight if found else 0
+            coverage = _ratio(matched_weight, total_weight)
+            points = round(CATEGORY_POINTS * coverage)
+            if coverage >= 0.6:
+                findings.strengths.append(f"Covers {round(coverage * 100)}% of the job description's key terms")
+            else:
+                findings.weaknesses.append(f"Covers only {round(coverage * 100)}% of the job description's key terms")
+                findings.suggestions.append(f"Work these job description terms into your CV where accurate: {', '.join(missing[:5])}")
+            return points, present, missing
+
+        # Without a job description, judge keyword strength from the CV's own language
+        bullets = cv["bullet_count"]
+        points = _scaled(12, _ratio(cv["all_action_bullets"], bullets), 0.6)
+        points += _scaled(13 if not role_stems else 5, _ratio(cv["all_quantified_bullets"], bullets), 0.4)
+        if role_stems:
+            role_hits = [s for s in role_stems if s in cv["stems"]]
+            points += _scaled(8, len(role_hits), len(role_stems))
+            if len(role_hits) < len(role_stems):
+                findings.suggestions.append("Mention your target role's title and core terms in the summary")
+        if not role_stems:
+            findings.suggestions.append("Add a job description to check keyword coverage against a specific posting")
+        return min(points, CATEGORY_POINTS), present, missing
+
+    def _score_skills(self, cv: Dict[str, Any], keywords: Tuple[Tuple[Tuple[str, ...], str, int], ...], findings: _Findings) -> int:
+        if not findings.check(
+            cv["has_skills"], 7,
+            "Has a dedicated skills section",
+            "No skills section found",
+            "Add a Skills section listing your tools, languages and technologies"
+        ):
+            return 0
+
+        items = len(cv["skill_items"])
+        points = 7 + _scaled(9, items, 12)
+        if items < 8:
+            findings.suggestions.append("List more specific skills (aim for at least 8-12)")
+
+        if keywords:
+            single_terms = [key[0] for key, _, _ in keywords if len(key) == 1]
+            relevant = _ratio(sum(1 for term in single_terms if term in cv["skill_stems"]), len(single_terms))
+            points += _scaled(9, relevant, 0.4)
+        else:
+            evidenced = _ratio(cv["evidenced_skills"], items)
+            points += _scaled(9, evidenced, 0.5)
+            if items and evidenced < 0.5:
+                findings.suggestions.append("Show your listed skills in action within your experience bullets")
+        return min(points, CATEGORY_POINTS)
+
+ats_scorer = ATSScorer()
@@ -0,0 +1,306 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Any, AsyncIterator, List, Optional, Set, Tuple
+from uuid import UUID
+import asyncio
+import logging
+import time
+import uuid
+import zipfile
+from app.core.config import settings as app_settings
+from app.crud.cv import get_cv_with_fingerprint
+from app.database import AsyncSessionLocal
+from app.models.cv import CV
+from app.services.render_cache import render_cache, pdf_etag
+from app.services.render_jobs import render_jobs, RenderQueueFullError
+from app.services.render_pool import render_pool
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("pdf", "md")
+
+# What an empty CV downloads as
+EMPTY_CV_MARKDOWN = "# Your CV\n\nPlease add your CV content here."
+
+# Name of the entry listing the CVs whose PDF could not be generated
+ERRORS_ENTRY = "export-errors.txt"
+
+def _record_name(export_id: str) -> str:
+    return f"export-{export_id}"
+
+def _safe_stem(name: str) -> str:
+    return "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+
+def safe_filename(name: str, extension: str) -> str:
+    return f"{_safe_stem(name)}.{extension}"
+
+class _ZipSink:
+    """
+    Write-only file for zipfile. Having no tell() or seek() makes zipfile
+    stream: sizes go in data descriptors after each entry instead of being
+    patched into its header, so nothing written has to be kept.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class ExportProgress:
+    """Progress of one ZIP export, pollable while the download runs"""
+
+    def __init__(self, user_id: str, formats: List[str], total: int):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.formats = formats
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.bytes_sent = 0
+        self.status = "running"
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "ExportProgress":
+        """Progress as the worker streaming the export recorded it (see to_record)"""
+        progress = cls(record["user_id"], record["formats"], record["total"])
+        progress.id = record["id"]
+        progress.completed = record["completed"]
+        progress.failed = record["failed"]
+        progress.bytes_sent = record["bytes_sent"]
+        progress.status = record["status"]
+        progress.created_at = datetime.fromisoformat(record["created_at"])
+        progress.finished_at = datetime.fromisoformat(record["finished_at"]) if record["finished_at"] else None
+        return progress
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "formats": self.formats,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "bytes_sent": self.bytes_sent,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def _finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = datetime.now(timezone.utc)
+
+class CVExports:
+    """
+    Streams all of a user's CVs as one ZIP.
+
+    CVs are loaded one at a time and their PDFs rendered as export priority
+    jobs on the render job queue (so cached PDFs are reused and previews keep
+    going first), at most max_parallel at once. Entries are written as soon
+    as their PDF is ready, in completion order, and each is sent before the
+    next is awaited: memory stays at a few CVs whatever the number of CVs.
+    Progress is kept for ttl_seconds after the export finishes. It is also
+    recorded in the render cache's disk tier after every CV, so with a shared
+    PDF_CACHE_DIR any worker can answer a progress poll; without one, only
+    the worker streaming the export can.
+    """
+
+    def __init__(self, max_parallel: int, ttl_seconds: float):
+        self.max_parallel = max_parallel
+        self.ttl_seconds = ttl_seconds
+        self._exports: "OrderedDict[str, ExportProgress]" = OrderedDict()
+        self._stats = {"started": 0, "completed": 0, "cancelled": 0, "failed": 0, "cvs": 0, "pdf_failures": 0, "bytes_sent": 0}
+
+    def start(self, user_id: str, formats: List[str], total: int) -> ExportProgress:
+        self._prune()
+        progress = ExportProgress(user_id, formats, total)
+        self._exports[progress.id] = progress
+        self._stats["started"] += 1
+        self._save(progress)
+        return progress
+
+    def get(self, export_id: str, user_id: str) -> Optional[ExportProgress]:
+        """An export by id, only for the user who started it"""
+        progress = self._exports.get(export_id)
+        if progress is None:
+            # Streamed by another worker
+            progress = self._load_record(export_id)
+        return progress if progress is not None and progress.user_id == user_id else None
+
+    def stats(self) -> Dict[str, Any]:
+        running = sum(1 for progress in self._exports.values() if progress.status == "running")
+        return {**self._stats, "running": running, "retained": len(self._exports), "max_parallel": self.max_parallel}
+
+    async def stream(self, progress: ExportProgress, cv_ids: List[UUID]) -> AsyncIterator[bytes]:
+        """The ZIP of cv_ids, chunk by chunk; progress is updated as entries are sent"""
+        sink = _ZipSink()
+        archive = zipfile.ZipFile(sink, mode="w")
+        names: Set[str] = set()
+        errors: List[str] = []
+        pending: Set[asyncio.Task] = set()
+        try:
+            for cv_id in cv_ids:
+                cv, content_hash, settings_hash = await self._load(progress.user_id, cv_id)
+                if cv is None:
+                    # Deleted since the export started
+                    progress.total -= 1
+                    continue
+                stem = self._unique_stem(cv.name, names)
+                self._stats["cvs"] += 1
+                if "md" in progress.formats:
+                    self._write(archive, f"{stem}.md", cv, (cv.markdown_content or EMPTY_CV_MARKDOWN).encode("utf-8"), zipfile.ZIP_DEFLATED)
+                if "pdf" not in progress.formats:
+                    progress.completed += 1
+                else:
+                    pending.add(asyncio.create_task(self._render(progress.user_id, cv, stem, pdf_etag(content_hash, settings_hash))))
+                    if len(pending) >= self.max_parallel:
+                        pending = await self._write_finished(archive, pending, progress, errors)
+                chunk = self._drain(sink, progress)
+                self._save(progress)
+                if chunk:
+                    yield chunk
+            while pending:
+                pending = await self._write_finished(archive, pending, progress, errors)
+                chunk = self._drain(sink, progress)
+                self._save(progress)
+                yield chunk
+
+            if errors:
+                archive.writestr(ERRORS_ENTRY, "PDF generation failed for:\n" + "".join(f"{name}\n" for name in errors))
+            archive.close()
+            yield self._drain(sink, progress)
+            progress._finish("done")
+            self._stats["completed"] += 1
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client went away; queued render jobs still finish into the render cache
+            progress._finish("cancelled")
+            self._stats["cancelled"] += 1
+            raise
+        except Exception as e:
+            logger.error(f"Export {progress.id} failed: {e}")
+            progress._finish("failed")
+            self._stats["failed"] += 1
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+            self._save(progress)
+
+    async def _load(self, user_id: str, cv_id: UUID) -> Tuple[Optional[CV], str, str]:
+        # A short session per CV, so no connection is held while renders run
+        async with AsyncSessionLocal() as db:
+            found = await get_cv_with_fingerprint(db, str(cv_id), user_id)
+        return found if found else (None, "", "")
+
+    async def _render(self, user_id: str, cv: CV, stem: str, etag: str) -> Tuple[CV, str, Optional[bytes]]:
+        """(cv, stem, PDF), the PDF being None when it could not be generated"""
+        markdown_content = cv.markdown_content or ""
+        while True:
+            try:
+                job = render_jobs.submit(
+                    user_id=user_id,
+                    cv_id=str(cv.id),
+                    cv_name=cv.name,
+                    priority="export",
+                    markdown_content=markdown_content,
+                    settings=cv.settings,
+                    etag=etag
+                )
+                break
+            except RenderQueueFullError as e:
+                await asyncio.sleep(e.retry_after)
+        await job.finished.wait()
+        if job.status != "done":
+            return cv, stem, None
+        pdf_bytes = render_cache.get(job.cache_key)
+        if pdf_bytes is None:
+            # Evicted between the job finishing and this read
+            try:
+                pdf_bytes = await render_pool.render(markdown_content, cv.settings)
+            except Exception as e:
+                logger.error(f"Export render failed for CV {cv.id}: {e}")
+        return cv, stem, pdf_bytes
+
+    async def _write_finished(
+        self,
+        archive: zipfile.ZipFile,
+        pending: Set[asyncio.Task],
+        progress: ExportProgress,
+        errors: List[str]
+    ) -> Set[asyncio.Task]:
+        """Wait for at least one render and write every finished one; returns the rest"""
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            cv, stem, pdf_bytes = task.result()
+            if pdf_bytes is None:
+                progress.failed += 1
+                self._stats["pdf_failures"] += 1
+                errors.append(f"{stem}.pdf")
+            else:
+                # PDFs are compressed already
+                self._write(archive, f"{stem}.pdf", cv, pdf_bytes, zipfile.ZIP_STORED)
+            progress.completed += 1
+        return pending
+
+    def _write(self, archive: zipfile.ZipFile, name: str, cv: CV, data: bytes, compress_type: int) -> None:
+        entry = zipfile.ZipInfo(name, date_time=cv.updated_at.timetuple()[:6])
+        entry.compress_type = compress_type
+        archive.writestr(entry, data)
+
+    def _drain(self, sink: _ZipSink, progress: ExportProgress) -> bytes:
+        data = sink.drain()
+        progress.bytes_sent += len(data)
+        self._stats["bytes_sent"] += len(data)
+        return data
+
+    def _unique_stem(self, name: str, used: Set[str]) -> str:
+        """File name (without extension) for a CV, numbered when another CV has the same name"""
+        base = _safe_stem(name) or "CV"
+        stem, n = base, 2
+        while stem.lower() in used:
+            stem, n = f"{base} ({n})", n + 1
+        used.add(stem.lower())
+        return stem
+
+    def _save(self, progress: ExportProgress) -> None:
+        render_cache.put_record(_record_name(progress.id), progress.to_record())
+
+    def _load_record(self, export_id: str) -> Optional[ExportProgress]:
+        try:
+            # The id ends up in a file name
+            uuid.UUID(export_id)
+        except ValueError:
+            return None
+        record = render_cache.get_record(_record_name(export_id))
+        if record is None:
+            return None
+        progress = ExportProgress.from_record(record)
+        if progress.finished_at is not None and progress.finished_at.timestamp() < time.time() - self.ttl_seconds:
+            return None
+        return progress
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        while self._exports:
+            progress = next(iter(self._exports.values()))
+            if progress.finished_at is None or progress.finished_at.timestamp() > cutoff:
+                break
+            self._exports.popitem(last=False)
+
+cv_exports = CVExports(
+    max_parallel=max(app_settings.export_max_parallel_renders, 1),
+    # Progress stays pollable as long as a render job does
+    ttl_seconds=app_settings.render_job_ttl_seconds
+)
@@ -0,0 +1,235 @@
+from collections import OrderedDict
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Any, Optional, List, Tuple
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from app.core import config
+
+logger = logging.getLogger(__name__)
+
+# Number of SQLite writes between sweeps that drop expired and excess rows
+SQLITE_PRUNE_INTERVAL = 64
+
+def llm_fingerprint(
+    model: str,
+    messages: List[Dict[str, str]],
+    params: Dict[str, Any],
+    scope: Optional[str] = None
+) -> str:
+    """Key for a completion: model, full prompt (system prompt included), sampling params and owner"""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params, "scope": scope},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class MemoryLLMCacheBackend:
+    """Per-process LRU of completions"""
+
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str, expires_at: float, now: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteLLMCacheBackend:
+    """SQLite file shared by every worker process on the host"""
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._writes = 0
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection().execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str, now: float) -> Optional[str]:
+        connection = self._connection()
+        row = connection.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at <= now:
+            connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            return None
+        connection.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def put(self, key: str, value: str, expires_at: float, now: float) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, expires_at, now)
+        )
+        self._writes += 1
+        if self._writes % SQLITE_PRUNE_INTERVAL == 0:
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Drop expired rows, then the least recently used rows over max_entries"""
+        connection = self._connection()
+        connection.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        cursor = connection.execute(
+            "DELETE FROM llm_cache WHERE key IN "
+            "(SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self.evictions += max(cursor.rowcount, 0)
+
+    def size(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM llm_cache")
+
+class LLMCache:
+    """
+    TTL cache of LLM completions keyed by llm_fingerprint.
+
+    Backend errors are logged and treated as misses, so the cache can never
+    fail a request.
+    """
+
+    def __init__(self, backend, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion for key, if present and not expired"""
+        if self.backend is None:
+            return None
+        try:
+            value = self.backend.get(key, time.time())
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            self._count("errors")
+            return None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        """Store a completion for ttl_seconds"""
+        if self.backend is None:
+            return
+        now = time.time()
+        try:
+            self.backend.put(key, value, now + self.ttl_seconds, now)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+            self._count("errors")
+            return
+        self._count("stores")
+
+    async def aget(self, key: str) -> Optional[str]:
+        if self.backend is not None and self.backend.blocking:
+            return await run_in_threadpool(self.get, key)
+        return self.get(key)
+
+    async def aput(self, key: str, value: str) -> None:
+        if self.backend is not None and self.backend.blocking:
+            await run_in_threadpool(self.put, key, value)
+        else:
+            self.put(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus backend occupancy"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["backend"] = type(self.backend).__name__ if self.backend is not None else None
+        stats["ttl_seconds"] = self.ttl_seconds
+        if self.backend is not None:
+            stats["evictions"] = self.backend.evictions
+            try:
+                stats["entries"] = self.backend.size()
+            except Exception as e:
+                logger.warning(f"LLM cache size check failed: {e}")
+        return stats
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+def create_backend(kind: str, path: str, max_entries: int):
+    """Build the backend named by LLM_CACHE_BACKEND: "memory", "sqlite" or "none" (disabled)"""
+    if kind == "memory":
+        return MemoryLLMCacheBackend(max_entries)
+    if kind == "sqlite":
+        try:
+            return SQLiteLLMCacheBackend(path, max_entries)
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"LLM cache SQLite backend unavailable at {path}, using memory instead: {e}")
+            return MemoryLLMCacheBackend(max_entries)
+    if kind != "none":
+        logger.warning(f"Unknown LLM cache backend {kind!r}, caching disabled")
+    return None
+
+llm_cache = LLMCache(
+    backend=create_backend(
+        config.settings.llm_cache_backend,
+        config.settings.llm_cache_path,
+        config.settings.llm_cache_max_entries
+    ),
+    ttl_seconds=config.settings.llm_cache_ttl_seconds
+)
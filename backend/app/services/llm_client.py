@@ -0,0 +1,219 @@
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List, AsyncIterator
+import asyncio
+import json
+import logging
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class LLMBusyError(Exception):
+    """Raised when a completion cannot get a concurrency slot in time"""
+
+class LLMStreamError(Exception):
+    """Raised when a streamed completion sends an error object instead of a chunk"""
+
+class LLMTruncatedError(Exception):
+    """Raised when a completion was cut off by max_tokens; partial holds what did arrive"""
+
+    def __init__(self, partial: str):
+        super().__init__("The reply was cut off before it finished")
+        self.partial = partial
+
+class StreamStatus:
+    """How a streamed completion ended, filled in as AsyncLLMClient.stream runs"""
+
+    def __init__(self):
+        self.done = False
+        self.finish_reason: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        """Upstream sent [DONE] and the reply was not cut off by max_tokens"""
+        return self.done and self.finish_reason != "length"
+
+class AsyncLLMClient:
+    """
+    Async client for an OpenAI-compatible chat completions endpoint.
+
+    A single keep-alive connection pool is shared by all requests. Calls are
+    bounded by a global semaphore and a per-user semaphore so one user's burst
+    cannot starve everyone else.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        global_limit: int,
+        per_user_limit: int,
+        timeout: float,
+        queue_timeout: float
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.per_user_limit = per_user_limit
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self._global_limit = global_limit
+        self._global = asyncio.Semaphore(global_limit)
+        self._per_user: Dict[str, asyncio.Semaphore] = {}
+        self._per_user_waiters: Dict[str, int] = {}
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self._global_limit,
+                    max_keepalive_connections=self._global_limit,
+                    keepalive_expiry=30.0
+                )
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close the pooled connections"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold a per-user and a global concurrency slot for the duration of a call"""
+        user_semaphore = None
+        if user_id:
+            user_semaphore = self._per_user.setdefault(user_id, asyncio.Semaphore(self.per_user_limit))
+            self._per_user_waiters[user_id] = self._per_user_waiters.get(user_id, 0) + 1
+        try:
+            if user_semaphore is not None:
+                await self._acquire(user_semaphore, "Too many AI requests in progress for this user")
+            try:
+                await self._acquire(self._global, "The AI assistant is busy")
+                try:
+                    yield
+                finally:
+                    self._global.release()
+            finally:
+                if user_semaphore is not None:
+                    user_semaphore.release()
+        finally:
+            if user_id:
+                self._per_user_waiters[user_id] -= 1
+                if not self._per_user_waiters[user_id]:
+                    # Forget idle users so the map does not grow without bound
+                    del self._per_user_waiters[user_id]
+                    del self._per_user[user_id]
+
+    async def _acquire(self, semaphore: asyncio.Semaphore, message: str) -> None:
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LLMBusyError(message)
+
+    async def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        user_id: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        """
+        Run one chat completion and return the assistant message content.
+        Raises LLMTruncatedError when the reply hit max_tokens.
+        """
+        payload: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        async with self.slot(user_id):
+            response = await self._client().post(
+                "/chat/completions",
+                json=payload,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+            )
+            response.raise_for_status()
+            data = response.json()
+        choice = data["choices"][0]
+        content = choice["message"].get("content") or ""
+        if choice.get("finish_reason") == "length":
+            raise LLMTruncatedError(content)
+        return content
+
+    async def stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        user_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+        status: Optional[StreamStatus] = None
+    ) -> AsyncIterator[Optional[str]]:
+        """
+        Run a streaming chat completion, yielding content deltas as they arrive.
+
+        The first item is always None, yielded once a slot is held and the
+        upstream has accepted the request, so callers can turn busy or HTTP
+        errors into a status code before starting their own response. Closing
+        the iterator early closes the upstream connection, which stops generation.
+        
+        Running out of lines is not an error: a dropped connection ends the
+        iteration too. Pass a StreamStatus and check it afterwards to tell a
+        complete reply from a partial or truncated one.
+        """
+        status = status if status is not None else StreamStatus()
+        payload: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        async with self.slot(user_id):
+            async with self._client().stream(
+                "POST",
+                "/chat/completions",
+                json=payload,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                yield None
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        status.done = True
+                        break
+                    chunk = json.loads(data)
+                    if chunk.get("error"):
+                        error = chunk["error"]
+                        raise LLMStreamError(error.get("message", str(error)) if isinstance(error, dict) else str(error))
+                    choices = chunk.get("choices") or []
+                    # Some servers put finish_reason on a final chunk with no choices
+                    finish_reason = choices[0].get("finish_reason") if choices else chunk.get("finish_reason")
+                    if finish_reason:
+                        status.finish_reason = finish_reason
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        yield delta
+
+llm_client = AsyncLLMClient(
+    base_url=settings.llm_base_url,
+    api_key=settings.huggingface_api_key,
+    global_limit=settings.llm_max_concurrency,
+    per_user_limit=settings.llm_per_user_concurrency,
+    timeout=settings.llm_timeout_seconds,
+    queue_timeout=settings.llm_queue_timeout_seconds
+)
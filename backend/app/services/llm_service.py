@@ -1,10 +1,28 @@
 from huggingface_hub import InferenceClient
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
+import json
 import logging
 from app.core.config import settings
+from app.services.llm_cache import llm_cache, llm_fingerprint
+from app.services.llm_client import llm_client, LLMBusyError, LLMTruncatedError, StreamStatus
+from app.services.singleflight import llm_flights
+from app.services.ats_scorer import ats_scorer
+from app.services.markdown_sections import Section, index_sections, find_section, outline, splice
 
 logger = logging.getLogger(__name__)
 
+# Sampling parameters per feature
+CHAT_MAX_TOKENS = 1000
+CHAT_TEMPERATURE = 0.7
+INLINE_EDIT_MAX_TOKENS = 2000
+INLINE_EDIT_TEMPERATURE = 0.3
+ATS_MAX_TOKENS = 800
+ATS_TEMPERATURE = 0.3
+
+# Output budget for a section edit: room for the section to roughly double, plus slack
+CHARS_PER_TOKEN = 4
+SECTION_EDIT_MIN_TOKENS = 256
+
 class LLMService:
     
     def __init__(self):
@@ -12,6 +30,10 @@ class LLMService:
         self.client = None
         self.model = "deepseek-ai/DeepSeek-V3-0324"
         
+        # Async path: pooled OpenAI-compatible client, provider selected via model suffix
+        self.async_client = llm_client if settings.huggingface_api_key else None
+        self.async_model = f"{settings.llm_model}:{settings.llm_provider}" if settings.llm_provider else settings.llm_model
+        
         # Only initialize if API key is provided
         if settings.huggingface_api_key:
             try:
@@ -84,19 +106,236 @@ class LLMService:
                 "explanation": "Failed to process your request. Please try again."
             }
     
-    def chat_about_cv(self, cv_content: str, user_message: str, conversation_history: List[Dict[str, str]] = None) -> Dict[str, Any]:
+    def chat_about_cv(self, cv_content: str, user_message: str, conversation_history: List[Dict[str, str]] = None, use_cache: bool = False) -> Dict[str, Any]:
         """
         Function 1: Chat interface - Pure conversation about CV, no editing.
         """
         if not self.client:
-            return {
-                "success": False,
-                "error": "LLM service not available",
-                "reply": "AI chat is currently unavailable"
-            }
+            return self._chat_unavailable()
+        
+        try:
+            reply = self._complete(
+                self._chat_messages(cv_content, user_message, conversation_history),
+                CHAT_MAX_TOKENS, CHAT_TEMPERATURE, use_cache
+            )
+            return self._chat_result(reply)
+            
+        except LLMTruncatedError as e:
+            # Still worth showing, as a streamed chat reply would be; it was not cached
+            return self._chat_result(e.partial)
+        except Exception as e:
+            return self._chat_failure(e)
+    
+    async def chat_about_cv_async(self, cv_content: str, user_message: str, conversation_history: List[Dict[str, str]] = None, user_id: Optional[str] = None, use_cache: bool = False) -> Dict[str, Any]:
+        """
+        Async version of chat_about_cv, on the pooled client with concurrency limits.
+        """
+        if not self.async_client:
+            return self._chat_unavailable()
+        
+        try:
+            reply = await self._complete_async(
+                self._chat_messages(cv_content, user_message, conversation_history),
+                CHAT_MAX_TOKENS, CHAT_TEMPERATURE, user_id, use_cache
+            )
+            return self._chat_result(reply)
+            
+        except LLMBusyError:
+            raise
+        except LLMTruncatedError as e:
+            return self._chat_result(e.partial)
+        except Exception as e:
+            return self._chat_failure(e)
+    
+    def chat_about_cv_stream(self, cv_content: str, user_message: str, conversation_history: List[Dict[str, str]] = None, user_id: Optional[str] = None, use_cache: bool = False, status: Optional[StreamStatus] = None) -> AsyncIterator[Optional[str]]:
+        """
+        Streaming version of chat_about_cv, yielding reply deltas (see AsyncLLMClient.stream).
+        """
+        if not self.async_client:
+            raise RuntimeError("LLM service not available")
+        return self._stream(
+            self._chat_messages(cv_content, user_message, conversation_history),
+            CHAT_MAX_TOKENS, CHAT_TEMPERATURE, user_id, use_cache, status
+        )
+    
+    def inline_edit_content(self, current_content: str, edit_instruction: str, focus_section: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Function 2: Inline editor - Edit content in real-time, return only edited content.
+        """
+        if not self.client:
+            return self._inline_edit_unavailable(current_content)
+        
+        try:
+            messages, max_tokens = self._inline_edit_request(current_content, edit_instruction, focus_section)
+            edited = self._complete(messages, max_tokens, INLINE_EDIT_TEMPERATURE, use_cache)
+            return self.inline_edit_result(current_content, edited, focus_section)
+            
+        except Exception as e:
+            return self._inline_edit_failure(current_content, e)
+    
+    async def inline_edit_content_async(self, current_content: str, edit_instruction: str, focus_section: Optional[str] = None, user_id: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Async version of inline_edit_content, on the pooled client with concurrency limits.
+        """
+        if not self.async_client:
+            return self._inline_edit_unavailable(current_content)
         
         try:
-            system_prompt = """You are a professional CV advisor and career coach. Your job is to have helpful conversations about CVs, provide feedback, answer questions, and give career advice.
+            messages, max_tokens = self._inline_edit_request(current_content, edit_instruction, focus_section)
+            edited = await self._complete_async(messages, max_tokens, INLINE_EDIT_TEMPERATURE, user_id, use_cache)
+            return self.inline_edit_result(current_content, edited, focus_section)
+            
+        except LLMBusyError:
+            raise
+        except Exception as e:
+            return self._inline_edit_failure(current_content, e)
+    
+    def inline_edit_content_stream(self, current_content: str, edit_instruction: str, focus_section: Optional[str] = None, user_id: Optional[str] = None, use_cache: bool = True, status: Optional[StreamStatus] = None) -> AsyncIterator[Optional[str]]:
+        """
+        Streaming version of inline_edit_content, yielding deltas of the edited
+        section (or of the whole CV when no section is targeted). Pass the
+        assembled text to inline_edit_result once status says it is complete.
+        """
+        if not self.async_client:
+            raise RuntimeError("LLM service not available")
+        messages, max_tokens = self._inline_edit_request(current_content, edit_instruction, focus_section)
+        return self._stream(messages, max_tokens, INLINE_EDIT_TEMPERATURE, user_id, use_cache, status)
+    
+    def analyze_ats_score(self, cv_content: str, target_role: Optional[str] = None, job_description: Optional[str] = None, mode: str = "full", use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Function 3: ATS Score analysis - Comprehensive CV scoring and recommendations.
+        
+        Scores and keyword coverage come from the local ATS scorer. In "full" mode the
+        LLM then writes the strengths, weaknesses and suggestions; "fast" skips it.
+        """
+        analysis = ats_scorer.score(cv_content, target_role, job_description)
+        if mode == "fast" or not self.client:
+            return {"success": True, **analysis}
+        
+        try:
+            response_content = self._complete(
+                self._ats_messages(cv_content, target_role, job_description, analysis),
+                ATS_MAX_TOKENS, ATS_TEMPERATURE, use_cache
+            )
+            return self._ats_result(response_content, analysis)
+            
+        except Exception as e:
+            return self._ats_failure(e, analysis)
+    
+    async def analyze_ats_score_async(self, cv_content: str, target_role: Optional[str] = None, job_description: Optional[str] = None, mode: str = "full", user_id: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Async version of analyze_ats_score, on the pooled client with concurrency limits.
+        """
+        analysis = ats_scorer.score(cv_content, target_role, job_description)
+        if mode == "fast" or not self.async_client:
+            return {"success": True, **analysis}
+        
+        try:
+            response_content = await self._complete_async(
+                self._ats_messages(cv_content, target_role, job_description, analysis),
+                ATS_MAX_TOKENS, ATS_TEMPERATURE, user_id, use_cache
+            )
+            return self._ats_result(response_content, analysis)
+            
+        except LLMBusyError:
+            raise
+        except Exception as e:
+            return self._ats_failure(e, analysis)
+    
+    async def aclose(self) -> None:
+        """Release pooled connections held by the async client"""
+        if self.async_client:
+            await self.async_client.aclose()
+    
+    # Completion helpers (response cache + client)
+    
+    def _cache_key(self, model: str, messages: List[Dict[str, str]], max_tokens: int, temperature: float, user_id: Optional[str]) -> str:
+        # Scoped per user so one user's cached reply is never served to another
+        return llm_fingerprint(model, messages, {"max_tokens": max_tokens, "temperature": temperature}, scope=user_id)
+    
+    def _complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, use_cache: bool) -> str:
+        key = self._cache_key(self.model, messages, max_tokens, temperature, None) if use_cache else None
+        if key:
+            cached = llm_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        completion = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        choice = completion.choices[0]
+        reply = choice.message.content or ""
+        if choice.finish_reason == "length":
+            # Never cached, so a retry asks the model again
+            raise LLMTruncatedError(reply)
+        if key:
+            llm_cache.put(key, reply)
+        return reply
+    
+    async def _complete_async(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, user_id: Optional[str], use_cache: bool) -> str:
+        key = self._cache_key(self.async_model, messages, max_tokens, temperature, user_id)
+        if use_cache:
+            cached = await llm_cache.aget(key)
+            if cached is not None:
+                return cached
+        
+        async def complete() -> str:
+            # A cut-off reply raises here, before it could be cached
+            reply = await self.async_client.complete(
+                model=self.async_model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                user_id=user_id
+            )
+            if use_cache:
+                await llm_cache.aput(key, reply)
+            return reply
+        
+        # A double-clicked request joins the identical one already waiting on the model
+        return await llm_flights.do(key, complete)
+    
+    async def _stream(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, user_id: Optional[str], use_cache: bool, status: Optional[StreamStatus] = None) -> AsyncIterator[Optional[str]]:
+        """AsyncLLMClient.stream with the response cache in front; a hit arrives as one delta"""
+        status = status if status is not None else StreamStatus()
+        key = self._cache_key(self.async_model, messages, max_tokens, temperature, user_id) if use_cache else None
+        if key:
+            cached = await llm_cache.aget(key)
+            if cached is not None:
+                # Only complete replies are cached
+                status.done, status.finish_reason = True, "stop"
+                yield None
+                yield cached
+                return
+        
+        deltas = self.async_client.stream(
+            model=self.async_model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            user_id=user_id,
+            status=status
+        )
+        parts = []
+        try:
+            async for delta in deltas:
+                if delta:
+                    parts.append(delta)
+                yield delta
+        finally:
+            await deltas.aclose()
+        # A dropped or truncated stream also ends here, so check before caching it
+        if key and status.complete:
+            await llm_cache.aput(key, "".join(parts))
+    
+    # Chat helpers
+    
+    def _chat_messages(self, cv_content: str, user_message: str, conversation_history: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+        """Build the chat prompt"""
+        system_prompt = """You are a professional CV advisor and career coach. Your job is to have helpful conversations about CVs, provide feedback, answer questions, and give career advice.
 
 IMPORTANT: You are in CHAT MODE. Do not edit or rewrite the CV content. Only provide conversational responses, feedback, and advice.
 
@@ -107,54 +346,57 @@ Guidelines:
 - Reference specific parts of the CV when giving feedback
 - Be encouraging but honest about areas for improvement"""
 
-            # Build conversation context
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # Add conversation history
-            if conversation_history:
-                for msg in conversation_history[-5:]:  # Keep last 5 messages for context
-                    messages.append(msg)
-            
-            # Add CV context and current message
-            user_prompt = f"Here's the CV we're discussing:\n\n{cv_content}\n\nUser question: {user_message}"
-            messages.append({"role": "user", "content": user_prompt})
-            
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=1000,
-                temperature=0.7
-            )
-            
-            reply = completion.choices[0].message.content
-            
-            return {
-                "success": True,
-                "reply": reply,
-                "suggestions": []  # Could extract quick suggestions from reply
-            }
-            
-        except Exception as e:
-            logger.error(f"CV chat failed: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "reply": "Sorry, I couldn't process your message. Please try again."
-            }
+        # Build conversation context
+        messages = [{"role": "system", "content": system_prompt}]
+        
+        # Add conversation history
+        if conversation_history:
+            for msg in conversation_history[-5:]:  # Keep last 5 messages for context
+                messages.append(msg)
+        
+        # Add CV context and current message
+        user_prompt = f"Here's the CV we're discussing:\n\n{cv_content}\n\nUser question: {user_message}"
+        messages.append({"role": "user", "content": user_prompt})
+        return messages
     
-    def inline_edit_content(self, current_content: str, edit_instruction: str, focus_section: Optional[str] = None) -> Dict[str, Any]:
-        """
-        Function 2: Inline editor - Edit content in real-time, return only edited content.
-        """
-        if not self.client:
-            return {
-                "success": False,
-                "error": "LLM service not available",
-                "edited_content": current_content
-            }
+    def _chat_result(self, reply: str) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "reply": reply,
+            "suggestions": []  # Could extract quick suggestions from reply
+        }
+    
+    def _chat_unavailable(self) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": "LLM service not available",
+            "reply": "AI chat is currently unavailable"
+        }
+    
+    def _chat_failure(self, e: Exception) -> Dict[str, Any]:
+        logger.error(f"CV chat failed: {e}")
+        return {
+            "success": False,
+            "error": str(e),
+            "reply": "Sorry, I couldn't process your message. Please try again."
+        }
+    
+    # Inline edit helpers
+    
+    def _inline_edit_request(self, current_content: str, edit_instruction: str, focus_section: Optional[str]) -> Tuple[List[Dict[str, str]], int]:
+        """Prompt and output budget, scoped to the focused section when it can be found"""
+        sections = index_sections(current_content)
+        section = find_section(current_content, focus_section, sections)
+        if section is None:
+            return self._inline_edit_messages(current_content, edit_instruction, focus_section), INLINE_EDIT_MAX_TOKENS
         
-        try:
-            system_prompt = """You are a CV editing assistant. Your job is to make precise edits to CV content based on user instructions.
+        section_text = section.text(current_content)
+        max_tokens = min(INLINE_EDIT_MAX_TOKENS, max(SECTION_EDIT_MIN_TOKENS, 2 * len(section_text) // CHARS_PER_TOKEN))
+        return self._section_edit_messages(section_text, edit_instruction, outline(sections, section)), max_tokens
+    
+    def _inline_edit_messages(self, current_content: str, edit_instruction: str, focus_section: Optional[str]) -> List[Dict[str, str]]:
+        """Build the inline edit prompt"""
+        system_prompt = """You are a CV editing assistant. Your job is to make precise edits to CV content based on user instructions.
 
 IMPORTANT: You are in EDIT MODE. Return ONLY the edited CV content with your improvements. Do not provide explanations or commentary.
 
@@ -165,109 +407,135 @@ Guidelines:
 - Return the complete, edited CV content
 - Be precise and professional in your edits"""
 
-            focus_instruction = f" Focus specifically on the {focus_section} section." if focus_section else ""
-            user_prompt = f"Edit this CV content: {edit_instruction}{focus_instruction}\n\nCV Content:\n{current_content}"
-            
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.3
-            )
-            
-            edited_content = completion.choices[0].message.content.strip()
-            
-            # Simple change detection
-            changes_made = []
-            if edited_content != current_content:
-                changes_made.append("Content updated based on your request")
-            
-            return {
-                "success": True,
-                "edited_content": edited_content,
-                "changes_made": changes_made
-            }
-            
-        except Exception as e:
-            logger.error(f"Inline edit failed: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "edited_content": current_content
-            }
+        focus_instruction = f" Focus specifically on the {focus_section} section." if focus_section else ""
+        user_prompt = f"Edit this CV content: {edit_instruction}{focus_instruction}\n\nCV Content:\n{current_content}"
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
     
-    def analyze_ats_score(self, cv_content: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> Dict[str, Any]:
-        """
-        Function 3: ATS Score analysis - Comprehensive CV scoring and recommendations.
-        """
-        if not self.client:
+    def _section_edit_messages(self, section_text: str, edit_instruction: str, cv_outline: str) -> List[Dict[str, str]]:
+        """Build the inline edit prompt for a single section"""
+        system_prompt = """You are a CV editing assistant. Your job is to make precise edits to one section of a CV based on user instructions.
+
+IMPORTANT: You are in EDIT MODE. Return ONLY the edited section, starting with its heading line. Do not return other sections, explanations or commentary.
+
+Guidelines:
+- Make only the requested changes
+- Preserve the markdown formatting and heading levels
+- Keep all [CENTER] and [DATE: content] markers intact
+- Be precise and professional in your edits"""
+
+        user_prompt = f"Edit this CV section: {edit_instruction}\n\nCV outline:\n{cv_outline}\n\nSection Content:\n{section_text}"
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def inline_edit_result(self, current_content: str, edited: str, focus_section: Optional[str] = None) -> Dict[str, Any]:
+        """Result dict for an edited CV, also used to finish a streamed edit"""
+        edited_content = edited.strip()
+        if not edited_content:
+            # An empty reply would wipe the CV (or the section) if saved
             return {
                 "success": False,
-                "error": "LLM service not available"
+                "error": "The model returned no content",
+                "edited_content": current_content
             }
         
-        try:
-            system_prompt = """You are an ATS (Applicant Tracking System) expert and CV analyzer. Analyze CVs like a recruiter and ATS system would.
+        # A section edit comes back as just that section: put it back in place
+        section = find_section(current_content, focus_section)
+        if section is not None:
+            edited_content = self._splice_section(current_content, section, edited_content)
+        
+        # Simple change detection
+        changes_made = []
+        if edited_content != current_content:
+            changes_made.append(f"{focus_section.strip().capitalize()} section updated based on your request" if section else "Content updated based on your request")
+        
+        return {
+            "success": True,
+            "edited_content": edited_content,
+            "changes_made": changes_made
+        }
+    
+    def _splice_section(self, current_content: str, section: Section, edited_section: str) -> str:
+        if not edited_section:
+            # Nothing usable came back, so leave the CV as it was
+            return current_content
+        if not edited_section.startswith("#") and section.title:
+            # Keep the heading if the model dropped it
+            heading_line = current_content[section.start:].split("\n", 1)[0]
+            edited_section = f"{heading_line}\n{edited_section}"
+        return splice(current_content, section, edited_section)
+    
+    def _inline_edit_unavailable(self, current_content: str) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": "LLM service not available",
+            "edited_content": current_content
+        }
+    
+    def _inline_edit_failure(self, current_content: str, e: Exception) -> Dict[str, Any]:
+        logger.error(f"Inline edit failed: {e}")
+        return {
+            "success": False,
+            # Upstream errors can carry URLs or response bodies, so only a cut-off reply is described
+            "error": str(e) if isinstance(e, LLMTruncatedError) else "Inline edit failed",
+            "edited_content": current_content
+        }
+    
+    # ATS helpers
+    
+    def _ats_messages(self, cv_content: str, target_role: Optional[str], job_description: Optional[str], analysis: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Build the ATS feedback prompt around the locally computed scores"""
+        system_prompt = """You are an ATS (Applicant Tracking System) expert and CV analyzer. Review CVs like a recruiter and ATS system would.
 
-Provide your response as a JSON object with:
-- "ats_score": number 0-100
-- "score_breakdown": {"formatting": 0-25, "keywords": 0-25, "experience": 0-25, "skills": 0-25}
+The CV has already been scored; do not score it again. Provide your response as a JSON object with:
 - "strengths": list of strengths
-- "weaknesses": list of weaknesses  
+- "weaknesses": list of weaknesses
 - "upgrade_suggestions": list of specific actionable improvements
-- "keyword_analysis": {"missing_keywords": [], "present_keywords": []}
 
 Be specific, actionable, and focus on what ATS systems and recruiters actually look for."""
 
-            context = ""
-            if target_role:
-                context += f"Target Role: {target_role}\n"
-            if job_description:
-                context += f"Job Description: {job_description}\n"
-            
-            user_prompt = f"Analyze this CV for ATS compatibility and recruiter appeal:\n\n{context}\nCV Content:\n{cv_content}"
-            
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=1500,
-                temperature=0.3
-            )
-            
-            response_content = completion.choices[0].message.content
-            
-            # Try to parse as JSON
-            try:
-                import json
-                analysis = json.loads(response_content)
-            except:
-                # Fallback if JSON parsing fails
-                analysis = {
-                    "ats_score": 75,
-                    "score_breakdown": {"formatting": 20, "keywords": 15, "experience": 20, "skills": 20},
-                    "strengths": ["Professional structure", "Clear contact information"],
-                    "weaknesses": ["Missing keywords", "Could be more specific"],
-                    "upgrade_suggestions": ["Add more industry-specific keywords", "Quantify achievements"],
-                    "keyword_analysis": {"missing_keywords": [], "present_keywords": []}
-                }
-            
-            return {
-                "success": True,
-                **analysis
-            }
-            
-        except Exception as e:
-            logger.error(f"ATS analysis failed: {e}")
-            return {
-                "success": False,
-                "error": str(e)
-            }
+        context = ""
+        if target_role:
+            context += f"Target Role: {target_role}\n"
+        if job_description:
+            context += f"Job Description: {job_description}\n"
+        
+        scores = json.dumps({
+            "ats_score": analysis["ats_score"],
+            "score_breakdown": analysis["score_breakdown"],
+            "missing_keywords": analysis["keyword_analysis"]["missing_keywords"]
+        })
+        user_prompt = f"Give feedback on this CV for ATS compatibility and recruiter appeal:\n\n{context}\nScores: {scores}\n\nCV Content:\n{cv_content}"
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _ats_result(self, response_content: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        result = {"success": True, **analysis}
+        
+        # Models often wrap JSON in prose or code fences, so parse the outermost object
+        start, end = response_content.find("{"), response_content.rfind("}")
+        try:
+            feedback = json.loads(response_content[start:end + 1]) if start != -1 else {}
+        except ValueError:
+            logger.warning("ATS feedback was not valid JSON, keeping rule-based feedback")
+            feedback = {}
+        
+        for field in ("strengths", "weaknesses", "upgrade_suggestions"):
+            items = feedback.get(field) if isinstance(feedback, dict) else None
+            if isinstance(items, list) and items:
+                result[field] = [str(item) for item in items]
+        return result
+    
+    def _ats_failure(self, e: Exception, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        # The scores are still valid without the LLM, so fall back to rule-based feedback
+        logger.error(f"ATS feedback failed: {e}")
+        return {"success": True, **analysis}
     
     def _create_system_prompt(self) -> str:
         """Create the system prompt for CV editing"""
@@ -0,0 +1,111 @@
+from typing import Dict, Any, Optional
+from datetime import datetime
+import asyncio
+import logging
+import threading
+from app.core import config
+from app.database import AsyncSessionLocal
+from app.crud.user import bulk_update_last_login
+
+logger = logging.getLogger(__name__)
+
+# Users per UPDATE statement, to keep the VALUES list and its bind params bounded
+FLUSH_BATCH_SIZE = 500
+
+class LastLoginBuffer:
+    """
+    Collects last_login timestamps in memory and writes them in batches.
+
+    Logins only record a timestamp here; a background task flushes the
+    buffer every interval with one UPDATE per batch. Repeated logins of the
+    same user between flushes collapse into a single row update. A failed
+    flush puts its entries back so the next one retries them.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._stats = {"recorded": 0, "flushes": 0, "rows_written": 0, "failures": 0}
+
+    def record(self, user_id: str, logged_in_at: datetime) -> None:
+        """Buffer a login; the latest timestamp per user wins"""
+        with self._lock:
+            current = self._pending.get(user_id)
+            if current is None or current < logged_in_at:
+                self._pending[user_id] = logged_in_at
+            self._stats["recorded"] += 1
+
+    def _take(self) -> Dict[str, datetime]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            return pending
+
+    def _restore(self, logins: Dict[str, datetime]) -> None:
+        with self._lock:
+            for user_id, logged_in_at in logins.items():
+                current = self._pending.get(user_id)
+                if current is None or current < logged_in_at:
+                    self._pending[user_id] = logged_in_at
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows updated"""
+        logins = self._take()
+        if not logins:
+            return 0
+        items = list(logins.items())
+        written = 0
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(items), FLUSH_BATCH_SIZE):
+                batch = dict(items[start:start + FLUSH_BATCH_SIZE])
+                try:
+                    written += await bulk_update_last_login(db, batch)
+                except Exception as e:
+                    await db.rollback()
+                    logger.warning(f"Flushing {len(batch)} last_login updates failed: {e}")
+                    self._restore(dict(items[start:]))
+                    with self._lock:
+                        self._stats["failures"] += 1
+                    break
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["rows_written"] += written
+        return written
+
+    async def _run(self) -> None:
+        # Flush every interval, and once more on the way out; never cancelled mid-write
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"last_login flush failed: {e}")
+            if self._stopping.is_set():
+                return
+
+    def start(self) -> None:
+        """Start the periodic flush task on the running event loop"""
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def shutdown(self) -> None:
+        """Stop the flush task after a final best-effort flush"""
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+        if self._pending:
+            logger.warning(f"Final last_login flush failed, {len(self._pending)} updates dropped")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "pending": len(self._pending), "interval_seconds": self.interval_seconds}
+
+last_login_buffer = LastLoginBuffer(interval_seconds=config.settings.last_login_flush_interval_seconds)
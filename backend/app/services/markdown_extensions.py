@@ -0,0 +1,173 @@
+from markdown import Markdown
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+from typing import List, Optional, Tuple
+import hashlib
+import re
+import threading
+import xml.etree.ElementTree as etree
+
+MARKER_RE = re.compile(r"[ \t]*\[(?:(CENTER)|DATE:[ \t]*([^\]]+))\]")
+
+# id prefix of top-level blocks; PDFService finds page breaks between blocks by these anchors
+BLOCK_ID_PREFIX = "cv-block-"
+
+HEADER_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+BLOCK_TAGS = HEADER_TAGS | {"p", "li", "td", "th", "dt", "dd"}
+
+def _add_class(element: etree.Element, class_name: str) -> None:
+    classes = element.get("class", "").split()
+    if class_name not in classes:
+        classes.append(class_name)
+    element.set("class", " ".join(classes))
+
+def _rstrip_content(element: etree.Element) -> None:
+    """Drop the whitespace a trailing marker leaves at the end of a block"""
+    if len(element):
+        last = element[-1]
+        if last.tail is not None:
+            last.tail = last.tail.rstrip() or None
+    elif element.text is not None:
+        element.text = element.text.rstrip()
+
+class CVMarkersTreeprocessor(Treeprocessor):
+    """Turns the [CENTER] and [DATE: ...] markers into classed HTML elements"""
+
+    def run(self, root: etree.Element) -> None:
+        # Cheap C-level scan first: most elements carry no "[" and need no further work
+        hits = [
+            (element, bool(element.text and "[" in element.text))
+            for element in root.iter()
+            if (element.text and "[" in element.text) or (element.tail and "[" in element.tail)
+        ]
+        if not hits:
+            return
+
+        parents = {child: parent for parent in root.iter() for child in parent}
+        seen = set()
+        for element, in_text in hits:
+            # Text belongs to the element itself, a tail to the element's parent
+            owners = [element] if in_text else []
+            if element.tail and "[" in element.tail and element in parents:
+                owners.append(parents[element])
+            for owner in owners:
+                block = owner
+                while block.tag not in BLOCK_TAGS and block in parents:
+                    block = parents[block]
+                if block.tag in BLOCK_TAGS and block not in seen:
+                    seen.add(block)
+                    self._process(block, parents[block])
+
+    def _process(self, block: etree.Element, parent: etree.Element) -> None:
+        markers: List[Tuple[str, Optional[str]]] = []
+
+        def strip(text: Optional[str]) -> Optional[str]:
+            if not text or "[" not in text:
+                return text
+            def collect(match: re.Match) -> str:
+                markers.append(("center", None) if match.group(1) else ("date", match.group(2).strip()))
+                return ""
+            return MARKER_RE.sub(collect, text)
+
+        def visit(element: etree.Element) -> None:
+            # Nested blocks (e.g. <p> in a loose <li>) own their markers, so skip their text
+            for child in element:
+                child.tail = strip(child.tail)
+                if child.tag not in BLOCK_TAGS:
+                    child.text = strip(child.text)
+                    visit(child)
+
+        block.text = strip(block.text)
+        visit(block)
+        if not markers:
+            return
+        _rstrip_content(block)
+
+        for kind, date_content in markers:
+            if kind == "center":
+                _add_class(block, "center-text")
+        dates = [date_content for kind, date_content in markers if kind == "date"]
+        if dates:
+            self._add_date(block, parent, dates[0])
+
+    def _add_date(self, block: etree.Element, parent: etree.Element, date_content: str) -> None:
+        if block.tag in HEADER_TAGS:
+            # Headers keep the date inline so it floats right on the same line
+            date_span = etree.SubElement(block, "span", {"class": "header-date"})
+            date_span.text = date_content
+            return
+
+        line = etree.Element("div", {"class": "date-line"})
+        content = etree.SubElement(line, "span", {"class": "content"})
+        date_span = etree.SubElement(line, "span", {"class": "date"})
+        date_span.text = date_content
+
+        if block.tag == "p":
+            # Replace the paragraph with the date layout, keeping the paragraph inside
+            index = list(parent).index(block)
+            parent.remove(block)
+            line.tail, block.tail = block.tail, None
+            content.append(block)
+            parent.insert(index, line)
+        else:
+            # List items and table cells must stay in place, so wrap their contents
+            content.text, block.text = block.text, None
+            for child in list(block):
+                block.remove(child)
+                content.append(child)
+            block.append(line)
+
+class CVMarkersExtension(Extension):
+    """Python-Markdown extension for ResumeForge's [CENTER] and [DATE: ...] markers"""
+
+    def extendMarkdown(self, md: Markdown) -> None:
+        # Run after inline parsing (priority 20) and before prettify (10)
+        md.treeprocessors.register(CVMarkersTreeprocessor(md), "cv_markers", 15)
+
+class CVBlocksTreeprocessor(Treeprocessor):
+    """Gives every top-level block an id and records its tag and a hash of its HTML"""
+
+    def run(self, root: etree.Element) -> None:
+        blocks = []
+        for index, block in enumerate(root):
+            # Hashed before the id is set, so a block's hash never depends on its position
+            blocks.append((block.tag, hashlib.sha256(etree.tostring(block, encoding="unicode").encode("utf-8")).hexdigest()))
+            if block.get("id") is None:
+                block.set("id", f"{BLOCK_ID_PREFIX}{index}")
+        self.md.cv_blocks = blocks
+
+class CVBlocksExtension(Extension):
+    """Block ids and hashes for incremental PDF layout"""
+
+    def extendMarkdown(self, md: Markdown) -> None:
+        # Last, after prettify (10), so the hashes cover the final tree
+        md.treeprocessors.register(CVBlocksTreeprocessor(md), "cv_blocks", 5)
+
+_local = threading.local()
+
+def get_cv_markdown() -> Markdown:
+    """Return this thread's reusable converter, reset and ready for convert()"""
+    md = getattr(_local, "markdown", None)
+    if md is None:
+        md = Markdown(extensions=["markdown.extensions.extra", CVMarkersExtension(), CVBlocksExtension()])
+        _local.markdown = md
+    return md.reset()
+
+def render_cv_markdown(content: str) -> str:
+    """Convert CV markdown (including special markers) to HTML in a single pass"""
+    if not content:
+        return ""
+    return get_cv_markdown().convert(content)
+
+def render_cv_blocks(content: str) -> Tuple[str, Optional[List[Tuple[str, str]]]]:
+    """
+    render_cv_markdown plus (tag, hash) per top-level block, in document order.
+
+    The blocks are None when raw HTML or entities were stashed: they are
+    spliced in after the tree is hashed, so the hashes would not cover them.
+    """
+    if not content:
+        return "", []
+    md = get_cv_markdown()
+    html = md.convert(content)
+    return html, None if md.htmlStash.html_counter else md.cv_blocks
@@ -0,0 +1,113 @@
+from typing import List, NamedTuple, Optional
+import re
+
+# Headings that split a CV into sections; deeper levels stay inside their parent
+MAX_SECTION_LEVEL = 3
+
+HEADING_RE = re.compile(r"^ {0,3}(#{1,6})[ \t]+(.*?)[ \t]*#*[ \t]*$")
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+MARKER_RE = re.compile(r"\[(?:CENTER|DATE:[^\]]*)\]")
+
+# Section names used by the editor, and heading words that identify them
+SECTION_ALIASES = {
+    "summary": ("summary", "profile", "about", "objective", "overview"),
+    "experience": ("experience", "employment", "work history", "career"),
+    "education": ("education", "academic", "qualifications", "degrees"),
+    "skills": ("skills", "competencies", "technologies", "expertise"),
+    "projects": ("projects", "portfolio"),
+    "achievements": ("achievements", "awards", "accomplishments", "honors", "honours"),
+    "contact": ("contact",)
+}
+
+class Section(NamedTuple):
+    """A heading and the text it owns, as offsets into the source document"""
+    level: int
+    title: str
+    start: int
+    end: int
+    own_end: int
+
+    def text(self, content: str) -> str:
+        return content[self.start:self.end]
+
+def index_sections(content: str) -> List[Section]:
+    """
+    Split markdown into sections at level 1-3 ATX headings, in document order.
+
+    A section runs from its heading to the next heading of the same or higher
+    level, so it includes its subsections; own_end stops at the first
+    subheading instead. Headings inside fenced code blocks are ignored.
+    """
+    headings = []
+    fence = None
+    offset = 0
+    for line in content.splitlines(keepends=True):
+        stripped = line.rstrip("\r\n")
+        fence_match = FENCE_RE.match(stripped)
+        if fence is not None:
+            if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence):
+                fence = None
+        elif fence_match:
+            fence = fence_match.group(1)
+        else:
+            heading = HEADING_RE.match(stripped)
+            if heading and len(heading.group(1)) <= MAX_SECTION_LEVEL:
+                headings.append((len(heading.group(1)), heading.group(2), offset))
+        offset += len(line)
+
+    sections = []
+    for i, (level, title, start) in enumerate(headings):
+        end = own_end = len(content)
+        for next_level, _, next_start in headings[i + 1:]:
+            own_end = min(own_end, next_start)
+            if next_level <= level:
+                end = next_start
+                break
+        sections.append(Section(level, title, start, end, own_end))
+    return sections
+
+def _heading_words(title: str) -> str:
+    return " ".join(MARKER_RE.sub("", title).lower().replace("&", " ").split())
+
+def find_section(content: str, name: Optional[str], sections: Optional[List[Section]] = None) -> Optional[Section]:
+    """
+    Locate the section the editor calls name (e.g. "experience").
+
+    Matching is by heading text, preferring the shallowest heading. "contact"
+    falls back to the top block (name, title, contact line) before the first
+    subheading. Returns None when nothing matches.
+    """
+    if not name:
+        return None
+    if sections is None:
+        sections = index_sections(content)
+    key = name.strip().lower()
+    keywords = SECTION_ALIASES.get(key, (key,))
+
+    matches = [
+        section for section in sections
+        if section.level > 1 and any(keyword in _heading_words(section.title) for keyword in keywords)
+    ]
+    if matches:
+        return min(matches, key=lambda section: section.level)
+
+    if key == "contact" and sections and sections[0].level == 1:
+        top = sections[0]
+        return top._replace(end=top.own_end)
+    return None
+
+def outline(sections: List[Section], focus: Optional[Section] = None) -> str:
+    """Compact heading outline of the document, marking the focused section"""
+    lines = []
+    for section in sections:
+        line = f"{'  ' * (section.level - 1)}- {MARKER_RE.sub('', section.title).strip()}"
+        if focus is not None and section.start == focus.start:
+            line += "  <-- section being edited"
+        lines.append(line)
+    return "\n".join(lines)
+
+def splice(content: str, section: Section, replacement: str) -> str:
+    """Replace a section's text, keeping the blank lines that separated it from what follows"""
+    original = section.text(content)
+    trailing = original[len(original.rstrip()):]
+    return content[:section.start] + replacement.strip() + trailing + content[section.end:]
@@ -0,0 +1,148 @@
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import hashlib
+import importlib.util
+import io
+import threading
+from app.services.render_cache import render_cache, canonicalize_settings, RENDER_VERSION
+from app.services.render_pool import render_pool
+from app.services.singleflight import render_flights
+
+# pypdfium2 is optional: without it the PNG preview endpoint answers 501
+PREVIEW_AVAILABLE = importlib.util.find_spec("pypdfium2") is not None
+
+# Renders whose page fingerprints are remembered (a few hundred bytes each)
+FINGERPRINT_CACHE_SIZE = 512
+
+# pdfium is not thread-safe; this only matters when the render pool is off
+_pdfium_lock = threading.Lock()
+
+class PageNotFoundError(Exception):
+    """Raised for a page number past the end of the document"""
+
+    def __init__(self, page_count: int):
+        super().__init__(f"Document has {page_count} pages")
+        self.page_count = page_count
+
+# --- Functions below run inside the render workers ---
+
+def page_fingerprints(pdf_bytes: bytes, seed: str) -> List[str]:
+    """
+    Hash of what each page draws: its size, its text, and the type and
+    bounds of every object on it (images by their data). seed carries what
+    changes the look without moving anything, i.e. the style settings.
+    """
+    import pypdfium2 as pdfium
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            fingerprints = []
+            for index in range(len(pdf)):
+                page = pdf[index]
+                digest = hashlib.sha256(seed.encode("utf-8"))
+                digest.update(repr(page.get_size()).encode("utf-8"))
+                digest.update(page.get_textpage().get_text_bounded().encode("utf-8"))
+                for obj in page.get_objects():
+                    digest.update(repr((obj.type, obj.get_pos())).encode("utf-8"))
+                    if isinstance(obj, pdfium.PdfImage):
+                        digest.update(bytes(obj.get_data()))
+                fingerprints.append(digest.hexdigest())
+            return fingerprints
+        finally:
+            pdf.close()
+
+def rasterize_page(pdf_bytes: bytes, page_index: int, dpi: int) -> bytes:
+    """One page as PNG at dpi"""
+    import pypdfium2 as pdfium
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            image = pdf[page_index].render(scale=dpi / 72).to_pil()
+        finally:
+            pdf.close()
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+# --- Parent side ---
+
+def page_preview_key(fingerprint: str, dpi: int) -> str:
+    """Render cache key of a page PNG; the same page in a later render reuses it"""
+    return hashlib.sha256(f"png\0{RENDER_VERSION}\0{fingerprint}\0{dpi}".encode("utf-8")).hexdigest()
+
+class PagePreviews:
+    """
+    PNG previews of single PDF pages, rasterized on the render pool.
+
+    Pages are cached in the render cache by a fingerprint of their drawn
+    content rather than by the whole document, so after an edit only the
+    pages that actually changed are rasterized again. Fingerprinting a
+    document is cheap next to rasterizing it and is done once per render.
+    """
+
+    def __init__(self, max_fingerprints: int):
+        self.max_fingerprints = max_fingerprints
+        self._fingerprints: "OrderedDict[str, List[str]]" = OrderedDict()
+        # Page count per CV (content_hash, settings_hash), for 304s that never see the content
+        self._page_counts: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._stats = {"requests": 0, "page_hits": 0, "rasterized": 0, "fingerprinted": 0}
+
+    async def get_page(
+        self,
+        render_key: str,
+        pdf_bytes: bytes,
+        settings: Optional[Dict[str, Any]],
+        page: int,
+        dpi: int
+    ) -> Tuple[bytes, int]:
+        """(PNG of 1-based page at dpi, page count) for the PDF stored under render_key"""
+        self._stats["requests"] += 1
+        fingerprints = await self._page_fingerprints(render_key, pdf_bytes, settings)
+        if page > len(fingerprints):
+            raise PageNotFoundError(len(fingerprints))
+
+        key = page_preview_key(fingerprints[page - 1], dpi)
+        png = render_cache.get(key)
+        if png is not None:
+            self._stats["page_hits"] += 1
+            return png, len(fingerprints)
+        png = await render_flights.do(key, lambda: self._rasterize(key, pdf_bytes, page - 1, dpi))
+        return png, len(fingerprints)
+
+    def remember_page_count(self, cv_fingerprint: Tuple[str, str], page_count: int) -> None:
+        self._page_counts[cv_fingerprint] = page_count
+        self._page_counts.move_to_end(cv_fingerprint)
+        while len(self._page_counts) > self.max_fingerprints:
+            self._page_counts.popitem(last=False)
+
+    def page_count(self, cv_fingerprint: Tuple[str, str]) -> Optional[int]:
+        """Pages of the CV with this (content_hash, settings_hash), if this process has seen it"""
+        return self._page_counts.get(cv_fingerprint)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "documents": len(self._fingerprints), "available": PREVIEW_AVAILABLE}
+
+    async def _page_fingerprints(self, render_key: str, pdf_bytes: bytes, settings: Optional[Dict[str, Any]]) -> List[str]:
+        fingerprints = self._fingerprints.get(render_key)
+        if fingerprints is not None:
+            self._fingerprints.move_to_end(render_key)
+            return fingerprints
+
+        seed = canonicalize_settings(settings)
+        fingerprints = await render_flights.do(
+            f"pages:{render_key}",
+            lambda: render_pool.run(page_fingerprints, pdf_bytes, seed)
+        )
+        self._stats["fingerprinted"] += 1
+        self._fingerprints[render_key] = fingerprints
+        while len(self._fingerprints) > self.max_fingerprints:
+            self._fingerprints.popitem(last=False)
+        return fingerprints
+
+    async def _rasterize(self, key: str, pdf_bytes: bytes, page_index: int, dpi: int) -> bytes:
+        png = await render_pool.run(rasterize_page, pdf_bytes, page_index, dpi)
+        self._stats["rasterized"] += 1
+        render_cache.put(key, png)
+        return png
+
+page_previews = PagePreviews(FINGERPRINT_CACHE_SIZE)
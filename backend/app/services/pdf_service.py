@@ -1,22 +1,102 @@
-import markdown
 from weasyprint import HTML, CSS
-from io import BytesIO
-from typing import Dict, Any, Optional
+from weasyprint.text.fonts import FontConfiguration
+from typing import Dict, Any, Optional, Iterable, List, NamedTuple, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+import json
 import logging
-import re
+import threading
+from app.services.markdown_extensions import render_cv_blocks, BLOCK_ID_PREFIX, HEADER_TAGS
+from app.services.render_cache import render_cache, render_cache_key, canonicalize_settings
 
 logger = logging.getLogger(__name__)
 
+# Default settings
+DEFAULT_STYLE_SETTINGS = {
+    "font": "Arial",
+    "fontSize": 11,
+    "margins": {"top": 20, "bottom": 20, "left": 15, "right": 15},
+    "theme": "professional",
+    "lineHeight": 1.4
+}
+
+# Font family mapping
+FONT_FAMILIES = {
+    "Arial": "Arial, sans-serif",
+    "Helvetica": "Helvetica, Arial, sans-serif",
+    "Times New Roman": "'Times New Roman', Times, serif",
+    "Georgia": "Georgia, serif",
+    "Verdana": "Verdana, sans-serif"
+}
+
+# Theme-based colors
+THEMES = {
+    "professional": {
+        "primary": "#2c3e50",
+        "secondary": "#34495e",
+        "accent": "#3498db",
+        "text": "#2c3e50",
+        "background": "#ffffff"
+    },
+    "modern": {
+        "primary": "#1a1a1a",
+        "secondary": "#4a4a4a",
+        "accent": "#007acc",
+        "text": "#333333",
+        "background": "#ffffff"
+    },
+    "minimal": {
+        "primary": "#000000",
+        "secondary": "#666666",
+        "accent": "#888888",
+        "text": "#333333",
+        "background": "#ffffff"
+    },
+    "creative": {
+        "primary": "#8e44ad",
+        "secondary": "#9b59b6",
+        "accent": "#e74c3c",
+        "text": "#2c3e50",
+        "background": "#ffffff"
+    }
+}
+
+# Upper bound on distinct parsed stylesheets kept per process
+STYLESHEET_CACHE_SIZE = 128
+
+# Laid-out documents kept per process for incremental re-layout (one per CV)
+LAYOUT_CACHE_SIZE = 8
+
+# CSS px per mm, and the slack allowed when matching a block to the top of a page
+PX_PER_MM = 96 / 25.4
+PAGE_TOP_TOLERANCE_PX = 0.01
+
+class _Layout(NamedTuple):
+    """The last laid-out Document of a CV and what it was built from"""
+    style_key: str
+    blocks: List[Tuple[str, str]]
+    document: Any
+
 class PDFService:
     
     def __init__(self):
         """Initialize PDF service with default styles"""
         self.default_css = self._get_default_css()
+        # Shared by every stylesheet and render so fonts are resolved once per process
+        self.font_config = FontConfiguration()
+        self._stylesheet_for_key = lru_cache(maxsize=STYLESHEET_CACHE_SIZE)(self._build_stylesheet)
+        self._layouts: "OrderedDict[str, _Layout]" = OrderedDict()
+        # Only contended when rendering in the threadpool (render pool disabled)
+        self._layouts_lock = threading.Lock()
+        self.layout_stats = {"full": 0, "incremental": 0, "unchanged": 0, "pages_reused": 0, "fallbacks": 0}
     
     def generate_pdf(self, markdown_content: str, settings: Optional[Dict[str, Any]] = None) -> bytes:
         """
         Generate PDF from markdown content with custom styling.
         
+        Renders are content-addressed: identical markdown and settings are
+        served from the render cache instead of being laid out again.
+        
         Args:
             markdown_content: The CV content in markdown format
             settings: Styling settings (font, margins, theme, etc.)
@@ -24,82 +104,168 @@ class PDFService:
         Returns:
             bytes: PDF file content
         """
+        cache_key = render_cache_key(markdown_content, settings)
+        cached = render_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        pdf_bytes = self.render_pdf(markdown_content, settings)
+        render_cache.put(cache_key, pdf_bytes)
+        return pdf_bytes
+    
+    def render_pdf(self, markdown_content: str, settings: Optional[Dict[str, Any]] = None, layout_key: Optional[str] = None) -> bytes:
+        """
+        Run the full markdown -> HTML -> WeasyPrint pipeline, bypassing the cache.
+        
+        With a layout_key (the CV id) the laid-out Document is kept, and the
+        next render for the same key only lays out again from the first page
+        that can be affected by the edit (see _relayout).
+        """
         try:
-            # Process special formatting markers (this now handles markdown conversion too)
-            html_content = self._process_special_formatting(markdown_content)
+            # Markdown to HTML (markers handled during the parse), with the tag and hash of each top-level block
+            html_content, blocks = render_cv_blocks(markdown_content)
             
             # Wrap in complete HTML document
             final_html = self._wrap_html(html_content)
             
-            # Generate CSS based on settings
-            css_styles = self._generate_css(settings or {})
+            # Parsed stylesheet for these settings (memoized)
+            css = self.get_stylesheet(settings)
             
-            # Create PDF
-            html = HTML(string=final_html)
-            css = CSS(string=css_styles)
+            if not layout_key:
+                # Generate PDF straight to bytes
+                self.layout_stats["full"] += 1
+                return HTML(string=final_html).write_pdf(stylesheets=[css], font_config=self.font_config)
             
-            # Generate PDF to bytes
-            pdf_buffer = BytesIO()
-            html.write_pdf(pdf_buffer, stylesheets=[css])
+            style_key = self._style_key(settings or {})
+            document = None
+            if blocks is not None:
+                document = self._relayout(layout_key, final_html, css, style_key, blocks, settings or {})
+            if document is None:
+                self.layout_stats["full"] += 1
+                document = HTML(string=final_html).render(stylesheets=[css], font_config=self.font_config)
             
-            return pdf_buffer.getvalue()
+            with self._layouts_lock:
+                self._layouts.pop(layout_key, None)
+                if blocks is not None:
+                    self._layouts[layout_key] = _Layout(style_key, blocks, document)
+                    while len(self._layouts) > LAYOUT_CACHE_SIZE:
+                        self._layouts.popitem(last=False)
+            return document.write_pdf()
             
         except Exception as e:
             logger.error(f"PDF generation failed: {str(e)}")
             raise Exception(f"Failed to generate PDF: {str(e)}")
     
-    def _process_special_formatting(self, content: str) -> str:
-        """Process special formatting markers after markdown conversion"""
-        if not content:
-            return ""
-        
-        # First convert markdown to HTML normally
-        md = markdown.Markdown(extensions=['markdown.extensions.extra'])
-        html_content = md.convert(content)
-        
-        # Then process our special markers in the HTML
-        lines = html_content.split('\n')
-        processed_lines = []
-        
-        for line in lines:
-            # Check for CENTER marker
-            if '[CENTER]' in line:
-                clean_line = line.replace('[CENTER]', '').strip()
-                # If it's already wrapped in HTML tags, add class
-                if clean_line.strip().startswith('<'):
-                    # Add center class to existing HTML element
-                    clean_line = re.sub(r'<(\w+)([^>]*)>', r'<\1 class="center-text"\2>', clean_line, count=1)
-                    processed_lines.append(clean_line)
-                else:
-                    processed_lines.append(f'<div class="center-text">{clean_line}</div>')
-            # Check for DATE-RIGHT marker  
-            elif '[DATE:' in line:
-                # Extract date from [DATE: content]
-                date_match = re.search(r'\[DATE:\s*([^\]]+)\]', line)
-                if date_match:
-                    date_content = date_match.group(1).strip()
-                    clean_line = re.sub(r'\s*\[DATE:[^\]]+\]', '', line).strip()
-                    
-                    # Check if it's a header element
-                    if clean_line.startswith('<h'):
-                        # For headers, add the date as a span inside the header
-                        header_match = re.match(r'(<h\d[^>]*>)(.*?)(</h\d>)', clean_line)
-                        if header_match:
-                            opening_tag = header_match.group(1)
-                            header_content = header_match.group(2)
-                            closing_tag = header_match.group(3)
-                            processed_lines.append(f'{opening_tag}{header_content}<span class="header-date">{date_content}</span>{closing_tag}')
-                        else:
-                            processed_lines.append(clean_line)
-                    else:
-                        # For non-headers, use the flex layout
-                        processed_lines.append(f'<div class="date-line"><span class="content">{clean_line}</span><span class="date">{date_content}</span></div>')
-                else:
-                    processed_lines.append(line)
-            else:
-                processed_lines.append(line)
-        
-        return '\n'.join(processed_lines)
+    def get_stylesheet(self, settings: Optional[Dict[str, Any]] = None) -> CSS:
+        """Return the parsed WeasyPrint stylesheet for settings, building it at most once"""
+        return self._stylesheet_for_key(self._style_key(settings or {}))
+    
+    def warm_up(self, settings_list: Iterable[Optional[Dict[str, Any]]] = ()) -> int:
+        """Pre-build stylesheets for every theme plus the given settings (e.g. templates)"""
+        combos = [{"theme": theme} for theme in THEMES] + [s or {} for s in settings_list]
+        for combo in combos:
+            try:
+                self.get_stylesheet(combo)
+            except Exception as e:
+                logger.warning(f"Stylesheet warm-up failed for {combo}: {e}")
+        return self._stylesheet_for_key.cache_info().currsize
+    
+    def _relayout(self, layout_key: str, final_html: str, css: CSS, style_key: str, blocks: List[Tuple[str, str]], settings: Dict[str, Any]):
+        """
+        Lay out only the pages an edit can affect, reusing the earlier pages
+        of the previous Document of this CV. Returns None when a full layout
+        is needed.
+        
+        Blocks are the top-level elements (headings, paragraphs, lists). A
+        page whose first block starts exactly at the top of its content area
+        owes nothing to what came before: its layout depends only on that
+        block and the ones after it. Whether the break fell there, though,
+        also depends on the block itself and on what it is kept with: a
+        heading avoids breaking after itself, and orphans and widows apply
+        to the block that follows. So layout restarts at the last such page
+        whose first block and keep-with-next chain (through any headings to
+        the first other block, and always the block after it) are unchanged
+        by the edit. The new HTML is laid
+        out with the earlier blocks hidden and the restart block's top margin
+        dropped (as the unforced break before it had truncated it), and the
+        resulting pages are appended to the reused ones.
+        """
+        with self._layouts_lock:
+            previous = self._layouts.get(layout_key)
+        if previous is None or previous.style_key != style_key:
+            return None
+        
+        first_changed = next(
+            (i for i, (old, new) in enumerate(zip(previous.blocks, blocks)) if old != new),
+            min(len(previous.blocks), len(blocks))
+        )
+        if first_changed == len(previous.blocks) == len(blocks):
+            self.layout_stats["unchanged"] += 1
+            return previous.document
+        
+        pages = previous.document.pages
+        page_top = self._page_top(settings)
+        restart = None
+        if page_top is not None:
+            for page_index in range(len(pages) - 1, 0, -1):
+                block = self._block_at_page_top(pages[page_index], pages[page_index - 1], page_top)
+                if block is not None and self._keep_chain_end(blocks, block) < first_changed:
+                    restart = (page_index, block)
+                    break
+        if restart is None:
+            return None
+        
+        page_index, block = restart
+        tail_css = CSS(string=f"""
+            body > *:nth-child(-n+{block}) {{ display: none !important; }}
+            body > *:nth-child({block + 1}) {{ margin-top: 0 !important; }}
+        """, font_config=self.font_config)
+        tail = HTML(string=final_html).render(stylesheets=[css, tail_css], font_config=self.font_config)
+        
+        # The restart block must land where it was, or the reuse is not sound
+        anchor = f"{BLOCK_ID_PREFIX}{block}"
+        old_position = pages[page_index].anchors.get(anchor)
+        new_position = tail.pages[0].anchors.get(anchor) if tail.pages else None
+        if new_position is None or abs(new_position[1] - old_position[1]) > PAGE_TOP_TOLERANCE_PX:
+            self.layout_stats["fallbacks"] += 1
+            return None
+        
+        self.layout_stats["incremental"] += 1
+        self.layout_stats["pages_reused"] += page_index
+        return previous.document.copy(pages[:page_index] + tail.pages)
+    
+    def _keep_chain_end(self, blocks: List[Tuple[str, str]], block: int) -> int:
+        """Last block whose content can decide whether a page break falls before block"""
+        end = block
+        while end < len(blocks) and blocks[end][0] in HEADER_TAGS:
+            end += 1
+        return max(end, block + 1)
+    
+    def _page_top(self, settings: Dict[str, Any]) -> Optional[float]:
+        """y of the top of the page content area in CSS px, as the @page margin sets it"""
+        margins = {**DEFAULT_STYLE_SETTINGS, **settings}.get("margins") or {}
+        try:
+            return float(margins.get("top", 20)) * PX_PER_MM
+        except (TypeError, ValueError, AttributeError):
+            return None
+    
+    def _block_at_page_top(self, page, previous_page, page_top: float) -> Optional[int]:
+        """Index of the block that starts a page at the very top, if one does"""
+        for name, position in page.anchors.items():
+            if not name.startswith(BLOCK_ID_PREFIX) or abs(position[1] - page_top) > PAGE_TOP_TOLERANCE_PX:
+                continue
+            # A block continued from the previous page also has its anchor here
+            if name not in previous_page.anchors:
+                return int(name[len(BLOCK_ID_PREFIX):])
+        return None
+    
+    def _style_key(self, settings: Dict[str, Any]) -> str:
+        """Canonical key of only the settings that affect CSS, defaults filled in"""
+        config = {**DEFAULT_STYLE_SETTINGS, **settings}
+        return canonicalize_settings({name: config.get(name) for name in DEFAULT_STYLE_SETTINGS})
+    
+    def _build_stylesheet(self, style_key: str) -> CSS:
+        return CSS(string=self._generate_css(json.loads(style_key)), font_config=self.font_config)
     
     def _wrap_html(self, html_body: str) -> str:
         """Wrap processed HTML in complete document"""
@@ -118,62 +284,13 @@ class PDFService:
     
     def _generate_css(self, settings: Dict[str, Any]) -> str:
         """Generate CSS styles based on user settings"""
-        # Default settings
-        defaults = {
-            "font": "Arial",
-            "fontSize": 11,
-            "margins": {"top": 20, "bottom": 20, "left": 15, "right": 15},
-            "theme": "professional",
-            "lineHeight": 1.4
-        }
-        
         # Merge with user settings
+        defaults = DEFAULT_STYLE_SETTINGS
         config = {**defaults, **settings}
         margins = config.get("margins", defaults["margins"])
         
-        # Font family mapping
-        font_families = {
-            "Arial": "Arial, sans-serif",
-            "Helvetica": "Helvetica, Arial, sans-serif",
-            "Times New Roman": "'Times New Roman', Times, serif",
-            "Georgia": "Georgia, serif",
-            "Verdana": "Verdana, sans-serif"
-        }
-        
-        # Theme-based colors
-        themes = {
-            "professional": {
-                "primary": "#2c3e50",
-                "secondary": "#34495e",
-                "accent": "#3498db",
-                "text": "#2c3e50",
-                "background": "#ffffff"
-            },
-            "modern": {
-                "primary": "#1a1a1a",
-                "secondary": "#4a4a4a",
-                "accent": "#007acc",
-                "text": "#333333",
-                "background": "#ffffff"
-            },
-            "minimal": {
-                "primary": "#000000",
-                "secondary": "#666666",
-                "accent": "#888888",
-                "text": "#333333",
-                "background": "#ffffff"
-            },
-            "creative": {
-                "primary": "#8e44ad",
-                "secondary": "#9b59b6",
-                "accent": "#e74c3c",
-                "text": "#2c3e50",
-                "background": "#ffffff"
-            }
-        }
-        
-        theme_colors = themes.get(config.get("theme", "professional"), themes["professional"])
-        font_family = font_families.get(config.get("font", "Arial"), font_families["Arial"])
+        theme_colors = THEMES.get(config.get("theme", "professional"), THEMES["professional"])
+        font_family = FONT_FAMILIES.get(config.get("font", "Arial"), FONT_FAMILIES["Arial"])
         
         css = f"""
         @page {{
@@ -0,0 +1,239 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from app.core import config
+from app.core.http_cache import make_etag
+
+logger = logging.getLogger(__name__)
+
+# Bump when the HTML/CSS pipeline changes so stale renders are never served
+RENDER_VERSION = "3"
+
+# Number of disk writes between scans that enforce the disk byte budget
+DISK_PRUNE_INTERVAL = 32
+
+def normalize_markdown(markdown_content: str) -> str:
+    """Normalize line endings and trailing blank lines, which never change the render"""
+    if not markdown_content:
+        return ""
+    # Trailing spaces inside lines are kept: two of them mean a hard line break
+    return markdown_content.replace("\r\n", "\n").replace("\r", "\n").rstrip()
+
+def canonicalize_settings(settings: Optional[Dict[str, Any]]) -> str:
+    """Serialize settings deterministically (sorted keys, no whitespace)"""
+    return json.dumps(settings or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+def render_cache_key(markdown_content: str, settings: Optional[Dict[str, Any]] = None) -> str:
+    """Content-addressed key for a rendered PDF"""
+    digest = hashlib.sha256()
+    digest.update(RENDER_VERSION.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_markdown(markdown_content).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(canonicalize_settings(settings).encode("utf-8"))
+    return digest.hexdigest()
+
+def pdf_etag(content_hash: str, settings_hash: str) -> str:
+    """ETag of a CV's PDF from the (content_hash, settings_hash) Postgres computes"""
+    return make_etag("pdf", RENDER_VERSION, content_hash, settings_hash)
+
+class RenderCache:
+    """
+    Two-tier cache for rendered documents.
+
+    The memory tier is an LRU bounded by total bytes. The optional disk tier
+    lives in a shared directory so every uvicorn worker benefits from hits.
+    """
+
+    def __init__(self, max_bytes: int, cache_dir: Optional[str] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._disk_writes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError as e:
+                logger.error(f"Render cache disk tier disabled, cannot create {self.cache_dir}: {e}")
+                self.cache_dir = None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes for key, promoting disk hits into memory"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return data
+
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._store_memory(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store bytes under key in both tiers"""
+        with self._lock:
+            self._store_memory(key, data)
+        self._write_disk(key, data)
+
+    def disk_path(self, key: str) -> Optional[str]:
+        """
+        Path of the on-disk entry for key when only the disk tier holds it, so
+        it can be sent as a file instead of read in (memory hits are cheaper
+        to send as they are). Counted as a disk hit.
+        """
+        if not self.cache_dir:
+            return None
+        with self._lock:
+            if key in self._entries:
+                return None
+        path = self._path_for(key)
+        try:
+            # Touch so disk pruning is LRU rather than FIFO
+            os.utime(path, None)
+        except OSError:
+            return None
+        with self._lock:
+            self._stats["disk_hits"] += 1
+        return path
+
+    def put_record(self, name: str, record: Dict[str, Any]) -> None:
+        """Store a small JSON record on the disk tier only, so other workers can read it"""
+        self._write_disk(name, json.dumps(record, default=str).encode("utf-8"))
+
+    def get_record(self, name: str) -> Optional[Dict[str, Any]]:
+        """A record stored by put_record in any worker; None without a disk tier"""
+        data = self._read_disk(name)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def clear(self) -> None:
+        """Drop every in-memory entry (the disk tier is left untouched)"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "disk_enabled": self.cache_dir is not None,
+                "hit_rate": round((self._stats["hits"] + self._stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+            }
+
+    def _store_memory(self, key: str, data: bytes) -> None:
+        """Insert into the LRU and evict until under the byte budget (lock held)"""
+        if len(data) > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+
+        self._entries[key] = data
+        self._size += len(data)
+
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+            self._stats["evictions"] += 1
+
+    def _path_for(self, key: str) -> str:
+        # Fan out by prefix so a single directory never gets huge
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        path = self._path_for(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Touch so disk pruning is LRU rather than FIFO
+            os.utime(path, None)
+            return data
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Render cache disk read failed for {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        if not self.cache_dir:
+            return
+        path = self._path_for(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent workers never see partial files
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Render cache disk write failed for {key}: {e}")
+            return
+
+        # Walking the directory is not free, so only prune every few writes
+        self._disk_writes += 1
+        if self.disk_max_bytes and self._disk_writes % DISK_PRUNE_INTERVAL == 0:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Remove least recently used files until the disk tier fits its budget"""
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.disk_max_bytes:
+            return
+
+        for _, size, path in sorted(files):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            with self._lock:
+                self._stats["disk_evictions"] += 1
+            if total <= self.disk_max_bytes:
+                break
+
+render_cache = RenderCache(
+    max_bytes=config.settings.pdf_cache_max_bytes,
+    cache_dir=config.settings.pdf_cache_dir,
+    disk_max_bytes=config.settings.pdf_cache_disk_max_bytes
+)
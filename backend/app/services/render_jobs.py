@@ -0,0 +1,303 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+import uuid
+from app.core.config import settings as app_settings
+from app.services.render_cache import render_cache, render_cache_key
+from app.services.render_pool import render_pool, RenderTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first: someone waiting on a preview beats a bulk export
+PRIORITIES = {"interactive": 0, "export": 1}
+
+# How often a wait on another worker's job re-reads its record
+REMOTE_POLL_SECONDS = 0.5
+
+def _record_name(job_id: str) -> str:
+    return f"render-job-{job_id}"
+
+class RenderQueueFullError(Exception):
+    """Raised when a job is shed because too many of its priority are already waiting"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Render queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class RenderJob:
+    """One queued PDF render of a CV as it was when the job was submitted"""
+
+    def __init__(
+        self,
+        user_id: str,
+        cv_id: str,
+        cv_name: str,
+        priority: str,
+        markdown_content: str,
+        settings: Optional[Dict[str, Any]],
+        cache_key: str,
+        etag: str
+    ):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.cv_id = cv_id
+        self.cv_name = cv_name
+        self.priority = priority
+        self.markdown_content = markdown_content
+        self.settings = settings
+        self.cache_key = cache_key
+        self.etag = etag
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.finished = asyncio.Event()
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "RenderJob":
+        """A job as another worker recorded it (see to_record)"""
+        job = cls(record["user_id"], record["cv_id"], record["cv_name"], record["priority"], "", None, record["cache_key"], record["etag"])
+        job.id = record["id"]
+        job.status = record["status"]
+        job.error = record["error"]
+        job.created_at = datetime.fromisoformat(record["created_at"])
+        job.started_at = datetime.fromisoformat(record["started_at"]) if record["started_at"] else None
+        job.finished_at = datetime.fromisoformat(record["finished_at"]) if record["finished_at"] else None
+        if job.status in ("done", "failed"):
+            job.finished.set()
+        return job
+
+    def to_record(self) -> Dict[str, Any]:
+        """Everything but the input, for workers that did not receive the job"""
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "cv_id": self.cv_id,
+            "cv_name": self.cv_name,
+            "priority": self.priority,
+            "cache_key": self.cache_key,
+            "etag": self.etag,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def _finish(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = datetime.now(timezone.utc)
+        # The PDF lives in the render cache; the input is no longer needed
+        self.markdown_content, self.settings = "", None
+        self.finished.set()
+
+class RenderJobQueue:
+    """
+    In-process priority queue of PDF render jobs.
+
+    Clients submit a job and poll it instead of holding a request open for
+    the whole render. A fixed number of consumers feed the render pool, so
+    interactive jobs overtake queued exports. Submitting a render a user
+    already has queued returns the existing job (upgrading its priority if
+    needed), and one whose PDF is in the render cache is done at once. Each
+    priority has a cap on waiting jobs; beyond it submissions are shed with
+    a Retry-After estimate. Finished jobs are forgotten after ttl_seconds.
+
+    The queue lives in one process, but each job's state is also written to
+    the render cache's disk tier, so with PDF_CACHE_DIR shared by all
+    workers a job can be polled (and its result fetched) from any of them.
+    Without a disk tier, polls must reach the worker that took the job.
+    """
+
+    def __init__(self, concurrency: int, max_queued: Dict[str, int], ttl_seconds: float):
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.ttl_seconds = ttl_seconds
+        self._jobs: "OrderedDict[str, RenderJob]" = OrderedDict()
+        self._active: Dict[Tuple[str, str], RenderJob] = {}
+        self._heap: List[Tuple[int, int, RenderJob]] = []
+        self._sequence = itertools.count()
+        self._available = asyncio.Semaphore(0)
+        self._tasks: List[asyncio.Task] = []
+        self._average_seconds = 1.0
+        self._stats = {"submitted": 0, "deduplicated": 0, "cache_hits": 0, "shed": 0, "completed": 0, "failed": 0}
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._consume()) for _ in range(self.concurrency)]
+
+    async def shutdown(self) -> None:
+        """Stop the consumers; jobs still queued are failed"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in list(self._active.values()):
+            job._finish("failed", "Server is shutting down")
+            self._save(job)
+        self._active.clear()
+        self._heap.clear()
+
+    def submit(
+        self,
+        user_id: str,
+        cv_id: str,
+        cv_name: str,
+        priority: str,
+        markdown_content: str,
+        settings: Optional[Dict[str, Any]],
+        etag: str
+    ) -> RenderJob:
+        """Queue a render, or return the job that already covers it"""
+        self._prune()
+        cache_key = render_cache_key(markdown_content, settings)
+        existing = self._active.get((user_id, cache_key))
+        if existing is not None:
+            self._stats["deduplicated"] += 1
+            if existing.status == "queued" and PRIORITIES[priority] < PRIORITIES[existing.priority]:
+                # The old heap entry is skipped when popped, as the job is no longer queued there
+                existing.priority = priority
+                self._push(existing)
+            return existing
+
+        job = RenderJob(user_id, cv_id, cv_name, priority, markdown_content, settings, cache_key, etag)
+        if render_cache.get(cache_key) is not None:
+            self._stats["cache_hits"] += 1
+            job._finish("done")
+        else:
+            waiting = sum(1 for active in self._active.values() if active.status == "queued" and active.priority == priority)
+            if waiting >= self.max_queued[priority]:
+                self._stats["shed"] += 1
+                raise RenderQueueFullError(self._retry_after())
+            self._active[(user_id, cache_key)] = job
+            self._push(job)
+        self._jobs[job.id] = job
+        self._save(job)
+        self._stats["submitted"] += 1
+        return job
+
+    def get(self, job_id: str, user_id: str) -> Optional[RenderJob]:
+        """A job by id, only for the user who submitted it, from this worker or a shared record"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = self._load_record(job_id)
+        return job if job is not None and job.user_id == user_id else None
+
+    async def wait(self, job: RenderJob, timeout: float) -> RenderJob:
+        """The job once finished, or as it is after timeout seconds"""
+        if self._jobs.get(job.id) is job:
+            try:
+                await asyncio.wait_for(job.finished.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            return job
+        # Another worker runs it: follow its record
+        deadline = time.monotonic() + timeout
+        while not job.finished.is_set() and time.monotonic() < deadline:
+            await asyncio.sleep(REMOTE_POLL_SECONDS)
+            job = self._load_record(job.id) or job
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        queued = {priority: 0 for priority in PRIORITIES}
+        running = 0
+        for job in self._active.values():
+            if job.status == "queued":
+                queued[job.priority] += 1
+            else:
+                running += 1
+        return {
+            **self._stats,
+            "queued": queued,
+            "running": running,
+            "retained_jobs": len(self._jobs),
+            "concurrency": self.concurrency,
+            "max_queued": self.max_queued,
+            "average_job_seconds": round(self._average_seconds, 3)
+        }
+
+    def _push(self, job: RenderJob) -> None:
+        heapq.heappush(self._heap, (PRIORITIES[job.priority], next(self._sequence), job))
+        self._available.release()
+
+    def _retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        waiting = sum(1 for job in self._active.values() if job.status == "queued")
+        return max(1, min(60, math.ceil(waiting * self._average_seconds / max(self.concurrency, 1))))
+
+    def _save(self, job: RenderJob) -> None:
+        render_cache.put_record(_record_name(job.id), job.to_record())
+
+    def _load_record(self, job_id: str) -> Optional[RenderJob]:
+        try:
+            # The id ends up in a file name
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+        record = render_cache.get_record(_record_name(job_id))
+        if record is None:
+            return None
+        job = RenderJob.from_record(record)
+        if job.finished_at is not None and job.finished_at.timestamp() < time.time() - self.ttl_seconds:
+            return None
+        return job
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if job.finished_at is None or job.finished_at.timestamp() > cutoff:
+                break
+            self._jobs.popitem(last=False)
+
+    async def _consume(self) -> None:
+        while True:
+            await self._available.acquire()
+            priority, _, job = heapq.heappop(self._heap)
+            if job.status != "queued" or priority != PRIORITIES[job.priority]:
+                # Entry left behind by a priority upgrade
+                continue
+            await self._run(job)
+
+    async def _run(self, job: RenderJob) -> None:
+        job.status = "running"
+        job.started_at = datetime.now(timezone.utc)
+        self._save(job)
+        start = time.perf_counter()
+        try:
+            await render_pool.render(job.markdown_content, job.settings, layout_key=job.cv_id)
+        except RenderTimeoutError as e:
+            logger.error(f"Render job {job.id} for CV {job.cv_id} failed: {e}")
+            self._stats["failed"] += 1
+            job._finish("failed", "PDF generation took too long. Please try again.")
+        except Exception as e:
+            logger.error(f"Render job {job.id} for CV {job.cv_id} failed: {e}")
+            self._stats["failed"] += 1
+            job._finish("failed", "Failed to generate PDF. Please check your CV content and try again.")
+        else:
+            self._stats["completed"] += 1
+            job._finish("done")
+        finally:
+            self._save(job)
+            self._active.pop((job.user_id, job.cache_key), None)
+            # Moving average, used for Retry-After estimates
+            self._average_seconds = 0.8 * self._average_seconds + 0.2 * (time.perf_counter() - start)
+
+render_jobs = RenderJobQueue(
+    concurrency=max(app_settings.render_pool_size, 1),
+    max_queued={
+        "interactive": app_settings.render_queue_max_interactive,
+        "export": app_settings.render_queue_max_export
+    },
+    ttl_seconds=app_settings.render_job_ttl_seconds
+)
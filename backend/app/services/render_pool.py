@@ -0,0 +1,238 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional, List, Tuple, Callable, TypeVar
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+from app.core.config import settings as app_settings
+from app.services.render_cache import render_cache, render_cache_key
+from app.services.singleflight import render_flights
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class RenderTimeoutError(Exception):
+    """A render job exceeded its time budget and its worker was killed"""
+
+# --- Functions below run inside the worker processes ---
+
+def _current_rss_bytes() -> int:
+    """Resident set size of the current process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is the peak in KiB on Linux, which is close enough as a ceiling
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def _init_worker(warm_settings: List[Dict[str, Any]]) -> None:
+    """Import WeasyPrint and pre-build stylesheets once per worker process"""
+    # Workers must not react to the Ctrl+C sent to the server's process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from app.services.pdf_service import pdf_service
+    pdf_service.warm_up(warm_settings)
+
+def _warm_up_job() -> int:
+    """Render a tiny document so fonts and layout code are loaded before real traffic"""
+    from app.services.pdf_service import pdf_service
+    pdf_service.render_pdf("# Warm-up\n\nResumeForge", {})
+    return os.getpid()
+
+def _render_job(markdown_content: str, settings: Optional[Dict[str, Any]], layout_key: Optional[str]) -> Tuple[bytes, int]:
+    """Render one PDF and report the worker's memory footprint afterwards"""
+    from app.services.pdf_service import pdf_service
+    pdf_bytes = pdf_service.render_pdf(markdown_content, settings, layout_key)
+    return pdf_bytes, _current_rss_bytes()
+
+def _call_job(fn: Callable[..., T], *args) -> Tuple[T, int]:
+    """Run any module-level function, reporting memory like a render does"""
+    return fn(*args), _current_rss_bytes()
+
+# --- Parent-side pool management ---
+
+class _WorkerSlot:
+    """A single-process executor so each worker can be recycled on its own"""
+
+    def __init__(self, index: int, mp_context, warm_settings: List[Dict[str, Any]]):
+        self.index = index
+        self.executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(warm_settings,)
+        )
+        self.pid: Optional[int] = None
+        self.jobs_done = 0
+        self.in_flight = 0
+        self.last_rss = 0
+
+class RenderPool:
+    """
+    Pool of pre-warmed WeasyPrint worker processes.
+
+    Jobs are dispatched to the least busy worker; renders of the same CV
+    prefer one worker, which keeps that CV's last layout. A worker is
+    recycled after max_jobs renders, when its RSS crosses max_rss_bytes, or
+    when a job overruns its timeout (the process is killed, not just
+    abandoned).
+    """
+
+    def __init__(self, size: int, job_timeout: float, max_jobs: int, max_rss_bytes: int):
+        self.size = size
+        self.job_timeout = job_timeout
+        self.max_jobs = max_jobs
+        self.max_rss_bytes = max_rss_bytes
+        self._slots: List[_WorkerSlot] = []
+        self._mp_context = multiprocessing.get_context("spawn")
+        self._warm_settings: List[Dict[str, Any]] = []
+        self._started = False
+        self._stats = {"jobs": 0, "failures": 0, "timeouts": 0, "recycled": 0}
+
+    async def start(self, warm_settings: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Spawn and warm up every worker, pre-building stylesheets for warm_settings"""
+        self._warm_settings = list(warm_settings or [])
+        if self._started:
+            return
+        if self.size <= 0:
+            # Renders will happen in this process, so warm its stylesheet cache instead
+            await run_in_threadpool(self._warm_up_inline)
+            return
+        self._slots = [_WorkerSlot(i, self._mp_context, self._warm_settings) for i in range(self.size)]
+        self._started = True
+        await asyncio.gather(*(self._warm_up(slot) for slot in self._slots))
+        logger.info(f"Render pool started with {self.size} workers")
+
+    async def shutdown(self) -> None:
+        """Stop all workers, waiting for in-flight jobs"""
+        slots, self._slots = self._slots, []
+        self._started = False
+        for slot in slots:
+            await run_in_threadpool(slot.executor.shutdown, wait=True, cancel_futures=True)
+
+    async def render(self, markdown_content: str, settings: Optional[Dict[str, Any]] = None, layout_key: Optional[str] = None) -> bytes:
+        """
+        Return the PDF for markdown/settings, from the render cache or a worker.
+        layout_key (the CV id) lets the worker re-lay out only what an edit changed.
+        """
+        cache_key = render_cache_key(markdown_content, settings)
+        cached = render_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        # Identical renders already running (another tab, preview plus download) are shared
+        return await render_flights.do(cache_key, lambda: self._render_uncached(cache_key, markdown_content, settings, layout_key))
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """
+        Run a module-level function on a worker, with the timeout and recycling
+        rules of a render (in a thread when the pool is off). fn and args must
+        be picklable.
+        """
+        if not self._started:
+            return await run_in_threadpool(fn, *args)
+        return await self._submit(_call_job, fn, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool counters and per-worker state"""
+        return {
+            **self._stats,
+            "size": self.size,
+            "started": self._started,
+            "workers": [
+                {"pid": slot.pid, "jobs_done": slot.jobs_done, "in_flight": slot.in_flight, "rss_bytes": slot.last_rss}
+                for slot in self._slots
+            ]
+        }
+
+    def _warm_up_inline(self) -> None:
+        from app.services.pdf_service import pdf_service
+        pdf_service.warm_up(self._warm_settings)
+
+    def _render_inline(self, markdown_content: str, settings: Optional[Dict[str, Any]], layout_key: Optional[str]) -> bytes:
+        from app.services.pdf_service import pdf_service
+        return pdf_service.render_pdf(markdown_content, settings, layout_key)
+
+    async def _render_uncached(self, cache_key: str, markdown_content: str, settings: Optional[Dict[str, Any]], layout_key: Optional[str]) -> bytes:
+        if not self._started:
+            # Pool disabled (size 0) or not started: render in a thread instead
+            pdf_bytes = await run_in_threadpool(self._render_inline, markdown_content, settings, layout_key)
+        else:
+            pdf_bytes = await self._submit(_render_job, markdown_content, settings, layout_key, affinity=layout_key)
+
+        render_cache.put(cache_key, pdf_bytes)
+        return pdf_bytes
+
+    async def _warm_up(self, slot: _WorkerSlot) -> None:
+        try:
+            slot.pid = await asyncio.wrap_future(slot.executor.submit(_warm_up_job))
+        except Exception as e:
+            logger.error(f"Render worker {slot.index} failed to warm up: {e}")
+
+    def _pick_slot(self, affinity: Optional[str] = None) -> _WorkerSlot:
+        least_busy = min(self._slots, key=lambda slot: slot.in_flight)
+        if affinity is None:
+            return least_busy
+        # Stick to the affine worker unless that would queue behind more than one extra job
+        preferred = self._slots[int(hashlib.md5(affinity.encode("utf-8")).hexdigest(), 16) % len(self._slots)]
+        return preferred if preferred.in_flight <= least_busy.in_flight + 1 else least_busy
+
+    async def _submit(self, job: Callable[..., Tuple[T, int]], *args, affinity: Optional[str] = None) -> T:
+        slot = self._pick_slot(affinity)
+        slot.in_flight += 1
+        self._stats["jobs"] += 1
+        try:
+            future = slot.executor.submit(job, *args)
+            result, rss = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.job_timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            logger.error(f"Render job timed out after {self.job_timeout}s on worker {slot.index}")
+            self._recycle(slot, kill=True)
+            raise RenderTimeoutError(f"PDF rendering exceeded {self.job_timeout} seconds")
+        except BrokenProcessPool:
+            self._stats["failures"] += 1
+            logger.error(f"Render worker {slot.index} died, replacing it")
+            self._recycle(slot, kill=True)
+            raise
+        except Exception:
+            self._stats["failures"] += 1
+            raise
+        finally:
+            slot.in_flight -= 1
+
+        slot.jobs_done += 1
+        slot.last_rss = rss
+        if slot.jobs_done >= self.max_jobs or (self.max_rss_bytes and rss > self.max_rss_bytes):
+            logger.info(f"Recycling render worker {slot.index} after {slot.jobs_done} jobs (rss={rss} bytes)")
+            self._recycle(slot, kill=False)
+        return result
+
+    def _recycle(self, slot: _WorkerSlot, kill: bool) -> None:
+        """Swap a slot's executor for a fresh one; the old one drains or is killed"""
+        if slot not in self._slots:
+            return
+        self._stats["recycled"] += 1
+        old_executor, old_pid = slot.executor, slot.pid
+
+        replacement = _WorkerSlot(slot.index, self._mp_context, self._warm_settings)
+        self._slots[self._slots.index(slot)] = replacement
+        asyncio.get_running_loop().create_task(self._warm_up(replacement))
+
+        if kill and old_pid:
+            try:
+                os.kill(old_pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        # Lets any jobs already queued on the old worker finish in the background
+        old_executor.shutdown(wait=False, cancel_futures=kill)
+
+render_pool = RenderPool(
+    size=app_settings.render_pool_size,
+    job_timeout=app_settings.render_job_timeout_seconds,
+    max_jobs=app_settings.render_worker_max_jobs,
+    max_rss_bytes=app_settings.render_worker_max_rss_mb * 1024 * 1024
+)
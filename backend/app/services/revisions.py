@@ -0,0 +1,73 @@
+from difflib import SequenceMatcher
+from typing import List, NamedTuple, Sequence
+import json
+import zlib
+
+# zlib level for deltas and snapshots; 6 is within a few % of 9 at a fraction of the CPU
+COMPRESSION_LEVEL = 6
+
+class RevisionData(NamedTuple):
+    """What reconstruction needs from a cv_revisions row"""
+    version: int
+    is_snapshot: bool
+    data: bytes
+
+def _lines(text: str) -> List[str]:
+    return (text or "").splitlines(keepends=True)
+
+def encode_snapshot(text: str) -> bytes:
+    return zlib.compress((text or "").encode("utf-8"), COMPRESSION_LEVEL)
+
+def encode_reverse_delta(newer: str, older: str) -> bytes:
+    """
+    Line delta that rebuilds older from newer.
+
+    Ops: a positive int copies that many lines of newer, a negative int skips
+    that many, a string is inserted as-is. Stored as zlib-compressed JSON.
+    """
+    newer_lines, older_lines = _lines(newer), _lines(older)
+    ops = []
+    matcher = SequenceMatcher(None, newer_lines, older_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append("".join(older_lines[j1:j2]))
+    payload = json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(payload.encode("utf-8"), COMPRESSION_LEVEL)
+
+def apply_reverse_delta(newer: str, delta: bytes) -> str:
+    lines = _lines(newer)
+    position = 0
+    parts = []
+    for op in json.loads(zlib.decompress(delta)):
+        if isinstance(op, str):
+            parts.append(op)
+        elif op > 0:
+            parts.extend(lines[position:position + op])
+            position += op
+        else:
+            position -= op
+    return "".join(parts)
+
+def reconstruct(head: str, rows: Sequence[RevisionData]) -> str:
+    """
+    Text of rows[0].version.
+
+    rows are the revision and the ones above it in ascending version order,
+    up to and including the first snapshot, or every row up to the head when
+    no snapshot lies above. Deltas are applied from there back down.
+    """
+    text = head
+    chain = rows
+    for i, row in enumerate(rows):
+        if row.is_snapshot:
+            text = zlib.decompress(row.data).decode("utf-8")
+            chain = rows[:i]
+            break
+    for row in reversed(chain):
+        text = apply_reverse_delta(text, row.data)
+    return text
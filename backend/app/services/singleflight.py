@@ -0,0 +1,47 @@
+from typing import Awaitable, Callable, Dict, Any, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical async calls.
+
+    The first caller for a key starts the work as a task; callers arriving
+    with the same key while it runs await that task instead of starting
+    their own, and all of them get its result or exception. The task is
+    shielded, so a caller that disconnects does not cancel it for the rest.
+    Nothing is kept once it finishes: caching is the caller's business.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return fn()'s result, sharing a run already in flight for key"""
+        self._stats["calls"] += 1
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self._stats["executed"] += 1
+        else:
+            self._stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Marks the exception retrieved even if every caller went away
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "in_flight": len(self._calls)}
+
+# Keyed by render cache key: the same markdown/settings renders once at a time
+render_flights = SingleFlight()
+# Keyed by LLM request fingerprint (scoped per user)
+llm_flights = SingleFlight()
@@ -0,0 +1,117 @@
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from datetime import datetime
+from pydantic import TypeAdapter
+import asyncio
+import logging
+import time
+from app.core import config
+from app.core.http_cache import make_etag
+from app.database import AsyncSessionLocal
+from app.crud.template import get_all_templates, get_template_catalog_stamp
+from app.schemas.template import TemplateResponse
+
+logger = logging.getLogger(__name__)
+
+_template_list = TypeAdapter(List[TemplateResponse])
+
+class CatalogEntry(NamedTuple):
+    """A template and its pre-serialized JSON body"""
+    template: TemplateResponse
+    body: bytes
+    etag: str
+
+class _Snapshot(NamedTuple):
+    stamp: Tuple[Optional[datetime], int]
+    entries: Dict[str, CatalogEntry]
+    list_body: bytes
+    list_etag: str
+
+def _build_snapshot(templates: List[TemplateResponse], stamp: Tuple[Optional[datetime], int]) -> _Snapshot:
+    entries = {}
+    for template in templates:
+        body = template.model_dump_json().encode("utf-8")
+        entries[str(template.id)] = CatalogEntry(template, body, make_etag("template", body.decode("utf-8")))
+    list_body = _template_list.dump_json(templates)
+    return _Snapshot(stamp, entries, list_body, make_etag("templates", list_body.decode("utf-8")))
+
+class TemplateCatalog:
+    """
+    Every template, held in memory by each worker.
+
+    Templates only change when the seed script runs, so requests are served
+    from pre-serialized JSON instead of the database. At most once per check
+    interval a request compares (max(updated_at), count(*)) of the templates
+    table with the stamp of the loaded catalog and reloads it when they
+    differ. If the check fails the current catalog keeps being served.
+    """
+
+    def __init__(self, check_interval_seconds: float):
+        self.check_interval_seconds = check_interval_seconds
+        self._snapshot = _build_snapshot([], (None, -1))
+        self._loaded = False
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self._stats = {"loads": 0, "checks": 0, "check_failures": 0}
+
+    async def load(self) -> None:
+        """Read every template from the database and swap the catalog in"""
+        async with AsyncSessionLocal() as db:
+            stamp = await get_template_catalog_stamp(db)
+            templates = [TemplateResponse.model_validate(t) for t in await get_all_templates(db)]
+        self._snapshot = _build_snapshot(templates, stamp)
+        self._loaded = True
+        self._checked_at = time.monotonic()
+        self._stats["loads"] += 1
+        logger.info(f"Template catalog loaded: {len(templates)} templates")
+
+    async def refresh(self) -> None:
+        """Reload the catalog if the templates table changed since the last check interval"""
+        if self._loaded and time.monotonic() - self._checked_at < self.check_interval_seconds:
+            return
+        async with self._lock:
+            if self._loaded and time.monotonic() - self._checked_at < self.check_interval_seconds:
+                return
+            try:
+                if not self._loaded:
+                    await self.load()
+                    return
+                self._stats["checks"] += 1
+                async with AsyncSessionLocal() as db:
+                    stamp = await get_template_catalog_stamp(db)
+                self._checked_at = time.monotonic()
+                if stamp != self._snapshot.stamp:
+                    await self.load()
+            except Exception as e:
+                self._stats["check_failures"] += 1
+                if not self._loaded:
+                    raise
+                # Keep serving what we have and try again next interval
+                self._checked_at = time.monotonic()
+                logger.warning(f"Template catalog check failed: {e}")
+
+    def list_body(self) -> Tuple[bytes, str]:
+        """JSON of every template and its ETag"""
+        snapshot = self._snapshot
+        return snapshot.list_body, snapshot.list_etag
+
+    def get(self, template_id: str) -> Optional[CatalogEntry]:
+        return self._snapshot.entries.get(template_id)
+
+    def settings(self) -> List[Dict[str, Any]]:
+        """Style settings of every template, used to pre-build their stylesheets"""
+        return [entry.template.settings or {} for entry in self._snapshot.entries.values()]
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        latest = snapshot.stamp[0]
+        return {
+            **self._stats,
+            "loaded": self._loaded,
+            "templates": len(snapshot.entries),
+            "list_bytes": len(snapshot.list_body),
+            "latest_updated_at": latest.isoformat() if latest else None,
+            "seconds_since_check": round(time.monotonic() - self._checked_at, 1) if self._loaded else None,
+            "check_interval_seconds": self.check_interval_seconds
+        }
+
+template_catalog = TemplateCatalog(config.settings.template_catalog_check_seconds)
@@ -0,0 +1,38 @@
+from typing import Iterable, Protocol
+import hashlib
+
+class PatchError(ValueError):
+    """Raised when a set of edit ops does not apply to the base text"""
+
+class EditOp(Protocol):
+    offset: int
+    delete: int
+    insert: str
+
+def content_hash(content: str) -> str:
+    """sha256 hex of the UTF-8 text; what the editor computes with crypto.subtle"""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+def apply_ops(content: str, ops: Iterable[EditOp]) -> str:
+    """
+    Apply offset/delete/insert ops to content.
+
+    Offsets and delete lengths count UTF-16 code units, as JavaScript string
+    indices do, and refer to the base text. Ops must be sorted by offset and
+    must not overlap. Raises PatchError when they do not fit the text.
+    """
+    base = (content or "").encode("utf-16-le")
+    units = len(base) // 2
+    parts = []
+    position = 0
+    for op in ops:
+        if op.offset < position or op.delete < 0 or op.offset + op.delete > units:
+            raise PatchError(f"Op at offset {op.offset} does not fit a {units}-unit text")
+        parts.append(base[position * 2:op.offset * 2])
+        parts.append(op.insert.encode("utf-16-le"))
+        position = op.offset + op.delete
+    parts.append(base[position * 2:])
+    try:
+        return b"".join(parts).decode("utf-16-le")
+    except UnicodeDecodeError:
+        raise PatchError("Ops split a surrogate pair")
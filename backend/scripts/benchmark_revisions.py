@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Storage and rebuild-time benchmark for CV revision history: reverse deltas
+with periodic snapshots versus keeping a full copy per autosave.
+Run this from the backend/ directory: python scripts/benchmark_revisions.py
+"""
+
+import sys
+import os
+import random
+import statistics
+import time
+import zlib
+# Add the parent directory (backend) to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.revisions import RevisionData, encode_snapshot, encode_reverse_delta, reconstruct
+
+AUTOSAVES = 1000
+SNAPSHOT_INTERVALS = (8, 32, 128)
+
+HEADER = """# Jane Doe [CENTER]
+**Senior Software Engineer** [CENTER]
+
+📧 jane@example.com | 📱 +1 555 0100 | 🌐 linkedin.com/in/janedoe [CENTER]
+
+## Professional Summary
+Engineer with a decade of experience building reliable distributed systems and mentoring teams.
+
+## Experience
+"""
+
+JOB = """
+### Senior Engineer | Company {n} [DATE: 20{n:02d} - 20{m:02d}]
+- Led a team of {n} developers delivering a platform used by thousands of customers
+- Improved *p95 latency* by 40% through caching and **query optimisation**
+- Migrated legacy services to containers with zero downtime
+"""
+
+WORDS = "shipped reduced latency designed owned migrated mentored customers pipeline reliability".split()
+
+def autosave_history(count: int, seed: int = 7):
+    """Successive CV texts, each one typing pause (a few words, sometimes a new or removed bullet) apart"""
+    rng = random.Random(seed)
+    text = HEADER + "".join(JOB.format(n=i, m=i + 2) for i in range(12))
+    history = [text]
+    for _ in range(count):
+        lines = text.splitlines(keepends=True)
+        i = rng.randrange(len(lines))
+        roll = rng.random()
+        if roll < 0.8:
+            burst = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+            lines[i] = lines[i].rstrip("\n") + " " + burst + "\n"
+        elif roll < 0.95:
+            lines.insert(i, f"- {' '.join(rng.choice(WORDS) for _ in range(8))}\n")
+        elif len(lines) > 20:
+            del lines[i]
+        text = "".join(lines)
+        history.append(text)
+    return history
+
+def store_revisions(history, interval: int):
+    """Rows as update_cv/add_revision would write them, oldest first"""
+    rows = []
+    chain = 0
+    for version in range(len(history) - 1):
+        older, newer = history[version], history[version + 1]
+        chain += 1
+        if chain >= interval:
+            rows.append(RevisionData(version, True, encode_snapshot(older)))
+            chain = 0
+        else:
+            rows.append(RevisionData(version, False, encode_reverse_delta(newer, older)))
+    return rows
+
+def rebuild(rows, head: str, version: int, interval: int) -> str:
+    """Same row window get_revision_content reads: the revision up to the first snapshot above it"""
+    window = []
+    for row in rows[version:version + interval]:
+        window.append(row)
+        if row.is_snapshot:
+            break
+    return reconstruct(head, window)
+
+def run_benchmark():
+    history = autosave_history(AUTOSAVES)
+    head = history[-1]
+    full_copies = sum(len(text.encode("utf-8")) for text in history[:-1])
+    compressed_copies = sum(len(zlib.compress(text.encode("utf-8"), 6)) for text in history[:-1])
+
+    print(f"{AUTOSAVES} autosaves of a {len(head.encode('utf-8')) / 1024:.1f} KB CV")
+    print(f"{'storage':<28} {'KB':>9} {'bytes/save':>11} {'vs full':>8} {'rebuild p50 (ms)':>17} {'p99 (ms)':>9}")
+    print(f"{'full copies':<28} {full_copies / 1024:>9.1f} {full_copies / AUTOSAVES:>11.0f} {1:>7.2f}x {'-':>17} {'-':>9}")
+    print(f"{'zlib full copies':<28} {compressed_copies / 1024:>9.1f} {compressed_copies / AUTOSAVES:>11.0f} "
+          f"{full_copies / compressed_copies:>7.2f}x {'-':>17} {'-':>9}")
+
+    rng = random.Random(11)
+    for interval in SNAPSHOT_INTERVALS:
+        rows = store_revisions(history, interval)
+        stored = sum(len(row.data) for row in rows)
+        times = []
+        for version in rng.sample(range(len(rows)), 200):
+            start = time.perf_counter()
+            text = rebuild(rows, head, version, interval)
+            times.append(time.perf_counter() - start)
+            assert text == history[version], f"version {version} rebuilt wrong"
+        times.sort()
+        label = f"deltas, snapshot every {interval}"
+        print(f"{label:<28} {stored / 1024:>9.1f} {stored / AUTOSAVES:>11.0f} {full_copies / stored:>7.2f}x "
+              f"{statistics.median(times) * 1000:>17.3f} {times[int(len(times) * 0.99)] * 1000:>9.3f}")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for the CV and template access paths.
+Run this from the backend/ directory against a migrated database: python scripts/check_query_plans.py
+
+Each hot query is EXPLAINed with sequential scans disabled. The planner then
+uses an index whenever one fits, so a Seq Scan left in the plan means the
+index the query relies on is missing. Exits with status 1 if any plan has one.
+"""
+
+import json
+import sys
+import os
+import uuid
+from datetime import datetime, timezone
+# Add the parent directory (backend) to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+from app.database import SessionLocal
+from app.crud import cv as cv_crud
+from app.models.cv import CV, Template
+
+def compile_query(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+def hot_queries():
+    """The statements each endpoint issues, built through the same crud helpers"""
+    user_id = str(uuid.uuid4())
+    cv_id = str(uuid.uuid4())
+    after = (datetime.now(timezone.utc), uuid.uuid4())
+
+    return {
+        "cv list (first page)": cv_crud.user_cv_page_query(user_id, 51),
+        "cv list (next page)": cv_crud.user_cv_page_query(user_id, 51, after=after),
+        "cv list (name prefix)": cv_crud.user_cv_page_query(user_id, 51, name_prefix="Senior"),
+        "cv count": cv_crud._user_cvs_query(user_id, None, func.count(CV.id)),
+        "cv lookup": select(CV).where(*cv_crud._owned_cv(cv_id, user_id)),
+        "default templates": select(Template).where(Template.is_default)
+    }
+
+def scan_nodes(plan):
+    """Yield every node of a JSON EXPLAIN plan"""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from scan_nodes(child)
+
+def check_query_plans() -> bool:
+    db = SessionLocal()
+    ok = True
+    try:
+        connection = db.connection()
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for name, query in hot_queries().items():
+            # exec_driver_sql: the literal timestamps contain colons that text() would take for binds
+            plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compile_query(query)}").scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes = list(scan_nodes(plan[0]["Plan"]))
+            seq_scans = [node.get("Relation Name") for node in nodes if node["Node Type"] == "Seq Scan"]
+            indexes = sorted({node["Index Name"] for node in nodes if "Index Name" in node})
+            if seq_scans:
+                ok = False
+                print(f"FAIL  {name}: sequential scan on {', '.join(seq_scans)}")
+            else:
+                print(f"ok    {name}: {', '.join(indexes) or 'no table access'}")
+    finally:
+        db.rollback()
+        db.close()
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if check_query_plans() else 1)
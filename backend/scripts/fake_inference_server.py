@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenAI-compatible inference endpoint, for development and load tests.
+Run this from the backend/ directory: python scripts/fake_inference_server.py --port 8001 --delay 2
+Then point the API at it with LLM_BASE_URL=http://127.0.0.1:8001/v1
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# Filled in from the command line
+DELAY_SECONDS = 0.0
+
+ATS_REPLY = {
+    "strengths": ["Clear section structure"],
+    "weaknesses": ["Few quantified achievements"],
+    "upgrade_suggestions": ["Add metrics to each role"]
+}
+
+app = FastAPI(title="Fake inference server")
+stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0, "streams_completed": 0, "streams_aborted": 0}
+
+def canned_reply(messages: List[Dict[str, Any]]) -> str:
+    """Pick a reply shaped like what the calling feature expects"""
+    system = messages[0]["content"] if messages else ""
+    user = messages[-1]["content"] if messages else ""
+    if "ATS" in system:
+        return json.dumps(ATS_REPLY)
+    if "EDIT MODE" in system:
+        # Echo the CV (or section) back so edits round-trip unchanged
+        return user.split("Content:\n", 1)[-1]
+    return "This is a canned reply from the fake inference server."
+
+def completion_body(model: str, content: str) -> Dict[str, Any]:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
+
+async def stream_chunks(model: str, content: str):
+    """Server-sent events in the OpenAI streaming format, one word per chunk"""
+    words = content.split(" ")
+    completed = False
+    try:
+        for i, word in enumerate(words):
+            delta = word if i == len(words) - 1 else word + " "
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(DELAY_SECONDS / max(len(words), 1))
+        yield "data: [DONE]\n\n"
+        completed = True
+    finally:
+        # Lets load tests check that client disconnects really cancel generation
+        stats["streams_completed" if completed else "streams_aborted"] += 1
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    content = canned_reply(body.get("messages", []))
+
+    stats["requests"] += 1
+    if body.get("stream"):
+        return StreamingResponse(stream_chunks(model, content), media_type="text/event-stream")
+
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(DELAY_SECONDS)
+    finally:
+        stats["in_flight"] -= 1
+    return completion_body(model, content)
+
+@app.get("/stats")
+def get_stats():
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds each completion takes")
+    args = parser.parse_args()
+    DELAY_SECONDS = args.delay
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -68,7 +68,7 @@ Experienced software engineer with [X] years of expertise in full-stack developm
                 "margins": {"top": 20, "bottom": 20, "left": 15, "right": 15},
                 "theme": "professional"
             },
-            is_default="true"
+            is_default=True
         )
 
         # Template 2: Marketing Manager
@@ -123,7 +123,7 @@ Results-driven marketing manager with [X]+ years of experience developing and ex
                 "margins": {"top": 25, "bottom": 25, "left": 20, "right": 20},
                 "theme": "modern"
             },
-            is_default="true"
+            is_default=True
         )
 
         # Template 3: Simple/Minimal
@@ -167,7 +167,7 @@ Feel free to reach out via email or phone for opportunities and collaborations."
                 "margins": {"top": 30, "bottom": 30, "left": 25, "right": 25},
                 "theme": "minimal"
             },
-            is_default="false"
+            is_default=False
         )
 
         # Add templates to database
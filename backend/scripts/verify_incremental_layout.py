@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Correctness check for incremental PDF layout: renders a CV, applies an edit,
+renders it again with the CV's previous layout kept, and compares every page
+pixel by pixel against a full render of the edited text. Also reports which
+path was taken and how long each render took.
+Needs WeasyPrint and pypdfium2.
+Run this from the backend/ directory: python scripts/verify_incremental_layout.py
+"""
+
+import sys
+import os
+import io
+import time
+from typing import List, Optional, Tuple
+# Add the parent directory (backend) to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageChops
+from app.services.pdf_service import PDFService
+from app.services.page_preview import rasterize_page
+import pypdfium2 as pdfium
+
+DPI = 96
+JOBS = 14
+
+HEADER = """# Jane Doe [CENTER]
+**Senior Software Engineer** [CENTER]
+
+📧 jane@example.com | 📱 +1 555 0100 | 🌐 linkedin.com/in/janedoe [CENTER]
+
+## Professional Summary
+Engineer with a decade of experience building reliable distributed systems and mentoring teams.
+
+## Experience
+"""
+
+JOB = """
+### Senior Engineer | Company {n} [DATE: 20{n:02d} - 20{m:02d}]
+- Led a team of {n} developers delivering a platform used by thousands of customers across three continents, owning its on-call rota
+- Improved *p95 latency* by 40% through caching and **query optimisation**
+- Migrated legacy services to containers with zero downtime
+- Introduced CI/CD pipelines reducing release time from days to hours
+"""
+
+SKILLS = """
+## Skills
+Python, Go, PostgreSQL, Kubernetes, Terraform, AWS, observability, incident response
+"""
+
+# Blocks before the first job; job n is then an h3 (block 6 + 2n) and its list (7 + 2n)
+HEADER_BLOCKS = 6
+
+def build_cv(jobs: int = JOBS) -> str:
+    return HEADER + "".join(JOB.format(n=i, m=i + 2) for i in range(jobs)) + SKILLS
+
+def replace_nth(text: str, old: str, new: str, n: int) -> str:
+    """Replace the n-th (0-based) occurrence of old"""
+    start = -1
+    for _ in range(n + 1):
+        start = text.index(old, start + 1)
+    return text[:start] + new + text[start + len(old):]
+
+def job_of_block(block: int) -> Tuple[int, str]:
+    """(job number, "heading" or "list") of a block inside the experience section"""
+    n, kind = divmod(block - HEADER_BLOCKS, 2)
+    return n, "list" if kind else "heading"
+
+def shorten_first_bullet(cv: str, n: int) -> str:
+    """Make job n's first bullet fit on one line (it wraps to two)"""
+    return replace_nth(cv, "thousands of customers across three continents, owning its on-call rota", "customers", n)
+
+def shrink_after_page_top_heading(cv: str, tops: List[int]) -> Optional[str]:
+    """A job heading starts a page; shrink the list kept with it"""
+    for block in tops:
+        n, kind = job_of_block(block)
+        if block >= HEADER_BLOCKS and kind == "heading" and n < JOBS:
+            return shorten_first_bullet(cv, n)
+    return None
+
+def shrink_page_top_block(cv: str, tops: List[int]) -> Optional[str]:
+    """Shrink the block that starts a page"""
+    for block in tops:
+        n, kind = job_of_block(block)
+        if block >= HEADER_BLOCKS and n < JOBS:
+            if kind == "list":
+                return shorten_first_bullet(cv, n)
+            return cv.replace(f"| Company {n} [DATE", f"| Co. {n} [DATE", 1)
+    return None
+
+# Each edit gets the base CV and the blocks starting its pages, and returns
+# the edited CV (None when the base layout has no page to try it on)
+EDITS = [
+    ("reword a bullet on the last page", lambda cv, tops: replace_nth(cv, "zero downtime", "no downtime at all", 13)),
+    ("reword a bullet mid-document", lambda cv, tops: replace_nth(cv, "zero downtime", "no downtime at all", 8)),
+    ("add a bullet on the last page", lambda cv, tops: replace_nth(cv, "- Migrated", "- Mentored four engineers into senior roles\n- Migrated", 12)),
+    ("remove a job on page 2", lambda cv, tops: cv.replace(JOB.format(n=7, m=9), "")),
+    ("edit the skills section", lambda cv, tops: cv.replace("incident response", "incident response, capacity planning")),
+    ("edit the summary (page 1)", lambda cv, tops: cv.replace("mentoring teams", "mentoring several teams")),
+    ("page-top heading, shrink next block", shrink_after_page_top_heading),
+    ("shrink the first block on a page", shrink_page_top_block),
+    ("no change", lambda cv, tops: cv),
+]
+
+def page_top_blocks(service: PDFService) -> List[int]:
+    """Blocks that start a page (at the top of its content area) in the last layout"""
+    pages = service._layouts["cv"].document.pages
+    page_top = service._page_top({})
+    tops = (service._block_at_page_top(pages[i], pages[i - 1], page_top) for i in range(1, len(pages)))
+    return [block for block in tops if block is not None]
+
+def page_images(pdf_bytes: bytes):
+    pages = len(pdfium.PdfDocument(pdf_bytes))
+    return [Image.open(io.BytesIO(rasterize_page(pdf_bytes, index, DPI))).convert("RGB") for index in range(pages)]
+
+def compare(incremental: bytes, full: bytes) -> str:
+    """"identical", or what differs between the two PDFs' pixels"""
+    left, right = page_images(incremental), page_images(full)
+    if len(left) != len(right):
+        return f"page count {len(left)} vs {len(right)}"
+    for index, (a, b) in enumerate(zip(left, right)):
+        box = ImageChops.difference(a, b).getbbox()
+        if box is not None:
+            return f"page {index + 1} differs in {box}"
+    return "identical"
+
+def run_check() -> bool:
+    base = build_cv()
+    all_identical = True
+    print(f"{'edit':<36} {'path':<12} {'reused':>6} {'pages':>5} {'layout (ms)':>12} {'full (ms)':>10}  pixels")
+    for name, edit in EDITS:
+        service = PDFService()
+        service.render_pdf(base, {}, layout_key="cv")
+        edited = edit(base, page_top_blocks(service))
+        if edited is None:
+            print(f"{name:<36} skipped: no page starts with such a block")
+            continue
+
+        before = dict(service.layout_stats)
+        start = time.perf_counter()
+        incremental = service.render_pdf(edited, {}, layout_key="cv")
+        incremental_ms = (time.perf_counter() - start) * 1000
+        delta = {key: service.layout_stats[key] - before[key] for key in before}
+        path = next((key for key in ("incremental", "unchanged", "full") if delta[key]), "?")
+
+        start = time.perf_counter()
+        full = PDFService().render_pdf(edited, {})
+        full_ms = (time.perf_counter() - start) * 1000
+
+        result = compare(incremental, full)
+        all_identical = all_identical and result == "identical"
+        print(f"{name:<36} {path:<12} {delta['pages_reused']:>6} {len(pdfium.PdfDocument(full)):>5} "
+              f"{incremental_ms:>12.1f} {full_ms:>10.1f}  {result}")
+    return all_identical
+
+if __name__ == "__main__":
+    sys.exit(0 if run_check() else 1)
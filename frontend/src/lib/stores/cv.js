@@ -1,8 +1,11 @@
-import { writable, derived } from 'svelte/store';
+import { writable, derived, get } from 'svelte/store';
 import { authenticatedFetch } from './auth.js';
 
 // CV stores
 export const cvs = writable([]);
+// Keyset pagination state of the CV list (cursor is null once every page is loaded)
+export const cvsNextCursor = writable(null);
+export const cvsTotal = writable(0);
 export const currentCV = writable({
     id: null,
     name: null,
@@ -41,20 +44,156 @@ export const hasUnsavedChanges = derived(
     }
 );
 
+// Save changed fields with If-Match on the version we last saw; the server answers
+// 412 when another tab saved first, and replies with the new version, not the content
+async function saveCVFields(cvId, fields) {
+    const current = get(currentCV);
+    const headers = current?.id === cvId && current.version
+        ? { 'If-Match': `"v${current.version}"` }
+        : {};
+    
+    const response = await authenticatedFetch(`/api/cvs/${cvId}`, {
+        method: 'PUT',
+        headers,
+        body: JSON.stringify(fields)
+    });
+    
+    if (response.status === 412) {
+        return { success: false, conflict: true, error: 'This CV was changed in another tab. Reload it before saving.' };
+    }
+    if (!response.ok) {
+        return { success: false, error: 'Failed to update CV' };
+    }
+    
+    const data = await response.json();
+    const sent = Object.fromEntries(Object.entries(fields).filter(([, value]) => value != null));
+    const saved = { ...sent, ...data };
+    currentCV.update(cv => cv?.id === cvId ? { ...cv, ...saved } : cv);
+    cvs.update(list => list.map(cv => cv.id === cvId ? { ...cv, ...data } : cv));
+    return { success: true, data: saved };
+}
+
+// sha256 hex of a string's UTF-8 bytes, the hash the server checks patches against
+async function sha256Hex(text) {
+    const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+    return Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+}
+
+// A single replace op covering everything between the common prefix and suffix
+// of base and next (offsets are UTF-16 code units, as the server expects)
+function diffOps(base, next) {
+    const max = Math.min(base.length, next.length);
+    let start = 0;
+    while (start < max && base[start] === next[start]) start++;
+    let end = 0;
+    while (end < max - start && base[base.length - 1 - end] === next[next.length - 1 - end]) end++;
+    
+    // Never cut an emoji (or any surrogate pair) in half
+    const isSurrogate = (code, low) => code >= (low ? 0xDC00 : 0xD800) && code <= (low ? 0xDFFF : 0xDBFF);
+    if (start > 0 && isSurrogate(base.charCodeAt(start - 1), false)) start--;
+    if (end > 0 && isSurrogate(base.charCodeAt(base.length - end), true)) end--;
+    
+    if (start === base.length - end && start === next.length - end) return [];
+    return [{ offset: start, delete: base.length - end - start, insert: next.slice(start, next.length - end) }];
+}
+
+// Send only the changed span of the markdown; null when the server can't apply it
+// (base out of date, hash mismatch) and the caller should fall back to a full PUT
+async function patchCVContent(cvId, base, content) {
+    const response = await authenticatedFetch(`/api/cvs/${cvId}/content`, {
+        method: 'PATCH',
+        body: JSON.stringify({
+            base_hash: await sha256Hex(base),
+            ops: diffOps(base, content),
+            result_hash: await sha256Hex(content)
+        })
+    });
+    if (!response.ok) {
+        return null;
+    }
+    
+    const data = await response.json();
+    currentCV.update(cv => cv?.id === cvId ? { ...cv, markdown_content: content, ...data } : cv);
+    cvs.update(list => list.map(cv => cv.id === cvId ? { ...cv, ...data } : cv));
+    return { success: true, data: { markdown_content: content, ...data } };
+}
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+// Plain synchronous render, for when a job can't be followed to its result
+async function renderPDFDirect(cvId) {
+    const response = await authenticatedFetch(`/api/cvs/${cvId}/pdf`);
+    if (!response.ok) {
+        throw new Error('Failed to generate PDF');
+    }
+    return response.blob();
+}
+
+// Render a PDF through the job queue: submit, long-poll the job, then fetch the result.
+// No request stays open longer than the server's 20s wait, and a full queue (503)
+// is retried after the Retry-After it asks for. A job another server worker can't
+// see (404) or whose result is gone (410) falls back to the synchronous endpoint
+async function renderPDFJob(cvId, priority) {
+    let response;
+    for (let attempt = 0; attempt < 5; attempt++) {
+        response = await authenticatedFetch(`/api/cvs/${cvId}/render-jobs`, {
+            method: 'POST',
+            body: JSON.stringify({ priority })
+        });
+        if (response.status !== 503) break;
+        await sleep(Number(response.headers.get('Retry-After') || 2) * 1000);
+    }
+    if (!response.ok) {
+        throw new Error('Failed to generate PDF');
+    }
+    
+    let job = await response.json();
+    while (job.status === 'queued' || job.status === 'running') {
+        const poll = await authenticatedFetch(`/api/cvs/render-jobs/${job.id}?wait=20`);
+        if (poll.status === 404) {
+            return renderPDFDirect(cvId);
+        }
+        if (!poll.ok) {
+            throw new Error('Failed to generate PDF');
+        }
+        job = await poll.json();
+    }
+    if (job.status !== 'done') {
+        throw new Error(job.error || 'Failed to generate PDF');
+    }
+    
+    const result = await authenticatedFetch(`/api/cvs/render-jobs/${job.id}/result`);
+    if (result.status === 404 || result.status === 410) {
+        return renderPDFDirect(cvId);
+    }
+    if (!result.ok) {
+        throw new Error('Failed to generate PDF');
+    }
+    return result.blob();
+}
+
+// Fetch one page of the CV list and record the pagination headers
+async function fetchCVPage(cursor) {
+    const url = cursor ? `/api/cvs/?cursor=${encodeURIComponent(cursor)}` : '/api/cvs/';
+    const response = await authenticatedFetch(url);
+    if (!response.ok) {
+        throw new Error('Failed to load CVs');
+    }
+    
+    cvsNextCursor.set(response.headers.get('X-Next-Cursor'));
+    cvsTotal.set(Number(response.headers.get('X-Total-Count') || 0));
+    return response.json();
+}
+
 // CV service functions
 export const cvService = {
-    // Load user's CVs
+    // Load the first page of the user's CVs
     async loadCVs() {
         isLoading.set(true);
         error.set(null);
         
         try {
-            const response = await authenticatedFetch('/api/cvs/');
-            if (!response.ok) {
-                throw new Error('Failed to load CVs');
-            }
-            
-            const data = await response.json();
+            const data = await fetchCVPage(null);
             cvs.set(data);
             return { success: true, data };
         } catch (err) {
@@ -65,6 +204,21 @@ export const cvService = {
         }
     },
 
+    // Append the next page of CVs to the list
+    async loadMoreCVs() {
+        const cursor = get(cvsNextCursor);
+        if (!cursor) return { success: true, data: [] };
+        
+        try {
+            const data = await fetchCVPage(cursor);
+            cvs.update(list => [...list, ...data]);
+            return { success: true, data };
+        } catch (err) {
+            error.set(err.message);
+            return { success: false, error: err.message };
+        }
+    },
+
     // Load a specific CV
     async loadCV(cvId) {
         isLoading.set(true);
@@ -171,26 +325,16 @@ export const cvService = {
         error.set(null);
         
         try {
-            const response = await authenticatedFetch(`/api/cvs/${cvId}`, {
-                method: 'PUT',
-                body: JSON.stringify({
-                    name,
-                    markdown_content: content,
-                    settings
-                })
+            const result = await saveCVFields(cvId, {
+                name,
+                markdown_content: content,
+                settings
             });
-            
-            if (!response.ok) {
-                throw new Error('Failed to update CV');
+            if (!result.success) {
+                throw new Error(result.error);
             }
             
-            const data = await response.json();
-            
-            // Update stores
-            currentCV.set(data);
-            cvs.update(list => list.map(cv => cv.id === cvId ? data : cv));
-            
-            return { success: true, data };
+            return result;
         } catch (err) {
             error.set(err.message);
             return { success: false, error: err.message };
@@ -260,15 +404,15 @@ export const cvService = {
         }
     },
 
+    // Render a PDF as a Blob ('interactive' for previews and single downloads, 'export' for bulk work)
+    renderPDF(cvId, priority = 'interactive') {
+        return renderPDFJob(cvId, priority);
+    },
+
     // Download PDF
     async downloadPDF(cvId, filename) {
         try {
-            const response = await authenticatedFetch(`/api/cvs/${cvId}/pdf`);
-            if (!response.ok) {
-                throw new Error('Failed to generate PDF');
-            }
-            
-            const blob = await response.blob();
+            const blob = await renderPDFJob(cvId, 'interactive');
             const url = window.URL.createObjectURL(blob);
             const a = document.createElement('a');
             a.href = url;
@@ -318,20 +462,22 @@ export const cvService = {
         }
         
         try {
-            const response = await authenticatedFetch(`/api/cvs/${cvId}`, {
-                method: 'PUT',
-                body: JSON.stringify({
-                    markdown_content: content,
-                    settings
-                })
-            });
+            // Content-only changes go as a patch against the last saved text
+            const current = get(currentCV);
+            const settingsChanged = JSON.stringify(current?.settings) !== JSON.stringify(settings);
+            if (current?.id === cvId && !settingsChanged && globalThis.crypto?.subtle) {
+                const patched = await patchCVContent(cvId, current.markdown_content ?? '', content);
+                if (patched) return patched;
+            }
             
-            if (response.ok) {
-                const data = await response.json();
-                currentCV.set(data);
-                return { success: true };
+            const result = await saveCVFields(cvId, {
+                markdown_content: content,
+                settings
+            });
+            if (result.conflict) {
+                error.set(result.error);
             }
-            return { success: false };
+            return result;
         } catch (err) {
             return { success: false, error: err.message };
         }
@@ -1,5 +1,6 @@
 import { writable } from 'svelte/store';
 import { authenticatedFetch } from './auth.js';
+import { currentCV } from './cv.js';
 
 // LLM state
 export const chatHistory = writable([]);
@@ -9,9 +10,42 @@ export const atsAnalysis = writable(null);
 export const inlineEditHistory = writable([]);
 export const isInlineEditing = writable(false);
 
+// Read a Server-Sent Events response: calls onDelta for each "delta" event and
+// resolves with the "done" payload (rejects on an "error" event or a cut-off stream)
+async function readEventStream(response, onDelta) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            let data = '';
+            for (const line of rawEvent.split('\n')) {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            }
+            const payload = data ? JSON.parse(data) : {};
+            
+            if (event === 'delta') onDelta(payload.content);
+            else if (event === 'done') return payload;
+            else if (event === 'error') throw new Error(payload.detail || 'AI request failed');
+        }
+    }
+    throw new Error('Connection closed before the response finished');
+}
+
 // LLM service functions
 export const llmService = {
-    // Function 1: Chat with LLM about CV
+    // Function 1: Chat with LLM about CV (reply streams into the chat history)
     async chatAboutCV(message, cvId = null, cvContent = null) {
         isLLMLoading.set(true);
         llmError.set(null);
@@ -21,7 +55,7 @@ export const llmService = {
             let currentHistory;
             chatHistory.subscribe(value => currentHistory = value)();
             
-            const response = await authenticatedFetch('/api/llm/chat', {
+            const response = await authenticatedFetch('/api/llm/chat/stream', {
                 method: 'POST',
                 body: JSON.stringify({
                     message,
@@ -36,19 +70,26 @@ export const llmService = {
                 throw new Error(errorData.detail || 'Chat failed');
             }
             
-            const data = await response.json();
-            
-            // Update chat history
+            // Show the user message and an assistant message that fills in as deltas arrive
             chatHistory.update(history => [
                 ...history,
                 { role: 'user', content: message },
-                { role: 'assistant', content: data.reply }
+                { role: 'assistant', content: '' }
             ]);
             
+            let reply = '';
+            const done = await readEventStream(response, (content) => {
+                reply += content;
+                chatHistory.update(history => [
+                    ...history.slice(0, -1),
+                    { role: 'assistant', content: reply }
+                ]);
+            });
+            
             return { 
                 success: true, 
-                reply: data.reply, 
-                suggestions: data.suggestions || [] 
+                reply, 
+                suggestions: done.suggestions || [] 
             };
         } catch (err) {
             llmError.set(err.message);
@@ -58,13 +99,14 @@ export const llmService = {
         }
     },
 
-    // Function 2: Inline edit CV content
-    async inlineEdit(cvId, instruction, section = null, autoSave = true) {
+    // Function 2: Inline edit CV content (onDelta receives the partial edit while it streams:
+    // just the targeted section when one is selected, the whole CV otherwise)
+    async inlineEdit(cvId, instruction, section = null, autoSave = true, onDelta = null) {
         isInlineEditing.set(true);
         llmError.set(null);
         
         try {
-            const response = await authenticatedFetch('/api/llm/inline-edit', {
+            const response = await authenticatedFetch('/api/llm/inline-edit/stream', {
                 method: 'POST',
                 body: JSON.stringify({
                     cv_id: cvId,
@@ -79,7 +121,19 @@ export const llmService = {
                 throw new Error(errorData.detail || 'Inline edit failed');
             }
             
-            const data = await response.json();
+            let partial = '';
+            const data = await readEventStream(response, (content) => {
+                partial += content;
+                if (onDelta) onDelta(partial);
+            });
+            
+            // The server saved the edit: record the content and version it now holds,
+            // so the next autosave's If-Match matches
+            if (data.auto_saved) {
+                currentCV.update(cv => cv?.id === cvId
+                    ? { ...cv, markdown_content: data.edited_content, version: data.version }
+                    : cv);
+            }
             
             // Add to inline edit history
             inlineEditHistory.update(history => [
@@ -108,14 +162,15 @@ export const llmService = {
     },
 
     // FIXED: Function 3: ATS Score Analysis
-    async analyzeATS(cvId, cvContent, targetRole, jobDescription) {
+    // mode 'fast' returns the locally computed scores without waiting for AI feedback
+    async analyzeATS(cvId, cvContent, targetRole, jobDescription, mode = 'full') {
         isLLMLoading.set(true);
         llmError.set(null);
         
         try {
             console.log('Starting ATS analysis...', { cvId, hasContent: !!cvContent, targetRole, hasJobDescription: !!jobDescription });
             
-            const response = await authenticatedFetch('/api/llm/ats-score', {
+            const response = await authenticatedFetch(`/api/llm/ats-score?mode=${mode}`, {
                 method: 'POST',
                 body: JSON.stringify({
                     cv_id: cvId,